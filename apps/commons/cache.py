@@ -0,0 +1,12 @@
+from django.core.cache import caches
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+
+
+def is_shared(alias='default'):
+    """
+    True for an out-of-process cache (Redis, Memcached) that every worker
+    sees. LocMem is per process and the database cache costs a query per
+    lookup, so neither counts.
+    """
+    return isinstance(caches[alias], (RedisCache, BaseMemcachedCache))
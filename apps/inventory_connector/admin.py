@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django import forms
-from apps.inventory_connector.models import MealInventoryConnector, MealInventoryMapping
+from django.db.models import Count
+from django.utils import timezone
+from apps.inventory_connector.models import InventoryOutbox, MealInventoryConnector, MealInventoryMapping
 
 
 class MealInventoryMappingForm(forms.ModelForm):
@@ -62,18 +64,42 @@ class MealInventoryConnectorAdmin(admin.ModelAdmin):
         return f"{obj.meal.price} AZN" if obj.meal else "Yoxdur"
     get_meal_price.short_description = 'Menu Qiyməti'
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'meal__category', 'meal__cost_summary'
+        ).annotate(inventory_count=Count('mappings'))
+
     def get_cost_price(self, obj):
-        """Calculate total cost price based on ingredient costs and quantities"""
-        total_cost = 0
-        for mapping in obj.mappings.all():
-            ingredient_cost = mapping.quantity * mapping.price
-            total_cost += ingredient_cost
+        """Total cost price, precomputed in MealCost"""
+        summary = getattr(obj.meal, 'cost_summary', None)
+        total_cost = summary.cost if summary else 0
         return f"{total_cost:.3f} AZN"
     get_cost_price.short_description = 'Maya Dəyəri'
+    get_cost_price.admin_order_field = 'meal__cost_summary__cost'
     
     def get_inventory_count(self, obj):
-        return obj.mappings.count()
+        count = getattr(obj, 'inventory_count', None)
+        return count if count is not None else obj.mappings.count()
     get_inventory_count.short_description = 'Anbar Məhsulu Sayı'
 
 
 admin.site.register(MealInventoryConnector, MealInventoryConnectorAdmin)
+
+
+class InventoryOutboxAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'attempts', 'created_at', 'available_at', 'processed_at', 'last_error')
+    list_filter = ('status',)
+    readonly_fields = ('items', 'attempts', 'last_error', 'created_at', 'processed_at')
+    actions = ['retry_entries']
+
+    @admin.action(description="Yenidən cəhd et")
+    def retry_entries(self, request, queryset):
+        updated = queryset.exclude(status=InventoryOutbox.STATUS_DONE).update(
+            status=InventoryOutbox.STATUS_PENDING,
+            attempts=0,
+            available_at=timezone.now()
+        )
+        self.message_user(request, f"{updated} hərəkət yenidən növbəyə qoyuldu.")
+
+
+admin.site.register(InventoryOutbox, InventoryOutboxAdmin)
@@ -20,3 +20,44 @@ class InventoryConnectorConfig(AppConfig):
         post_delete.connect(
             OrderItemInventoryManager.post_delete, sender=OrderItem
         )
+
+        # Drop the in-memory recipe map whenever a recipe changes.
+        from apps.inventory_connector import recipes
+        from apps.inventory_connector.models import (MealInventoryConnector,
+                                                     MealInventoryMapping)
+        for model in (MealInventoryConnector, MealInventoryMapping):
+            post_save.connect(
+                recipes.invalidate, sender=model,
+                dispatch_uid=f"recipes_invalidate_save_{model.__name__}"
+            )
+            post_delete.connect(
+                recipes.invalidate, sender=model,
+                dispatch_uid=f"recipes_invalidate_delete_{model.__name__}"
+            )
+
+        # Recompute the precomputed meal costs when a recipe changes.
+        from apps.inventory_connector import costs
+        for model, receiver in (
+            (MealInventoryConnector, costs.connector_changed),
+            (MealInventoryMapping, costs.mapping_changed),
+        ):
+            post_save.connect(
+                receiver, sender=model,
+                dispatch_uid=f"costs_refresh_save_{model.__name__}"
+            )
+            post_delete.connect(
+                receiver, sender=model,
+                dispatch_uid=f"costs_refresh_delete_{model.__name__}"
+            )
+
+        # Keep the stock projection in line with records written elsewhere.
+        from inventory.models import InventoryRecord
+        from apps.inventory_connector import stock
+        post_save.connect(
+            stock.inventory_record_saved, sender=InventoryRecord,
+            dispatch_uid="stock_inventory_record_saved"
+        )
+        post_delete.connect(
+            stock.invalidate, sender=InventoryRecord,
+            dispatch_uid="stock_inventory_record_deleted"
+        )
@@ -0,0 +1,79 @@
+"""
+Precomputed cost of goods per meal (MealCost).
+
+The cost of a meal is the sum of quantity × unit price over its recipe
+lines. Instead of summing the mappings for every admin row, the totals
+are kept in MealCost and refreshed with one grouped query whenever a
+MealInventoryConnector or MealInventoryMapping (which holds the unit
+price) is saved or deleted.
+"""
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+
+def refresh_costs(meal_ids=None):
+    """
+    Recompute MealCost of the given meals (all meals when None).
+    Meals without recipe lines get a zero cost.
+    """
+    from apps.inventory_connector.models import MealCost, MealInventoryMapping
+    from apps.meals.models import Meal
+
+    meals = Meal.objects.all()
+    if meal_ids is not None:
+        meals = meals.filter(pk__in=meal_ids)
+    meal_ids = list(meals.values_list('pk', flat=True))
+
+    totals = dict(
+        MealInventoryMapping.objects
+        .filter(connector__meal_id__in=meal_ids)
+        .values('connector__meal_id')
+        .annotate(total=Sum(
+            F('quantity') * F('price'),
+            output_field=models.DecimalField(max_digits=20, decimal_places=6)
+        ))
+        .values_list('connector__meal_id', 'total')
+    )
+
+    now = timezone.now()
+    MealCost.objects.bulk_create(
+        [
+            MealCost(
+                meal_id=meal_id,
+                cost=(totals.get(meal_id) or Decimal('0')).quantize(Decimal('0.001')),
+                updated_at=now,
+            )
+            for meal_id in meal_ids
+        ],
+        update_conflicts=True,
+        unique_fields=['meal'],
+        update_fields=['cost', 'updated_at'],
+    )
+    return len(meal_ids)
+
+
+def _schedule_refresh(meal_id):
+    if meal_id is not None:
+        transaction.on_commit(lambda: refresh_costs([meal_id]))
+
+
+def connector_changed(sender, instance, **kwargs):
+    """post_save/post_delete of MealInventoryConnector."""
+    _schedule_refresh(instance.meal_id)
+
+
+def mapping_changed(sender, instance, **kwargs):
+    """post_save/post_delete of MealInventoryMapping."""
+    from apps.inventory_connector.models import MealInventoryConnector
+
+    meal_id = (
+        MealInventoryConnector.objects
+        .filter(pk=instance.connector_id)
+        .values_list('meal_id', flat=True)
+        .first()
+    )
+    _schedule_refresh(meal_id)
+
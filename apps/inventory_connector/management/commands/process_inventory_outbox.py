@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.inventory_connector.outbox import MAX_ATTEMPTS, drain
+
+
+class Command(BaseCommand):
+    help = 'Apply pending inventory outbox rows to InventoryRecord'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of outbox rows applied per transaction',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait when the outbox is empty',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=MAX_ATTEMPTS,
+            help='Attempts before a row is marked as failed',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the outbox once and exit',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        max_attempts = options['max_attempts']
+
+        if options['once']:
+            applied = drain(batch_size, max_attempts)
+            self.stdout.write(self.style.SUCCESS(f'Applied {applied} outbox rows'))
+            return
+
+        self.stdout.write(self.style.SUCCESS('Processing inventory outbox...'))
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    applied = drain(batch_size, max_attempts)
+                except Exception as error:
+                    self.stdout.write(self.style.ERROR(f'Outbox error: {error}'))
+                    applied = 0
+                if applied:
+                    self.stdout.write(f'Applied {applied} outbox rows')
+                else:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('Stopped'))
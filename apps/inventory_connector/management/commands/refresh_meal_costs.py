@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory_connector.costs import refresh_costs
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed cost of every meal (MealCost)'
+
+    def handle(self, *args, **options):
+        count = refresh_costs()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed the cost of {count} meals'))
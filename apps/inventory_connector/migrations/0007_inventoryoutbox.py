@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_connector', '0006_update_price_help_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('items', models.JSONField(help_text="[[əməliyyat, yemək ID, miqdar], ...] — əməliyyat 'remove' və ya 'add'", verbose_name='Hərəkətlər')),
+                ('status', models.CharField(choices=[('pending', 'Gözləyir'), ('done', 'Tətbiq edildi'), ('failed', 'Uğursuz')], default='pending', max_length=20, verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Cəhd sayı')),
+                ('last_error', models.TextField(blank=True, verbose_name='Son xəta')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Növbəti cəhd vaxtı')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaradılma vaxtı')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Tətbiq vaxtı')),
+            ],
+            options={
+                'verbose_name': 'Anbar hərəkəti (növbə)',
+                'verbose_name_plural': 'Anbar hərəkətləri (növbə)',
+                'indexes': [models.Index(fields=['status', 'available_at', 'id'], name='inventory_c_status_44040c_idx')],
+            },
+        ),
+    ]
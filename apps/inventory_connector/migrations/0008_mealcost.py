@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def fill_costs(apps, schema_editor):
+    Meal = apps.get_model('meals', 'Meal')
+    MealCost = apps.get_model('inventory_connector', 'MealCost')
+    MealInventoryMapping = apps.get_model('inventory_connector', 'MealInventoryMapping')
+
+    totals = dict(
+        MealInventoryMapping.objects
+        .values('connector__meal_id')
+        .annotate(total=Sum(
+            F('quantity') * F('price'),
+            output_field=models.DecimalField(max_digits=20, decimal_places=6)
+        ))
+        .values_list('connector__meal_id', 'total')
+    )
+    MealCost.objects.bulk_create([
+        MealCost(meal_id=meal_id, cost=round(totals.get(meal_id) or 0, 3))
+        for meal_id in Meal.objects.values_list('pk', flat=True)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_connector', '0007_inventoryoutbox'),
+        ('meals', '0011_alter_meal_updated_at_alter_mealcategory_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MealCost',
+            fields=[
+                ('meal', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cost_summary', serialize=False, to='meals.meal', verbose_name='Menu')),
+                ('cost', models.DecimalField(decimal_places=3, default=0, max_digits=12, verbose_name='Maya Dəyəri (AZN)')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yenilənmə vaxtı')),
+            ],
+            options={
+                'verbose_name': 'Menu maya dəyəri',
+                'verbose_name_plural': 'Menu maya dəyərləri',
+            },
+        ),
+        migrations.RunPython(fill_costs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_connector', '0008_mealcost'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inventoryoutbox',
+            name='items',
+            field=models.JSONField(help_text="[[əməliyyat, səbəb, anbar məhsulu ID, miqdar, qiymət], ...] — əməliyyat 'remove' və ya 'add'", verbose_name='Hərəkətlər'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from apps.meals.models import Meal
 from inventory.models import InventoryItem
 
@@ -75,3 +76,90 @@ class MealInventoryMapping(models.Model):
         verbose_name = "Menu-Anbar Miqdarı Əlaqəsi"
         verbose_name_plural = "Menu-Anbar Miqdarı Əlaqələri"
         unique_together = ('connector', 'inventory_item')
+
+
+class InventoryOutbox(models.Model):
+    """
+    Sifariş əməliyyatlarından yaranan anbar hərəkətləri. Sifarişlə eyni
+    tranzaksiyada yazılır, `process_inventory_outbox` isə onları sıra ilə
+    InventoryRecord-a köçürür.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Gözləyir"),
+        (STATUS_DONE, "Tətbiq edildi"),
+        (STATUS_FAILED, "Uğursuz"),
+    ]
+
+    items = models.JSONField(
+        help_text="[[əməliyyat, səbəb, anbar məhsulu ID, miqdar, qiymət], ...] — əməliyyat 'remove' və ya 'add'",
+        verbose_name="Hərəkətlər"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name="Status"
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Cəhd sayı"
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name="Son xəta"
+    )
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Növbəti cəhd vaxtı"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Yaradılma vaxtı"
+    )
+    processed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Tətbiq vaxtı"
+    )
+
+    def __str__(self):
+        return f"Anbar hərəkəti #{self.pk} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = "Anbar hərəkəti (növbə)"
+        verbose_name_plural = "Anbar hərəkətləri (növbə)"
+        indexes = [models.Index(fields=["status", "available_at", "id"])]
+
+
+class MealCost(models.Model):
+    """
+    Yeməyin maya dəyəri (resept xəttlərinin miqdar × vahid qiymət cəmi).
+    Resept dəyişəndə `costs.refresh_costs` tərəfindən yenilənir.
+    """
+    meal = models.OneToOneField(
+        Meal,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='cost_summary',
+        verbose_name="Menu"
+    )
+    cost = models.DecimalField(
+        max_digits=12,
+        decimal_places=3,
+        default=0,
+        verbose_name="Maya Dəyəri (AZN)"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Yenilənmə vaxtı"
+    )
+
+    def __str__(self):
+        return f"{self.meal.name}: {self.cost} AZN"
+
+    class Meta:
+        verbose_name = "Menu maya dəyəri"
+        verbose_name_plural = "Menu maya dəyərləri"
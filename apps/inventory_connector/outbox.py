@@ -0,0 +1,124 @@
+"""
+Consumer of the inventory outbox.
+
+Order requests only insert an InventoryOutbox row (in their own
+transaction); this module turns pending rows into InventoryRecord entries:
+
+- rows are applied in id order, in batches, with one bulk insert per batch;
+- the records and the "done" mark are written in the same transaction, so
+  a crash before commit leaves the rows pending and they are applied again
+  (at-least-once);
+- a failing row is retried with exponential backoff and later rows wait
+  behind it to keep the order; after MAX_ATTEMPTS it is marked failed and
+  the queue moves on.
+
+Run a single consumer (`manage.py process_inventory_outbox`) for strict
+ordering; extra consumers skip rows locked by another one on PostgreSQL.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+from inventory.models import InventoryRecord
+
+from apps.inventory_connector.models import InventoryOutbox
+
+MAX_ATTEMPTS = 5
+BASE_BACKOFF_SECONDS = 5
+MAX_BACKOFF_SECONDS = 3600
+
+
+def build_entry_records(entry):
+    """InventoryRecord entries (unsaved) of one outbox row."""
+    return [
+        InventoryRecord(
+            inventory_item_id=inventory_item_id,
+            quantity=Decimal(quantity),
+            record_type=operation,
+            reason=reason,
+            price=Decimal(price),
+        )
+        for operation, reason, inventory_item_id, quantity, price in entry.items
+    ]
+
+
+def _mark_failed_attempt(entry, error, now, max_attempts):
+    entry.attempts += 1
+    entry.last_error = str(error)
+    if entry.attempts >= max_attempts:
+        entry.status = InventoryOutbox.STATUS_FAILED
+    else:
+        delay = min(
+            BASE_BACKOFF_SECONDS * 2 ** (entry.attempts - 1), MAX_BACKOFF_SECONDS
+        )
+        entry.available_at = now + timedelta(seconds=delay)
+    entry.save(update_fields=['attempts', 'last_error', 'status', 'available_at'])
+
+
+def process_outbox(batch_size=100, max_attempts=MAX_ATTEMPTS):
+    """
+    Apply one batch of pending outbox rows. Returns the number of rows
+    applied (0 when there is nothing to do or the head of the queue is
+    waiting for a retry).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        head = (
+            InventoryOutbox.objects
+            .filter(status=InventoryOutbox.STATUS_PENDING)
+            .order_by('id')
+            .values('available_at')
+            .first()
+        )
+        if head is None or head['available_at'] > now:
+            return 0
+
+        entries = list(
+            InventoryOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=InventoryOutbox.STATUS_PENDING)
+            .order_by('id')[:batch_size]
+        )
+
+        applied = []
+        try:
+            with transaction.atomic():
+                records = []
+                for entry in entries:
+                    if entry.available_at > now:
+                        break
+                    records.extend(build_entry_records(entry))
+                    applied.append(entry)
+                InventoryRecord.objects.bulk_create(records)
+        except Exception:
+            # Find the failing row: apply one by one up to it
+            applied = []
+            for entry in entries:
+                if entry.available_at > now:
+                    break
+                try:
+                    with transaction.atomic():
+                        InventoryRecord.objects.bulk_create(
+                            build_entry_records(entry))
+                except Exception as error:
+                    _mark_failed_attempt(entry, error, now, max_attempts)
+                    if entry.status == InventoryOutbox.STATUS_PENDING:
+                        break
+                    continue
+                applied.append(entry)
+
+        InventoryOutbox.objects.filter(
+            pk__in=[entry.pk for entry in applied]
+        ).update(status=InventoryOutbox.STATUS_DONE, processed_at=now)
+    return len(applied)
+
+
+def drain(batch_size=100, max_attempts=MAX_ATTEMPTS):
+    """Apply batches until nothing is ready. Returns the rows applied."""
+    total = 0
+    while True:
+        applied = process_outbox(batch_size, max_attempts)
+        if not applied:
+            return total
+        total += applied
@@ -0,0 +1,91 @@
+"""
+Process-level recipe map: meal id -> ((inventory_item_id, quantity, unit_price), ...).
+
+Recipes change rarely, so every process keeps the whole map in memory and
+inventory operations become pure arithmetic. The map is loaded with one
+query and dropped whenever a MealInventoryConnector or MealInventoryMapping
+is saved or deleted.
+
+A version number in the Django cache is bumped on every change, so the
+other processes (with a shared cache backend) reload too. A process reads
+the version at most every VERSION_CHECK_SECONDS; its own changes drop the
+map at once.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = "inventory_connector:recipes:version"
+VERSION_CHECK_SECONDS = 5
+
+_lock = threading.Lock()
+_recipes = None
+_version = None
+_checked_at = 0.0
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def _load():
+    from apps.inventory_connector.models import MealInventoryMapping
+
+    recipes = {}
+    rows = MealInventoryMapping.objects.values_list(
+        'connector__meal_id', 'inventory_item_id', 'quantity', 'price'
+    ).order_by('connector__meal_id', 'pk')
+    for meal_id, inventory_item_id, quantity, price in rows:
+        recipes.setdefault(meal_id, []).append(
+            (inventory_item_id, quantity, price)
+        )
+    return {meal_id: tuple(lines) for meal_id, lines in recipes.items()}
+
+
+def get_recipes():
+    """The recipe map of every meal that has inventory mappings."""
+    global _recipes, _version, _checked_at
+
+    recipes = _recipes
+    if recipes is not None and time.monotonic() - _checked_at < VERSION_CHECK_SECONDS:
+        return recipes
+
+    version = _current_version()
+    with _lock:
+        if _recipes is None or _version != version:
+            _recipes = _load()
+            _version = version
+        _checked_at = time.monotonic()
+        return _recipes
+
+
+def get_recipe(meal_id):
+    """((inventory_item_id, quantity, unit_price), ...) of a meal."""
+    return get_recipes().get(meal_id, ())
+
+
+def _drop():
+    global _recipes
+
+    with _lock:
+        _recipes = None
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def invalidate(**kwargs):
+    """
+    Drop the recipe map. Connected to the save/delete signals of the
+    connector models; dropped again on commit so a map reloaded inside the
+    transaction is not kept afterwards.
+    """
+    _drop()
+    transaction.on_commit(_drop)
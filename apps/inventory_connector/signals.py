@@ -1,115 +1,253 @@
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from decimal import Decimal
 
+from django.conf import settings
 from inventory.models import InventoryRecord
+from apps.inventory_connector import stock
+from apps.inventory_connector.recipes import get_recipes
 from apps.orders.models import OrderItem
 
 
+_batch_state = threading.local()
+
+# What a queued change needs from an OrderItem, captured at signal time
+Portion = namedtuple('Portion', ['meal_id', 'quantity'])
+
+
 class OrderItemInventoryManager:
     @staticmethod
-    def _process_mappings(instance, operation):
+    def build_records(items, operation):
         """
-        Helper method to create InventoryRecord entries based on OrderItem's mappings.
+        Unsaved InventoryRecord entries for many OrderItems at once.
 
+        items: OrderItems (or any objects with `meal_id` and `quantity`).
         operation: 'remove' for deducting inventory,
                    'add' for reversing a deduction (adding stock back).
 
-        For 'remove', the reason will be set as 'sold'.
-        For 'add', the reason is now set to 'return' so that the returned product
-        from an OrderItem is properly recorded.
+        Recipes come from the in-memory recipe map and ingredient
+        quantities are summed per InventoryItem across the items.
         """
-        try:
-            connector = getattr(instance.meal, 'inventory_connector', None)
-            if not connector:
-                return
-
-            mappings = connector.mappings.all()
-            if not mappings.exists():
-                return
-
-            for mapping in mappings:
-                # Calculate the total quantity change: per-meal quantity * order item quantity
-                quantity_change = mapping.quantity * instance.quantity
-                # For removal, use 'sold'; for addition (reversal) use the 'return' reason.
-                reason = 'sold' if operation == 'remove' else 'return'
-                # Calculate the price for the inventory record.
-                price = round(mapping.price * quantity_change, 3)
-                
-                # Validate that we have required data
-                if not mapping.inventory_item:
-                    print(f"Warning: No inventory item found for mapping {mapping.id}")
-                    continue
-                    
-                InventoryRecord.objects.create(
-                    inventory_item=mapping.inventory_item,
-                    quantity=quantity_change,
-                    record_type=operation,
-                    reason=reason,
-                    price=price
+        quantities = {}
+        for item in items:
+            if item.meal_id:
+                quantities[item.meal_id] = (
+                    quantities.get(item.meal_id, 0) + item.quantity
                 )
+        if not quantities:
+            return []
+
+        recipes = get_recipes()
+        totals = {}
+        for meal_id, ordered in quantities.items():
+            for inventory_item_id, quantity, price in recipes.get(meal_id, ()):
+                # Per-meal quantity * ordered quantity of that meal
+                quantity_change = quantity * ordered
+                total = totals.setdefault(
+                    inventory_item_id, [Decimal('0'), Decimal('0')])
+                total[0] += quantity_change
+                total[1] += price * quantity_change
+
+        # For removal, use 'sold'; for addition (reversal) use the 'return' reason.
+        reason = 'sold' if operation == 'remove' else 'return'
+        return [
+            InventoryRecord(
+                inventory_item_id=inventory_item_id,
+                quantity=quantity,
+                record_type=operation,
+                reason=reason,
+                price=round(price, 3)
+            )
+            for inventory_item_id, (quantity, price) in totals.items()
+        ]
+
+    @staticmethod
+    def process_items(items, operation):
+        """
+        Write the InventoryRecord entries of many OrderItems with a single
+        bulk_create (see `build_records`).
+        """
+        try:
+            records = OrderItemInventoryManager.build_records(items, operation)
+            if not records:
+                return []
+            return InventoryRecord.objects.bulk_create(records)
         except Exception as error:
             print(f"Error processing inventory mappings for {operation}: {error}")
             # Consider logging this error properly in production
+            return []
 
     @staticmethod
-    def pre_save(sender, instance, **kwargs):
+    def record(movements):
+        """
+        Record inventory movements: {'remove': [items], 'add': [items]}.
+
+        With `settings.INVENTORY_OUTBOX` the InventoryRecord lines of the
+        movements (see `build_records`) are stored as one InventoryOutbox
+        row in the caller's transaction and inserted later by
+        `process_inventory_outbox`. Otherwise the records are written right
+        away.
         """
-        Capture the old confirmed value so that we can compare it in post_save.
-        For new instances, assume confirmed is False.
-        """
-        if instance.pk:
-            try:
-                old_instance = OrderItem.objects.get(pk=instance.pk)
-                instance._old_confirmed = old_instance.confirmed
-                instance._old_quantity = old_instance.quantity
-            except OrderItem.DoesNotExist:
-                instance._old_confirmed = False
-                instance._old_quantity = 0
-        else:
-            instance._old_confirmed = False
-            instance._old_quantity = 0
+        movements = {
+            operation: items for operation, items in movements.items() if items
+        }
+        if not movements:
+            return
+
+        try:
+            stock.apply_movements(movements)
+        except Exception as error:
+            print(f"Error updating stock projection: {error}")
+
+        if getattr(settings, 'INVENTORY_OUTBOX', False):
+            from apps.inventory_connector.models import InventoryOutbox
+
+            # The resolved ingredient lines: recipe edits made before the
+            # row is applied do not change what was sold
+            lines = [
+                [record.record_type, record.reason, record.inventory_item_id,
+                 str(record.quantity), str(record.price)]
+                for operation, items in movements.items()
+                for record in OrderItemInventoryManager.build_records(items, operation)
+            ]
+            if lines:
+                InventoryOutbox.objects.create(items=lines)
+            return
+
+        for operation, items in movements.items():
+            OrderItemInventoryManager.process_items(items, operation)
 
     @staticmethod
-    def post_save(sender, instance, created, **kwargs):
+    @contextmanager
+    def batch():
+        """
+        Collect the inventory changes of every OrderItem saved or deleted
+        inside the block and record them together (one outbox row, or one
+        bulk insert per operation) when the block exits. Nested blocks join
+        the outer one.
+
+        Use it inside the request's transaction so the movements are
+        stored (or rolled back) together with the order items.
+        """
+        if getattr(_batch_state, 'pending', None) is not None:
+            yield
+            return
+
+        _batch_state.pending = {'remove': [], 'add': []}
+        try:
+            yield
+            pending = _batch_state.pending
+        finally:
+            _batch_state.pending = None
+
+        OrderItemInventoryManager.record(pending)
+
+    @staticmethod
+    def _process_mappings(instance, operation):
+        """
+        Record the inventory change of a single OrderItem.
+
+        operation: 'remove' for deducting inventory,
+                   'add' for reversing a deduction (adding stock back).
+
+        Inside a `batch()` block the change is queued and recorded with the
+        rest of the batch.
+        """
+        portion = Portion(instance.meal_id, instance.quantity)
+        pending = getattr(_batch_state, 'pending', None)
+        if pending is not None:
+            pending[operation].append(portion)
+            return
+        OrderItemInventoryManager.record({operation: [portion]})
+
+    @staticmethod
+    def _old_values(instance):
+        """
+        Stored `confirmed`/`quantity` of the instance, taken from the
+        snapshot captured in `OrderItem.from_db` (or after its last save).
+        Only instances built by hand with an existing pk need a query.
+        """
+        if instance._state.adding or not instance.pk:
+            return False, 0
+
+        loaded = getattr(instance, '_loaded_values', {})
+        if all(name in loaded for name in OrderItem.TRACKED_FIELDS):
+            return loaded['confirmed'], loaded['quantity']
+
+        old = OrderItem.objects.all_order_items().filter(
+            pk=instance.pk).values('confirmed', 'quantity').first()
+        if old is None:
+            return False, 0
+        return old['confirmed'], old['quantity']
+
+    @staticmethod
+    def _record_change(instance, old_confirmed, old_quantity):
         """
         Update inventory based on changes to the OrderItem 'confirmed' field and quantity changes.
 
-        CASE 1: New confirmed OrderItem - subtract inventory.
-        CASE 2: Updated OrderItem:
-          - Transition from unconfirmed to confirmed: subtract inventory.
+          - New confirmed item or transition from unconfirmed to confirmed: subtract inventory.
           - Transition from confirmed to unconfirmed: add inventory back (recorded as a return).
           - Quantity change on confirmed item: adjust inventory accordingly.
         """
+        # Transition from unconfirmed to confirmed.
+        if instance.confirmed and not old_confirmed:
+            OrderItemInventoryManager._process_mappings(instance, 'remove')
+        # Transition from confirmed to unconfirmed.
+        elif not instance.confirmed and old_confirmed:
+            OrderItemInventoryManager._process_mappings(instance, 'add')
+        # Handle quantity changes for confirmed items
+        elif instance.confirmed and old_confirmed and instance.quantity != old_quantity:
+            quantity_diff = instance.quantity - old_quantity
+            # Process only the difference
+            temp_instance = Portion(instance.meal_id, abs(quantity_diff))
+            if quantity_diff > 0:
+                # Increased quantity - remove more from inventory
+                OrderItemInventoryManager._process_mappings(temp_instance, 'remove')
+            else:
+                # Decreased quantity - add back to inventory
+                OrderItemInventoryManager._process_mappings(temp_instance, 'add')
+
+    @staticmethod
+    def apply_changes(items):
+        """
+        Opt-in for bulk paths that bypass the save signals
+        (`QuerySet.update`, `bulk_update`): pass the instances loaded
+        before the update, with their new values set. The inventory
+        changes against their snapshots are recorded in one batch and the
+        current values are marked as stored.
+        """
+        with OrderItemInventoryManager.batch():
+            for item in items:
+                old_confirmed, old_quantity = OrderItemInventoryManager._old_values(item)
+                OrderItemInventoryManager._record_change(item, old_confirmed, old_quantity)
+                item.snapshot_tracked_fields()
+
+    @staticmethod
+    def pre_save(sender, instance, **kwargs):
+        """
+        Capture the old confirmed/quantity values so that we can compare
+        them in post_save. For new instances, assume unconfirmed.
+        """
+        instance._old_confirmed, instance._old_quantity = (
+            OrderItemInventoryManager._old_values(instance)
+        )
+
+    @staticmethod
+    def post_save(sender, instance, created, **kwargs):
+        """
+        Record the inventory change of the save and refresh the snapshot
+        so the next save of the same instance compares against it.
+        """
         try:
-            if created and instance.confirmed:
-                OrderItemInventoryManager._process_mappings(instance, 'remove')
-            elif not created:
-                old_confirmed = getattr(instance, '_old_confirmed', False)
-                old_quantity = getattr(instance, '_old_quantity', 0)
-                
-                # Transition from unconfirmed to confirmed.
-                if instance.confirmed and not old_confirmed:
-                    OrderItemInventoryManager._process_mappings(instance, 'remove')
-                # Transition from confirmed to unconfirmed.
-                elif not instance.confirmed and old_confirmed:
-                    OrderItemInventoryManager._process_mappings(instance, 'add')
-                # Handle quantity changes for confirmed items
-                elif instance.confirmed and old_confirmed and instance.quantity != old_quantity:
-                    # Create a temporary instance with the difference to process
-                    quantity_diff = instance.quantity - old_quantity
-                    if quantity_diff != 0:
-                        # Create a temporary instance to process the difference
-                        temp_instance = type(instance)(
-                            meal=instance.meal,
-                            quantity=abs(quantity_diff),
-                            confirmed=True
-                        )
-                        if quantity_diff > 0:
-                            # Increased quantity - remove more from inventory
-                            OrderItemInventoryManager._process_mappings(temp_instance, 'remove')
-                        else:
-                            # Decreased quantity - add back to inventory
-                            OrderItemInventoryManager._process_mappings(temp_instance, 'add')
+            OrderItemInventoryManager._record_change(
+                instance,
+                getattr(instance, '_old_confirmed', False),
+                getattr(instance, '_old_quantity', 0),
+            )
         except Exception as error:
             print("Error updating inventory on order item save:", error)
+        instance.snapshot_tracked_fields()
 
     @staticmethod
     def post_delete(sender, instance, **kwargs):
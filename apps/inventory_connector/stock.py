@@ -0,0 +1,161 @@
+"""
+In-memory stock projection: inventory item id -> quantity on hand.
+
+The projection is loaded with one grouped query over InventoryRecord
+(plus the movements still waiting in the inventory outbox) and then kept
+up to date incrementally:
+
+- movements recorded by OrderItemInventoryManager are applied as deltas
+  when their transaction commits;
+- InventoryRecord rows created elsewhere (purchases, manual corrections)
+  are applied through its post_save signal; edits and deletes drop the
+  projection.
+
+It is reloaded every REFRESH_SECONDS so other processes' movements are
+picked up. Available portions of a meal are computed from the recipe map,
+so a check is a handful of dict lookups.
+"""
+import threading
+import time
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from inventory.models import InventoryRecord
+
+from apps.inventory_connector.recipes import get_recipe, get_recipes
+
+REFRESH_SECONDS = 300
+
+_lock = threading.Lock()
+_stock = None
+_loaded_at = 0.0
+_generation = 0
+
+
+def _movement_deltas(movements):
+    """
+    Stock deltas per inventory item of {'remove': [items], 'add': [items]}
+    (items with `meal_id` and `quantity`).
+    """
+    recipes = get_recipes()
+    deltas = {}
+    for operation, items in movements.items():
+        sign = -1 if operation == 'remove' else 1
+        for item in items:
+            for inventory_item_id, quantity, _price in recipes.get(item.meal_id, ()):
+                deltas[inventory_item_id] = (
+                    deltas.get(inventory_item_id, Decimal('0'))
+                    + sign * quantity * item.quantity
+                )
+    return deltas
+
+
+def _load():
+    from apps.inventory_connector.models import InventoryOutbox
+    from apps.inventory_connector.outbox import build_entry_records
+
+    rows = InventoryRecord.objects.values('inventory_item_id').annotate(
+        added=Sum('quantity', filter=Q(record_type='add')),
+        removed=Sum('quantity', filter=Q(record_type='remove')),
+    )
+    stock = {
+        row['inventory_item_id']: (row['added'] or 0) - (row['removed'] or 0)
+        for row in rows
+    }
+
+    # Movements not applied to InventoryRecord yet
+    pending = InventoryOutbox.objects.filter(
+        status=InventoryOutbox.STATUS_PENDING
+    ).only('items')
+    for entry in pending:
+        for record in build_entry_records(entry):
+            delta = record.quantity if record.record_type == 'add' else -record.quantity
+            stock[record.inventory_item_id] = (
+                stock.get(record.inventory_item_id, 0) + delta
+            )
+    return stock
+
+
+def get_stock():
+    """{inventory_item_id: quantity on hand}"""
+    global _stock, _loaded_at, _generation
+
+    stock = _stock
+    if stock is None or time.monotonic() - _loaded_at > REFRESH_SECONDS:
+        with _lock:
+            if _stock is None or time.monotonic() - _loaded_at > REFRESH_SECONDS:
+                _stock = _load()
+                _loaded_at = time.monotonic()
+                _generation += 1
+            stock = _stock
+    return stock
+
+
+def _portions(recipe, stock):
+    portions = min(
+        int(stock.get(inventory_item_id, 0) // quantity)
+        for inventory_item_id, quantity, _price in recipe
+    )
+    return max(portions, 0)
+
+
+def available_portions(meal_id):
+    """
+    How many portions of the meal the stock allows, or None when the meal
+    has no recipe (its stock is not tracked).
+    """
+    recipe = get_recipe(meal_id)
+    if not recipe:
+        return None
+    return _portions(recipe, get_stock())
+
+
+def available_portions_of(meal_ids):
+    """{meal_id: available_portions(meal_id)} for many meals at once."""
+    recipes = get_recipes()
+    tracked = [meal_id for meal_id in meal_ids if recipes.get(meal_id)]
+    stock = get_stock() if tracked else {}
+    portions = dict.fromkeys(meal_ids)
+    for meal_id in tracked:
+        portions[meal_id] = _portions(recipes[meal_id], stock)
+    return portions
+
+
+def _apply_deltas(deltas, generation):
+    with _lock:
+        # A reload since the movement was recorded already contains it
+        if _stock is None or generation != _generation:
+            return
+        for inventory_item_id, delta in deltas.items():
+            _stock[inventory_item_id] = _stock.get(inventory_item_id, 0) + delta
+
+
+def _apply_on_commit(deltas):
+    if not deltas:
+        return
+    generation = _generation
+    transaction.on_commit(lambda: _apply_deltas(deltas, generation))
+
+
+def apply_movements(movements):
+    """Apply order movements ({'remove': [...], 'add': [...]}) on commit."""
+    _apply_on_commit(_movement_deltas(movements))
+
+
+def invalidate(**kwargs):
+    """Drop the projection; it is reloaded on next access."""
+    global _stock
+
+    with _lock:
+        _stock = None
+
+
+def inventory_record_saved(sender, instance, created, **kwargs):
+    """post_save of InventoryRecord written outside the order flow."""
+    if not created:
+        invalidate()
+        return
+    sign = {'add': 1, 'remove': -1}.get(instance.record_type)
+    if sign:
+        _apply_on_commit({instance.inventory_item_id: sign * instance.quantity})
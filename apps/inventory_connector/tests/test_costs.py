@@ -0,0 +1,52 @@
+from decimal import Decimal
+
+from django.contrib.admin.sites import AdminSite
+from django.test import RequestFactory, TestCase
+
+from apps.inventory_connector.costs import refresh_costs
+from apps.inventory_connector.models import MealCost, MealInventoryMapping
+from apps.inventory_connector.tests.test_inventory_order_integration import \
+    InventoryFixturesMixin
+from apps.meals.admin import MealAdmin
+from apps.meals.models import Meal
+
+
+class MealCostTests(InventoryFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        refresh_costs()
+
+    def cost(self):
+        return MealCost.objects.get(meal=self.meal).cost
+
+    def test_refresh_computes_recipe_cost(self):
+        # 0.2 kq × 6 + 0.3 kq × 2
+        self.assertEqual(self.cost(), Decimal("1.800"))
+        untracked = Meal.objects.create(name="Çay", price=Decimal("1.00"))
+        refresh_costs([untracked.id])
+        self.assertEqual(MealCost.objects.get(meal=untracked).cost, Decimal("0"))
+
+    def test_mapping_changes_refresh_cost(self):
+        mapping = MealInventoryMapping.objects.get(inventory_item=self.item_chicken)
+        with self.captureOnCommitCallbacks(execute=True):
+            mapping.price = Decimal("8.000")
+            mapping.save()
+        self.assertEqual(self.cost(), Decimal("2.200"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            mapping.delete()
+        self.assertEqual(self.cost(), Decimal("0.600"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.meal.inventory_connector.delete()
+        self.assertEqual(self.cost(), Decimal("0"))
+
+    def test_admin_columns_read_precomputed_cost(self):
+        model_admin = MealAdmin(Meal, AdminSite())
+        request = RequestFactory().get('/')
+
+        with self.assertNumQueries(1):
+            meal = model_admin.get_queryset(request).get(pk=self.meal.pk)
+            self.assertEqual(model_admin.cost_price(meal), "1.80 AZN")
+            self.assertEqual(model_admin.marja_amount(meal), "8.20 AZN")
+            self.assertEqual(model_admin.marja_percentage(meal), "82.0%")
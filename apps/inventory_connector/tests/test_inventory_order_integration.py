@@ -1,5 +1,5 @@
 from decimal import Decimal
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
@@ -13,7 +13,7 @@ from inventory.models import InventryCategory as InvCategory, Supplier as InvSup
 User = get_user_model()
 
 
-class InventoryOrderIntegrationTests(TestCase):
+class InventoryFixturesMixin:
     def setUp(self):
         # Users
         self.user = User.objects.create_user(
@@ -48,6 +48,9 @@ class InventoryOrderIntegrationTests(TestCase):
         InventoryRecord.objects.create(inventory_item=self.item_rice, quantity=Decimal(
             "20.000"), record_type="add", reason="purchase", price=40)
 
+
+@override_settings(INVENTORY_OUTBOX=False)
+class InventoryOrderIntegrationTests(InventoryFixturesMixin, TestCase):
     def test_confirm_order_item_deducts_inventory(self):
         from apps.orders.models import Order, OrderItem
         order = Order.objects.create(
@@ -126,3 +129,126 @@ class InventoryOrderIntegrationTests(TestCase):
                         quantity=Decimal("0.400"), reason='return').exists())
         self.assertTrue(adds.filter(inventory_item=self.item_rice,
                         quantity=Decimal("0.600"), reason='return').exists())
+
+    def test_batch_aggregates_per_inventory_item(self):
+        from apps.inventory_connector.signals import OrderItemInventoryManager
+        from apps.orders.models import Order, OrderItem
+        order = Order.objects.create(
+            table=self.table, waitress=self.user, is_main=True)
+        items = [
+            OrderItem.objects.create(
+                order=order, meal=self.meal, quantity=1, price=Decimal("10.00"), confirmed=False)
+            for _ in range(3)
+        ]
+
+        with OrderItemInventoryManager.batch():
+            for oi in items:
+                oi.confirmed = True
+                oi.save()
+            # Nothing is written until the batch exits
+            self.assertFalse(InventoryRecord.objects.filter(
+                record_type='remove').exists())
+
+        # One record per inventory item for the whole batch
+        removes = InventoryRecord.objects.filter(
+            record_type='remove', reason='sold')
+        self.assertEqual(removes.count(), 2)
+        self.assertTrue(removes.filter(
+            inventory_item=self.item_chicken, quantity=Decimal("0.600"), price=Decimal("3.600")).exists())
+        self.assertTrue(removes.filter(
+            inventory_item=self.item_rice, quantity=Decimal("0.900"), price=Decimal("1.800")).exists())
+
+    def test_process_items_query_count(self):
+        from apps.inventory_connector.signals import OrderItemInventoryManager
+        from apps.orders.models import Order, OrderItem
+        order = Order.objects.create(
+            table=self.table, waitress=self.user, is_main=True)
+        items = [
+            OrderItem(order=order, meal=self.meal, quantity=2)
+            for _ in range(20)
+        ]
+
+        # Recipe map load + bulk insert
+        with self.assertNumQueries(2):
+            OrderItemInventoryManager.process_items(items, 'remove')
+        # Recipes are served from memory afterwards
+        with self.assertNumQueries(1):
+            OrderItemInventoryManager.process_items(items, 'remove')
+
+    def test_recipe_change_invalidates_recipe_map(self):
+        from apps.inventory_connector.recipes import get_recipe
+        self.assertEqual(len(get_recipe(self.meal.id)), 2)
+
+        mapping = MealInventoryMapping.objects.get(
+            connector__meal=self.meal, inventory_item=self.item_rice)
+        mapping.quantity = Decimal("0.500")
+        mapping.save()
+        self.assertIn(
+            (self.item_rice.id, Decimal("0.500"), Decimal("2.000")),
+            get_recipe(self.meal.id)
+        )
+
+        mapping.delete()
+        self.assertEqual(len(get_recipe(self.meal.id)), 1)
+
+    def test_recipe_version_is_read_at_most_every_few_seconds(self):
+        from unittest import mock
+        from django.core.cache import cache
+        from apps.inventory_connector import recipes
+        recipes.get_recipes()
+
+        # Another process changes a recipe
+        cache.set(recipes.VERSION_KEY, -1, None)
+        with self.assertNumQueries(0), mock.patch.object(cache, 'get') as cache_get:
+            recipes.get_recipes()
+        cache_get.assert_not_called()
+
+        with mock.patch.object(recipes, 'VERSION_CHECK_SECONDS', 0), \
+                self.assertNumQueries(1):
+            recipes.get_recipes()
+
+    def test_save_does_not_reread_order_item(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from apps.orders.models import Order, OrderItem
+        order = Order.objects.create(
+            table=self.table, waitress=self.user, is_main=True)
+        created = OrderItem.objects.create(
+            order=order, meal=self.meal, quantity=1, price=Decimal("10.00"), confirmed=False)
+
+        oi = OrderItem.objects.get(pk=created.pk)
+        oi.confirmed = True
+        with CaptureQueriesContext(connection) as ctx:
+            oi.save()
+        self.assertFalse([
+            q for q in ctx.captured_queries
+            if q['sql'].startswith('SELECT') and 'FROM "orders_orderitem"' in q['sql']
+        ])
+        self.assertEqual(InventoryRecord.objects.filter(
+            record_type='remove', reason='sold').count(), 2)
+
+        # The snapshot follows the saved state: a second save changes nothing
+        oi.save()
+        self.assertEqual(InventoryRecord.objects.filter(
+            record_type='remove', reason='sold').count(), 2)
+
+    def test_apply_changes_for_bulk_update(self):
+        from apps.inventory_connector.signals import OrderItemInventoryManager
+        from apps.orders.models import Order, OrderItem
+        order = Order.objects.create(
+            table=self.table, waitress=self.user, is_main=True)
+        for _ in range(2):
+            OrderItem.objects.create(
+                order=order, meal=self.meal, quantity=1, price=Decimal("10.00"), confirmed=False)
+
+        items = list(order.order_items.all())
+        for oi in items:
+            oi.confirmed = True
+        OrderItem.objects.bulk_update(items, ['confirmed'])
+        OrderItemInventoryManager.apply_changes(items)
+
+        removes = InventoryRecord.objects.filter(
+            record_type='remove', reason='sold')
+        self.assertEqual(removes.count(), 2)
+        self.assertTrue(removes.filter(
+            inventory_item=self.item_chicken, quantity=Decimal("0.400")).exists())
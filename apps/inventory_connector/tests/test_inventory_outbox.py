@@ -0,0 +1,100 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.inventory_connector.models import InventoryOutbox, MealInventoryMapping
+from apps.inventory_connector.outbox import drain, process_outbox
+from apps.inventory_connector.signals import OrderItemInventoryManager
+from apps.inventory_connector.tests.test_inventory_order_integration import \
+    InventoryFixturesMixin
+from apps.orders.models import Order, OrderItem
+from inventory.models import InventoryRecord
+
+
+@override_settings(INVENTORY_OUTBOX=True)
+class InventoryOutboxTests(InventoryFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.order = Order.objects.create(
+            table=self.table, waitress=self.user, is_main=True)
+
+    def sold(self):
+        return InventoryRecord.objects.filter(record_type='remove', reason='sold')
+
+    def confirm_items(self, count):
+        items = [
+            OrderItem.objects.create(
+                order=self.order, meal=self.meal, quantity=1, price=Decimal("10.00"))
+            for _ in range(count)
+        ]
+        with OrderItemInventoryManager.batch():
+            for oi in items:
+                oi.confirmed = True
+                oi.save()
+
+    def test_batch_writes_single_outbox_row(self):
+        self.confirm_items(3)
+
+        self.assertEqual(InventoryOutbox.objects.count(), 1)
+        self.assertFalse(self.sold().exists())
+
+        self.assertEqual(drain(), 1)
+        entry = InventoryOutbox.objects.get()
+        self.assertEqual(entry.status, InventoryOutbox.STATUS_DONE)
+        self.assertTrue(self.sold().filter(
+            inventory_item=self.item_chicken, quantity=Decimal("0.600")).exists())
+
+        # Applied rows are not applied again
+        self.assertEqual(drain(), 0)
+        self.assertEqual(self.sold().count(), 2)
+
+    def test_row_keeps_the_recipe_of_the_sale(self):
+        self.confirm_items(2)
+        MealInventoryMapping.objects.filter(
+            inventory_item=self.item_chicken).update(quantity=Decimal("0.500"))
+        MealInventoryMapping.objects.first().save()  # drops the recipe map
+
+        drain()
+        self.assertTrue(self.sold().filter(
+            inventory_item=self.item_chicken, quantity=Decimal("0.400"),
+            price=Decimal("2.400")).exists())
+
+    def test_failed_row_is_retried_in_order(self):
+        self.confirm_items(1)
+        self.confirm_items(1)
+        first, second = InventoryOutbox.objects.order_by('id')
+
+        with mock.patch.object(
+            InventoryRecord.objects, 'bulk_create', side_effect=RuntimeError('db down')
+        ):
+            self.assertEqual(process_outbox(), 0)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.attempts, 1)
+        self.assertEqual(first.last_error, 'db down')
+        self.assertGreater(first.available_at, timezone.now())
+        # The second row waits behind the first one
+        self.assertEqual(second.status, InventoryOutbox.STATUS_PENDING)
+        self.assertEqual(process_outbox(), 0)
+
+        InventoryOutbox.objects.filter(pk=first.pk).update(
+            available_at=timezone.now())
+        self.assertEqual(drain(), 2)
+        self.assertEqual(self.sold().count(), 4)
+
+    def test_row_marked_failed_after_max_attempts(self):
+        self.confirm_items(1)
+        self.confirm_items(1)
+
+        with mock.patch.object(
+            InventoryRecord.objects, 'bulk_create', side_effect=RuntimeError('db down')
+        ):
+            process_outbox(max_attempts=1)
+
+        statuses = list(
+            InventoryOutbox.objects.order_by('id').values_list('status', flat=True))
+        self.assertEqual(
+            statuses, [InventoryOutbox.STATUS_FAILED, InventoryOutbox.STATUS_FAILED])
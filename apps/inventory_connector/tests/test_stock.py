@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.inventory_connector import stock
+from apps.inventory_connector.outbox import drain
+from apps.inventory_connector.signals import OrderItemInventoryManager
+from apps.inventory_connector.tests.test_inventory_order_integration import \
+    InventoryFixturesMixin
+from apps.meals.models import Meal
+from apps.orders.models import Order, OrderItem
+from inventory.models import InventoryRecord
+
+
+class StockProjectionTests(InventoryFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        stock.invalidate()
+        self.order = Order.objects.create(
+            table=self.table, waitress=self.user, is_main=True)
+
+    def confirm(self, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderItem.objects.create(
+                order=self.order, meal=self.meal, quantity=quantity,
+                price=Decimal("10.00"), confirmed=True)
+
+    def test_available_portions(self):
+        # 10 kq chicken / 0.2 = 50, 20 kq rice / 0.3 = 66
+        self.assertEqual(stock.available_portions(self.meal.id), 50)
+        untracked = Meal.objects.create(name="Çay", price=Decimal("1.00"))
+        self.assertIsNone(stock.available_portions(untracked.id))
+
+    @override_settings(INVENTORY_OUTBOX=False)
+    def test_deductions_update_projection_without_queries(self):
+        self.assertEqual(stock.available_portions(self.meal.id), 50)
+        self.confirm(2)
+        with self.assertNumQueries(0):
+            self.assertEqual(stock.available_portions(self.meal.id), 48)
+
+        # A fresh load agrees with the incremental state
+        stock.invalidate()
+        self.assertEqual(stock.available_portions(self.meal.id), 48)
+
+    @override_settings(INVENTORY_OUTBOX=True)
+    def test_pending_outbox_counts_on_reload(self):
+        self.assertEqual(stock.available_portions(self.meal.id), 50)
+        self.confirm(5)
+        self.assertEqual(stock.available_portions(self.meal.id), 45)
+
+        stock.invalidate()
+        self.assertEqual(stock.available_portions(self.meal.id), 45)
+        drain()
+        stock.invalidate()
+        self.assertEqual(stock.available_portions(self.meal.id), 45)
+
+    def test_purchase_record_updates_projection(self):
+        self.assertEqual(stock.available_portions(self.meal.id), 50)
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryRecord.objects.create(
+                inventory_item=self.item_chicken, quantity=Decimal("2.000"),
+                record_type="add", reason="purchase", price=12)
+        self.assertEqual(stock.available_portions(self.meal.id), 60)
+
+    def test_meal_api_flags_sold_out(self):
+        cache.clear()
+        params = {'meal_category_id': self.meal.category_id}
+        self.assertEqual(
+            self.client.get('/api/meals/meals/', params).json()[0]['available_portions'], 50)
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryRecord.objects.create(
+                inventory_item=self.item_chicken, quantity=Decimal("10.000"),
+                record_type="remove", reason="waste", price=0)
+
+        # The meal rows come from the cache, the portions from the stock
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/meals/meals/', params)
+        meal = response.json()[0]
+        self.assertEqual(meal['available_portions'], 0)
+        self.assertTrue(meal['is_sold_out'])
+
+    @override_settings(INVENTORY_REJECT_SOLD_OUT=True)
+    def test_add_rejected_when_sold_out(self):
+        InventoryRecord.objects.create(
+            inventory_item=self.item_rice, quantity=Decimal("20.000"),
+            record_type="remove", reason="waste", price=0)
+        stock.invalidate()
+
+        response = self.client.post(
+            f'/api/orders/{self.table.id}/add-order-item/',
+            {'meal_id': self.meal.id, 'customer_number': 1},
+            content_type='application/json',
+            HTTP_X_PIN=self.user.username,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.order.order_items.exists())
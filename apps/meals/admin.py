@@ -1,5 +1,14 @@
+import json
+
+from apps.inventory_connector.models import MealInventoryConnector, MealInventoryMapping
+from apps.meals import menu_cache
+from apps.meals.menu_io import (MenuImportError, export_menu, import_menu,
+                                load_menu, write_menu)
 from apps.printers.models.place import PreparationPlace
 from django.contrib import messages
+from django.contrib.auth import get_permission_codename
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django import forms
 from django.urls import path
 from django.shortcuts import render, redirect
@@ -7,6 +16,9 @@ from apps.meals.models import Meal
 from apps.meals.models import MealCategory
 from apps.meals.models import MealGroup
 from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.db.models import DecimalField, ExpressionWrapper, F, Value
+from django.db.models.functions import Coalesce
+from decimal import Decimal
 
 
 from django.contrib import admin
@@ -15,6 +27,10 @@ from django.contrib import admin
 admin.site.register(MealGroup)
 admin.site.register(MealCategory)
 
+# Models a menu file holds (see apps.meals.menu_io)
+MENU_MODELS = (PreparationPlace, MealGroup, MealCategory, Meal,
+               MealInventoryConnector, MealInventoryMapping)
+
 
 class PreparationPlaceActionForm(forms.Form):
     _selected_action = forms.CharField(widget=forms.MultipleHiddenInput)
@@ -25,59 +41,102 @@ class PreparationPlaceActionForm(forms.Form):
     )
 
 
+class MenuImportForm(forms.Form):
+    menu_file = forms.FileField(
+        label="Menyu faylı",
+        help_text="export_menu ilə yaradılmış JSON fayl və ya yemək fixture-u"
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        initial=True,
+        label="Yalnız dəyişiklikləri göstər (yazma)"
+    )
+
+
 @admin.register(Meal)
 class MealAdmin(admin.ModelAdmin):
     list_display = ['name', 'category', 'preparation_place',
                     'price', 'cost_price', 'marja_amount', 'marja_percentage']
     list_filter = ['category', 'preparation_place']
     search_fields = ['name', 'description']
-    actions = ['set_preparation_place']
+    actions = ['set_preparation_place', 'export_selected_menu']
+    change_list_template = "admin/meal_change_list.html"
     readonly_fields = ['cost_price', 'marja_amount', 'marja_percentage']
 
+    def get_queryset(self, request):
+        # Costs come precomputed from MealCost (see inventory_connector.costs)
+        cost = Coalesce(
+            F('cost_summary__cost'), Value(Decimal('0')),
+            output_field=DecimalField(max_digits=12, decimal_places=3)
+        )
+        return super().get_queryset(request).select_related(
+            'category', 'preparation_place', 'cost_summary'
+        ).annotate(
+            total_cost=cost,
+            marja=ExpressionWrapper(
+                F('price') - cost,
+                output_field=DecimalField(max_digits=12, decimal_places=3)
+            ),
+        )
+
+    def _total_cost(self, obj):
+        total_cost = getattr(obj, 'total_cost', None)
+        if total_cost is None:
+            summary = getattr(obj, 'cost_summary', None) if obj.pk else None
+            total_cost = summary.cost if summary else Decimal('0')
+        return total_cost
+
     def cost_price(self, obj):
-        """Calculate total cost price from inventory mappings"""
-        try:
-            connector = obj.inventory_connector
-            total_cost = 0
-            for mapping in connector.mappings.all():
-                total_cost += mapping.quantity * mapping.price
-            return f"{total_cost:.2f} AZN"
-        except:
-            return "0.00 AZN"
+        """Total cost price from the precomputed meal cost"""
+        return f"{self._total_cost(obj):.2f} AZN"
     cost_price.short_description = "Xərc Qiyməti"
-    cost_price.admin_order_field = 'price'  # For sorting
+    cost_price.admin_order_field = 'total_cost'
 
     def marja_amount(self, obj):
         """Calculate marja amount (profit amount)"""
-        try:
-            connector = obj.inventory_connector
-            total_cost = 0
-            for mapping in connector.mappings.all():
-                total_cost += mapping.quantity * mapping.price
-            marja_amount = obj.price - total_cost
-            return f"{marja_amount:.2f} AZN"
-        except:
-            if obj.price is not None:
-                return f"{obj.price:.2f} AZN"
+        if obj.price is None:
             return "0.00 AZN"
+        return f"{obj.price - self._total_cost(obj):.2f} AZN"
     marja_amount.short_description = "Marja (Məbləğ)"
-    marja_amount.admin_order_field = 'price'
+    marja_amount.admin_order_field = 'marja'
 
     def marja_percentage(self, obj):
         """Calculate marja percentage"""
-        try:
-            connector = obj.inventory_connector
-            total_cost = 0
-            for mapping in connector.mappings.all():
-                total_cost += mapping.quantity * mapping.price
-            if obj.price > 0:
-                marja_percentage = ((obj.price - total_cost) / obj.price) * 100
-                return f"{marja_percentage:.1f}%"
+        if obj.price is None or obj.price <= 0:
             return "0.0%"
-        except:
-            return "100.0%"
+        marja_percentage = ((obj.price - self._total_cost(obj)) / obj.price) * 100
+        return f"{marja_percentage:.1f}%"
     marja_percentage.short_description = "Marja (%)"
-    marja_percentage.admin_order_field = 'price'
+    marja_percentage.admin_order_field = 'marja'
+
+    def _has_model_permissions(self, request, actions, models):
+        return all(
+            request.user.has_perm(
+                f"{model._meta.app_label}.{get_permission_codename(action, model._meta)}")
+            for model in models for action in actions
+        )
+
+    def has_menu_export_permission(self, request):
+        """Viewing every model the menu file holds."""
+        return self._has_model_permissions(request, ('view',), MENU_MODELS)
+
+    def has_menu_import_permission(self, request):
+        """
+        Adding and changing every model the menu file holds, and deleting
+        recipe lines (the ones missing from a meal's recipe are removed).
+        """
+        return (
+            self._has_model_permissions(request, ('add', 'change'), MENU_MODELS)
+            and self._has_model_permissions(request, ('delete',), (MealInventoryMapping,))
+        )
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {
+            **(extra_context or {}),
+            'can_import_menu': self.has_menu_import_permission(request),
+            'can_export_menu': self.has_menu_export_permission(request),
+        }
+        return super().changelist_view(request, extra_context=extra_context)
 
     def get_urls(self):
         urls = super().get_urls()
@@ -87,6 +146,16 @@ class MealAdmin(admin.ModelAdmin):
                 self.admin_site.admin_view(self.set_preparation_place_view),
                 name='set_preparation_place',
             ),
+            path(
+                'export-menu/',
+                self.admin_site.admin_view(self.export_menu_view),
+                name='meals_meal_export_menu',
+            ),
+            path(
+                'import-menu/',
+                self.admin_site.admin_view(self.import_menu_view),
+                name='meals_meal_import_menu',
+            ),
         ]
         return custom_urls + urls
 
@@ -108,6 +177,7 @@ class MealAdmin(admin.ModelAdmin):
             if form.is_valid():
                 preparation_place = form.cleaned_data['preparation_place']
                 meals.update(preparation_place=preparation_place)
+                menu_cache.menu_changed()
                 self.message_user(
                     request,
                     f"{meals.count()} yeməyə '{preparation_place}' təyin olundu.",
@@ -124,3 +194,53 @@ class MealAdmin(admin.ModelAdmin):
             'title': "Hazırlanma yeri təyin et",
             'selected_ids': meal_ids,  # Pass as a list, not a string
         })
+
+    def _menu_response(self, menu):
+        response = HttpResponse(content_type="application/json; charset=utf-8")
+        response["Content-Disposition"] = 'attachment; filename="menu.json"'
+        write_menu(menu, response)
+        return response
+
+    def export_selected_menu(self, request, queryset):
+        return self._menu_response(
+            export_menu(list(queryset.values_list("pk", flat=True)))
+        )
+
+    export_selected_menu.short_description = "Seçilmiş yeməkləri menyu faylı kimi ixrac et"
+    export_selected_menu.allowed_permissions = ('menu_export',)
+
+    def export_menu_view(self, request):
+        if not self.has_menu_export_permission(request):
+            raise PermissionDenied
+        return self._menu_response(export_menu())
+
+    def import_menu_view(self, request):
+        if not self.has_menu_import_permission(request):
+            raise PermissionDenied
+
+        diff = None
+        if request.method == "POST":
+            form = MenuImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                dry_run = form.cleaned_data["dry_run"]
+                try:
+                    document = json.load(form.cleaned_data["menu_file"])
+                    diff = import_menu(load_menu(document), dry_run=dry_run)
+                except ValueError as e:
+                    form.add_error("menu_file", f"Fayl oxunmadı: {e}")
+                except MenuImportError as e:
+                    form.add_error("menu_file", str(e))
+                else:
+                    if not dry_run:
+                        self.message_user(
+                            request, "Menyu idxal olundu.", messages.SUCCESS)
+                        return redirect("admin:meals_meal_changelist")
+        else:
+            form = MenuImportForm()
+
+        return render(request, "admin/import_menu.html", {
+            **self.admin_site.each_context(request),
+            'form': form,
+            'diff': diff,
+            'title': "Menyu idxalı",
+        })
@@ -1,17 +1,23 @@
 from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework.generics import ListAPIView
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from apps.meals.models import Meal
 from apps.meals.models import MealCategory
 from apps.meals.models.meal import MealGroup
 from apps.meals.serializers import MealSerializer
 from apps.meals.serializers import MealCategorySerializer
-from apps.meals.serializers.meals import MealGroupSerializer
+from apps.meals.serializers.meals import MealGroupSerializer, with_available_portions
+from apps.meals.snapshot import accepted_encoding, get_snapshot
 
 
 class MealCategoryAPIView(ListAPIView):
@@ -46,13 +52,98 @@ class MealAPIView(ListAPIView):
         type=openapi.TYPE_INTEGER
     )
 
-    @method_decorator(cache_page(settings.CACHE_TIME_IN_SECONDS))
     @swagger_auto_schema(manual_parameters=[meal_category_id_param])
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
+    def list(self, request, *args, **kwargs):
+        # The meal rows are cached like the other menu lists; the available
+        # portions are added to them live
+        key = "meals:list:{}".format(request.GET.get("meal_category_id", 0))
+        rows = cache.get(key)
+        if rows is None:
+            rows = [dict(row) for row in self.get_serializer(self.get_queryset(), many=True).data]
+            cache.set(key, rows, settings.CACHE_TIME_IN_SECONDS)
+        return Response(with_available_portions(rows))
+
     def get_queryset(self):
         meal_category_id = self.request.GET.get("meal_category_id", 0)
         if meal_category_id:
-            return Meal.objects.filter(category__id=meal_category_id)
+            return Meal.objects.filter(category__id=meal_category_id).select_related('category')
         return Meal.objects.filter(category__isnull=True)
+
+
+class MenuSnapshotAPIView(APIView):
+    """
+    The whole menu in one payload: groups, categories, meals (with extras
+    flag and preparation place) and preparation places.
+
+    Pass the version you hold as `since` to receive only the changes
+    (`upserted` rows and `deleted` ids per section); `full` tells which
+    kind of payload was returned. The version is also the ETag.
+    """
+
+    since_param = openapi.Parameter(
+        'since',
+        openapi.IN_QUERY,
+        description="Menu version held by the client",
+        type=openapi.TYPE_STRING
+    )
+
+    @swagger_auto_schema(manual_parameters=[since_param])
+    def get(self, request, *args, **kwargs):
+        snapshot = get_snapshot()
+        etag = f'"{snapshot.version}"'
+        since = request.GET.get("since")
+
+        if since == snapshot.version or request.headers.get("If-None-Match") == etag:
+            response = HttpResponse(status=304)
+        else:
+            encoding = accepted_encoding(request.headers.get("Accept-Encoding"))
+            response = HttpResponse(
+                snapshot.body(since, encoding),
+                content_type="application/json; charset=utf-8",
+            )
+            if encoding != "identity":
+                response["Content-Encoding"] = encoding
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+
+class MealSearchAPIView(APIView):
+    """
+    Type-ahead meal search over names, categories and descriptions
+    (Azerbaijani letters folded, prefix and one-typo matches), best and
+    most sold first. Served from an in-memory index.
+    """
+
+    q_param = openapi.Parameter(
+        'q', openapi.IN_QUERY, description="Search text", type=openapi.TYPE_STRING
+    )
+    limit_param = openapi.Parameter(
+        'limit', openapi.IN_QUERY, description="Maximum results (default 20)",
+        type=openapi.TYPE_INTEGER
+    )
+    meal_category_id_param = openapi.Parameter(
+        'meal_category_id', openapi.IN_QUERY,
+        description="Only meals of this category", type=openapi.TYPE_INTEGER
+    )
+
+    @swagger_auto_schema(manual_parameters=[q_param, limit_param, meal_category_id_param])
+    def get(self, request, *args, **kwargs):
+        from apps.meals.search import search
+
+        try:
+            limit = min(max(int(request.GET.get("limit", 20)), 1), 100)
+            category_id = request.GET.get("meal_category_id")
+            category_id = int(category_id) if category_id else None
+        except ValueError:
+            return Response({"error": "limit and meal_category_id must be integers"}, status=400)
+
+        results = [
+            dict(meal, score=score)
+            for meal, score in search(request.GET.get("q", ""), limit, category_id)
+        ]
+        return Response(with_available_portions(results))
@@ -2,9 +2,13 @@ from django.urls import path
 from apps.meals.apis import MealCategoryAPIView
 from apps.meals.apis import MealAPIView
 from apps.meals.apis.meals import MealGroupAPIView
+from apps.meals.apis.meals import MealSearchAPIView
+from apps.meals.apis.meals import MenuSnapshotAPIView
 
 urlpatterns = [
     path("categories/", MealCategoryAPIView.as_view()),
     path("groups/", MealGroupAPIView.as_view()),
     path("meals/", MealAPIView.as_view()),
+    path("snapshot/", MenuSnapshotAPIView.as_view()),
+    path("search/", MealSearchAPIView.as_view()),
 ]
@@ -1,7 +1,23 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class MealsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.meals'
     verbose_name = "Yemək"
+
+    def ready(self):
+        # Publish a new menu version whenever the menu changes.
+        from apps.meals import menu_cache
+        from apps.meals.models import Meal, MealCategory, MealGroup
+        from apps.printers.models.place import PreparationPlace
+        for model in (Meal, MealCategory, MealGroup, PreparationPlace):
+            post_save.connect(
+                menu_cache.menu_changed, sender=model,
+                dispatch_uid=f"menu_changed_save_{model.__name__}"
+            )
+            post_delete.connect(
+                menu_cache.menu_changed, sender=model,
+                dispatch_uid=f"menu_changed_delete_{model.__name__}"
+            )
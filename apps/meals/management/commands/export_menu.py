@@ -0,0 +1,27 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from apps.meals.menu_io import export_menu, write_menu
+
+
+class Command(BaseCommand):
+    help = 'Export the whole menu (groups, categories, meals, preparation places, prices, recipes) as one JSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            help='Output file (stdout when omitted)',
+        )
+
+    def handle(self, *args, **options):
+        menu = export_menu()
+        if options['path']:
+            with open(options['path'], 'w', encoding='utf-8') as fp:
+                write_menu(menu, fp)
+            self.stdout.write(self.style.SUCCESS(
+                f"Exported {len(menu['meals'])} meals to {options['path']}"
+            ))
+        else:
+            write_menu(menu, sys.stdout)
@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.meals.menu_io import MenuImportError, import_menu, load_menu
+
+
+class Command(BaseCommand):
+    help = (
+        'Import a menu file (or Django fixtures such as apps/commons/meals/*.json). '
+        'New and changed rows are upserted in one transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Menu files, merged in order')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only print what would change',
+        )
+
+    def handle(self, *args, **options):
+        documents = []
+        for path in options['paths']:
+            try:
+                with open(path, encoding='utf-8') as fp:
+                    documents.append(json.load(fp))
+            except (OSError, ValueError) as e:
+                raise CommandError(f'{path}: {e}')
+
+        try:
+            diff = import_menu(load_menu(*documents), dry_run=options['dry_run'])
+        except MenuImportError as e:
+            raise CommandError(str(e))
+
+        verbose = options['dry_run'] or options['verbosity'] > 1
+        for section, changes in diff.items():
+            created = changes.get('created', [])
+            self.stdout.write(
+                f"{section}: {len(created)} new, {len(changes['updated'])} changed, "
+                f"{changes['unchanged']} unchanged"
+            )
+            if not verbose:
+                continue
+            for row in created:
+                self.stdout.write(f"  + {row['name']}")
+            for row in changes['updated']:
+                detail = ', '.join(
+                    f"{field}: {old} -> {new}"
+                    for field, (old, new) in row.get('changes', {}).items()
+                ) or f"{row.get('lines')} recipe lines"
+                self.stdout.write(f"  ~ {row['name']} ({detail})")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run, nothing was written'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Menu imported'))
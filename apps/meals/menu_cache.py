@@ -0,0 +1,38 @@
+"""
+Menu version.
+
+Every change to the menu (groups, categories, meals, preparation places)
+bumps a version number in the Django cache once its transaction commits.
+Readers that keep a derived copy of the menu (snapshots, search indexes)
+compare their version with `get_version()` and rebuild when it moved, so
+a bulk import becomes visible in one step.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = "meals:menu:version"
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def publish():
+    """Bump the menu version now."""
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+        return 1
+
+
+def menu_changed(**kwargs):
+    """
+    Bump the menu version when the current transaction commits.
+    Connected to the save/delete signals of the menu models.
+    """
+    transaction.on_commit(publish)
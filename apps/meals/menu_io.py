@@ -0,0 +1,460 @@
+"""
+Menu import/export.
+
+A menu file is one JSON document holding the whole menu:
+
+    {
+      "format": "menu",
+      "preparation_places": [{"id", "name"}],
+      "groups": [{"id", "name", "description"}],
+      "categories": [{"id", "name", "description", "group", "is_extra"}],
+      "meals": [{"id", "name", "description", "price", "category",
+                 "preparation_place",
+                 "recipe": [{"inventory_item", "quantity", "price"}]}]
+    }
+
+References (group, category, preparation_place, inventory_item) are ids of
+rows in the same file or already in the database. Django fixtures such as
+the seed files in apps/commons/meals/ are accepted too and converted on
+load.
+
+Import:
+
+- rows are matched by id, or by their name inside the parent when the row
+  has no id, so importing the same file twice changes nothing;
+- only new and changed rows are written, with one
+  bulk_create(update_conflicts=True) per model, in a single transaction;
+- keys missing from a row keep the current value;
+- a meal's recipe is replaced when its row has a "recipe" key;
+- rows missing from the file are kept (deleting a meal deletes its order
+  items);
+- the menu version is published once, after commit.
+
+`import_menu(..., dry_run=True)` computes the same diff without writing.
+"""
+import json
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from apps.meals import menu_cache
+from apps.meals.models import Meal, MealCategory, MealGroup
+from apps.printers.models.place import PreparationPlace
+
+# (section, model, fields, natural key used when a row has no id)
+SECTIONS = (
+    ("preparation_places", PreparationPlace, ("name",), ("name",)),
+    ("groups", MealGroup, ("name", "description"), ("name",)),
+    ("categories", MealCategory,
+     ("name", "description", "group", "is_extra"), ("group", "name")),
+    ("meals", Meal,
+     ("name", "description", "price", "category", "preparation_place"),
+     ("category", "name")),
+)
+
+FIXTURE_MODELS = {
+    "printers.preparationplace": "preparation_places",
+    "meals.mealgroup": "groups",
+    "meals.mealcategory": "categories",
+    "meals.meal": "meals",
+}
+
+RECIPE_QUANTUM = Decimal("0.001")
+
+
+class MenuImportError(Exception):
+    pass
+
+
+# ========================= #
+#          EXPORT           #
+# ========================= #
+
+def _plain(value):
+    return str(value) if isinstance(value, Decimal) else value
+
+
+def export_menu(meal_ids=None):
+    """
+    The menu as a dict in the menu file format. With `meal_ids` only those
+    meals and the categories, groups and places they use are exported.
+    """
+    from apps.inventory_connector.models import MealInventoryMapping
+
+    meals = Meal.objects.order_by("pk")
+    categories = MealCategory.objects.order_by("pk")
+    groups = MealGroup.objects.order_by("pk")
+    places = PreparationPlace.objects.order_by("pk")
+    if meal_ids is not None:
+        meals = meals.filter(pk__in=meal_ids)
+        categories = categories.filter(meals__in=meals).distinct()
+        groups = groups.filter(categories__in=categories).distinct()
+        places = places.filter(meal__in=meals).distinct()
+
+    recipes = {}
+    mappings = MealInventoryMapping.objects.filter(
+        connector__meal__in=meals
+    ).order_by("pk").values_list(
+        "connector__meal_id", "inventory_item_id", "quantity", "price"
+    )
+    for meal_id, item_id, quantity, price in mappings.iterator():
+        recipes.setdefault(meal_id, []).append({
+            "inventory_item": item_id,
+            "quantity": str(quantity),
+            "price": str(price),
+        })
+
+    def rows(queryset, fields):
+        attnames = [queryset.model._meta.get_field(f).attname for f in fields]
+        for values in queryset.values_list("pk", *attnames).iterator():
+            row = {"id": values[0]}
+            row.update(zip(fields, map(_plain, values[1:])))
+            yield row
+
+    menu = {"format": "menu"}
+    for section, model, fields, _key in SECTIONS:
+        queryset = {
+            "preparation_places": places, "groups": groups,
+            "categories": categories, "meals": meals,
+        }[section]
+        menu[section] = list(rows(queryset, fields))
+    for row in menu["meals"]:
+        row["recipe"] = recipes.get(row["id"], [])
+    return menu
+
+
+def write_menu(menu, fp):
+    json.dump(menu, fp, ensure_ascii=False, indent=2)
+
+
+# ========================= #
+#          IMPORT           #
+# ========================= #
+
+def _from_fixture(entries):
+    menu = {}
+    for entry in entries:
+        section = FIXTURE_MODELS.get(str(entry.get("model", "")).lower())
+        if section is None:
+            raise MenuImportError(f"Unsupported fixture model: {entry.get('model')}")
+        row = dict(entry.get("fields", {}))
+        if entry.get("pk") is not None:
+            row["id"] = entry["pk"]
+        menu.setdefault(section, []).append(row)
+    return menu
+
+
+def load_menu(*documents):
+    """
+    Merge parsed menu files and fixtures into one menu. Later rows with the
+    same id (or natural key) are merged into earlier ones.
+    """
+    menu = {section: [] for section, *_rest in SECTIONS}
+    for document in documents:
+        if isinstance(document, list):
+            document = _from_fixture(document)
+        for section in menu:
+            menu[section].extend(document.get(section, []))
+    return menu
+
+
+def _field_value(field, value, section, row):
+    try:
+        value = field.to_python(value)
+    except ValidationError as e:
+        raise MenuImportError(
+            f"{section}: invalid {field.name} {value!r} in {row}: {'; '.join(e.messages)}"
+        )
+    if value == "" and field.null:
+        value = None
+    return value
+
+
+def _natural_key(values, key, model):
+    return tuple(values[model._meta.get_field(f).attname] for f in key)
+
+
+def _plan_section(section, model, fields, key, rows):
+    """
+    Resolve ids and compare the rows with the database. Returns the merged
+    values per row (None id for new rows without one) and the diff.
+    """
+    meta = model._meta
+    attnames = {f: meta.get_field(f).attname for f in fields}
+
+    ids = {row["id"] for row in rows if row.get("id") is not None}
+    existing = {
+        values["id"]: values
+        for values in model.objects.filter(pk__in=ids).values("id", *attnames.values())
+    }
+    by_key = None
+
+    planned = {}
+    for row in rows:
+        unknown = set(row) - set(fields) - {"id", "recipe"}
+        if unknown:
+            raise MenuImportError(f"{section}: unknown fields {sorted(unknown)} in {row}")
+
+        given = {
+            attnames[f]: _field_value(meta.get_field(f), row[f], section, row)
+            for f in fields if f in row
+        }
+        row_id = row.get("id")
+        if row_id is not None:
+            row_id = _field_value(meta.pk, row_id, section, row)
+        elif all(attnames[f] in given for f in key):
+            if by_key is None:
+                by_key = {
+                    _natural_key(values, key, model): values
+                    for values in model.objects.values("id", *attnames.values())
+                }
+            match = by_key.get(_natural_key(given, key, model))
+            if match is not None:
+                row_id = match["id"]
+                existing.setdefault(row_id, match)
+        else:
+            raise MenuImportError(f"{section}: a row without id needs {list(key)}: {row}")
+
+        slot = row_id if row_id is not None else ("new",) + _natural_key(given, key, model)
+        if slot in planned:
+            planned[slot]["values"].update(given)
+            planned[slot]["recipe"] = row.get("recipe", planned[slot]["recipe"])
+            continue
+
+        if row_id in existing:
+            values = {a: existing[row_id][a] for a in attnames.values()}
+        else:
+            values = {
+                a: meta.get_field(f).get_default() for f, a in attnames.items()
+            }
+        values.update(given)
+        planned[slot] = {"id": row_id, "values": values, "recipe": row.get("recipe")}
+
+    diff = {"created": [], "updated": [], "unchanged": 0}
+    writes = []
+    for entry in planned.values():
+        values = entry["values"]
+        label = {"id": entry["id"], "name": values.get("name")}
+        current = existing.get(entry["id"])
+        if current is None:
+            for f, a in attnames.items():
+                field = meta.get_field(f)
+                if not field.blank and values[a] in (None, ""):
+                    raise MenuImportError(f"{section}: new row {label} needs {f}")
+            diff["created"].append(label)
+            writes.append(entry)
+            continue
+        changes = {
+            f: [_plain(current[a]), _plain(values[a])]
+            for f, a in attnames.items() if current[a] != values[a]
+        }
+        if changes:
+            diff["updated"].append(dict(label, changes=changes))
+            writes.append(entry)
+        else:
+            diff["unchanged"] += 1
+    return list(planned.values()), writes, diff
+
+
+def _check_references(plans):
+    """Every referenced id must be in the file or in the database."""
+    file_ids = {
+        model: {e["id"] for e in plans[section] if e["id"] is not None}
+        for section, model, *_rest in SECTIONS
+    }
+    for section, model, fields, _key in SECTIONS:
+        for f in fields:
+            field = model._meta.get_field(f)
+            if not field.is_relation:
+                continue
+            target = field.related_model
+            referenced = {
+                e["values"][field.attname] for e in plans[section]
+            } - {None} - file_ids.get(target, set())
+            found = set(
+                target.objects.filter(pk__in=referenced).values_list("pk", flat=True)
+            )
+            missing = referenced - found
+            if missing:
+                raise MenuImportError(
+                    f"{section}: unknown {f} ids {sorted(missing)}"
+                )
+
+
+def _normalize_recipe(lines, row_label):
+    recipe = {}
+    for line in lines:
+        try:
+            item_id = int(line["inventory_item"])
+            quantity = Decimal(str(line["quantity"])).quantize(RECIPE_QUANTUM)
+            price = Decimal(str(line.get("price", 0))).quantize(RECIPE_QUANTUM)
+        except (KeyError, TypeError, ValueError, ArithmeticError):
+            raise MenuImportError(f"meals: invalid recipe line {line} of {row_label}")
+        if quantity <= 0 or price < 0:
+            raise MenuImportError(f"meals: invalid recipe line {line} of {row_label}")
+        recipe[item_id] = (quantity, price)
+    return recipe
+
+
+def _plan_recipes(meal_plans):
+    """Recipes that differ from the database, keyed by plan entry index."""
+    from apps.inventory_connector.models import MealInventoryMapping
+    from inventory.models import InventoryItem
+
+    wanted = {}
+    for index, entry in enumerate(meal_plans):
+        if entry["recipe"] is not None:
+            wanted[index] = _normalize_recipe(
+                entry["recipe"], entry["values"].get("name"))
+
+    item_ids = {item_id for recipe in wanted.values() for item_id in recipe}
+    missing = item_ids - set(
+        InventoryItem.objects.filter(pk__in=item_ids).values_list("pk", flat=True)
+    )
+    if missing:
+        raise MenuImportError(f"meals: unknown inventory_item ids {sorted(missing)}")
+
+    current = {}
+    meal_ids = [meal_plans[i]["id"] for i in wanted if meal_plans[i]["id"] is not None]
+    mappings = MealInventoryMapping.objects.filter(
+        connector__meal_id__in=meal_ids
+    ).values_list("connector__meal_id", "inventory_item_id", "quantity", "price")
+    for meal_id, item_id, quantity, price in mappings:
+        current.setdefault(meal_id, {})[item_id] = (
+            quantity.quantize(RECIPE_QUANTUM), price.quantize(RECIPE_QUANTUM))
+
+    changed = {}
+    diff = {"updated": [], "unchanged": 0}
+    for index, recipe in wanted.items():
+        entry = meal_plans[index]
+        if current.get(entry["id"], {}) == recipe:
+            diff["unchanged"] += 1
+            continue
+        changed[index] = recipe
+        diff["updated"].append({
+            "id": entry["id"],
+            "name": entry["values"].get("name"),
+            "lines": len(recipe),
+        })
+    return changed, diff
+
+
+def _write_section(model, fields, writes):
+    attnames = [model._meta.get_field(f).attname for f in fields]
+    update_fields = list(attnames)
+    if any(f.name == "updated_at" for f in model._meta.concrete_fields):
+        update_fields.append("updated_at")
+
+    objs = [model(pk=entry["id"], **entry["values"]) for entry in writes]
+    model.objects.bulk_create(
+        objs,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["id"],
+        update_fields=update_fields,
+    )
+    for entry, obj in zip(writes, objs):
+        entry["id"] = obj.pk
+
+
+def _resolve_new_ids(model, key, entries):
+    """Ids of inserted rows, for backends that do not return them."""
+    pending = [e for e in entries if e["id"] is None]
+    if not pending:
+        return
+    attnames = [model._meta.get_field(f).attname for f in key]
+    by_key = {
+        tuple(values[:-1]): values[-1]
+        for values in model.objects.values_list(*attnames, "pk")
+    }
+    for entry in pending:
+        entry["id"] = by_key.get(_natural_key(entry["values"], key, model))
+
+
+def _write_recipes(meal_plans, recipes):
+    from apps.inventory_connector import recipes as recipe_map
+    from apps.inventory_connector.costs import refresh_costs
+    from apps.inventory_connector.models import (MealInventoryConnector,
+                                                 MealInventoryMapping)
+
+    meal_ids = [meal_plans[index]["id"] for index in recipes]
+    MealInventoryConnector.objects.bulk_create(
+        [MealInventoryConnector(meal_id=meal_id) for meal_id in meal_ids],
+        ignore_conflicts=True,
+    )
+    connectors = dict(
+        MealInventoryConnector.objects.filter(
+            meal_id__in=meal_ids).values_list("meal_id", "pk")
+    )
+
+    wanted = {
+        connectors[meal_plans[index]["id"]]: recipe
+        for index, recipe in recipes.items()
+    }
+    stale = [
+        pk for pk, connector_id, item_id in MealInventoryMapping.objects.filter(
+            connector_id__in=list(wanted)
+        ).values_list("pk", "connector_id", "inventory_item_id")
+        if item_id not in wanted[connector_id]
+    ]
+    MealInventoryMapping.objects.filter(pk__in=stale).delete()
+
+    mappings = []
+    for connector_id, recipe in wanted.items():
+        mappings.extend(
+            MealInventoryMapping(
+                connector_id=connector_id, inventory_item_id=item_id,
+                quantity=quantity, price=price,
+            )
+            for item_id, (quantity, price) in recipe.items()
+        )
+    MealInventoryMapping.objects.bulk_create(
+        mappings,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["connector", "inventory_item"],
+        update_fields=["quantity", "price"],
+    )
+
+    # Bulk writes skip the model signals
+    recipe_map.invalidate()
+    refresh_costs(meal_ids)
+
+
+def import_menu(menu, dry_run=False):
+    """
+    Apply a menu (see load_menu) and return the diff per section:
+    {"meals": {"created": [...], "updated": [...], "unchanged": n}, ...,
+     "recipes": {"updated": [...], "unchanged": n}}.
+    """
+    plans, writes, diff = {}, {}, {}
+    for section, model, fields, key in SECTIONS:
+        plans[section], writes[section], diff[section] = _plan_section(
+            section, model, fields, key, menu.get(section, []))
+    _check_references(plans)
+    recipes, diff["recipes"] = _plan_recipes(plans["meals"])
+
+    changed = any(writes.values()) or recipes
+    if dry_run or not changed:
+        return diff
+
+    with transaction.atomic():
+        for section, model, fields, key in SECTIONS:
+            if writes[section]:
+                _write_section(model, fields, writes[section])
+                _resolve_new_ids(model, key, writes[section])
+        if recipes:
+            _write_recipes(plans["meals"], recipes)
+
+        # Rows inserted with explicit ids must not collide with the sequence
+        sql = connection.ops.sequence_reset_sql(
+            no_style(), [model for _s, model, *_r in SECTIONS])
+        if sql:
+            with connection.cursor() as cursor:
+                for statement in sql:
+                    cursor.execute(statement)
+
+        menu_cache.menu_changed()
+    return diff
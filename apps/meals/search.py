@@ -0,0 +1,241 @@
+"""
+In-memory meal search for type-ahead.
+
+Meal names, category names and descriptions are folded the way receipts
+are printed (PrinterService.mapping: ə→e, ı→i, ö→o, ü→u, ğ→g, ş→s, ç→c)
+and lowercased, so "coban" finds "Çoban salatı". The index keeps:
+
+- the sorted list of distinct tokens, for prefix lookups with bisect;
+- a symmetric-delete map over the prefixes of name and category tokens,
+  for one-typo matches ("kabeb" -> "kabab");
+- the ranking of every one- and two-letter prefix, and the scores and
+  results of recently typed terms and queries.
+
+Every query term must match. Exact tokens score above prefixes, prefixes
+above typos, names above categories above descriptions; the sales of the
+last POPULARITY_DAYS then lift popular meals. The index is rebuilt when
+the menu version changes and every REFRESH_SECONDS for popularity.
+"""
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.meals import menu_cache
+from apps.meals.models import Meal
+
+REFRESH_SECONDS = 3600
+POPULARITY_DAYS = 90
+POPULARITY_WEIGHT = 1.5
+
+FIELD_WEIGHTS = {"name": 2.0, "category": 1.0, "description": 0.5}
+MATCH_EXACT, MATCH_PREFIX, MATCH_FUZZY = 3.0, 2.0, 1.0
+FUZZY_MIN_LENGTH = 4
+FUZZY_MAX_PREFIX = 10
+TERM_CACHE_SIZE = 4096
+
+_TOKEN = re.compile(r"\w+")
+
+_lock = threading.Lock()
+_index = None
+
+
+def fold(text):
+    """Lowercase ASCII-ish form used for indexing and queries."""
+    from apps.printers.utils.service_v2 import PrinterService
+
+    text = PrinterService.mapping(text or "").lower()
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    return _TOKEN.findall(fold(text))
+
+
+def _deletes(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _popularity():
+    from apps.orders.models import OrderItem
+
+    since = timezone.now() - timedelta(days=POPULARITY_DAYS)
+    return dict(
+        # Orders of closed shifts are flagged is_deleted; count them too
+        OrderItem.objects.all_order_items().filter(created_at__gte=since)
+        .values("meal_id")
+        .annotate(sold=Sum("quantity"))
+        .values_list("meal_id", "sold")
+    )
+
+
+class SearchIndex:
+    def __init__(self, meals, popularity):
+        self.meals = {}
+        self.boost = {}
+        postings = {}
+        self.fuzzy = {}
+
+        top = max(popularity.values(), default=0)
+        for meal in meals:
+            self.meals[meal["id"]] = meal
+            sold = popularity.get(meal["id"]) or 0
+            self.boost[meal["id"]] = (
+                POPULARITY_WEIGHT * math.log1p(sold) / math.log1p(top) if top > 0 else 0.0
+            )
+            fields = (
+                ("name", meal["name"]),
+                ("category", meal.pop("category_name") or ""),
+                ("description", meal["description"] or ""),
+            )
+            for field, text in fields:
+                weight = FIELD_WEIGHTS[field]
+                for token in tokenize(text):
+                    weights = postings.setdefault(token, {})
+                    if weight > weights.get(meal["id"], 0):
+                        weights[meal["id"]] = weight
+                    if field == "description" or len(token) < FUZZY_MIN_LENGTH:
+                        continue
+                    for end in range(FUZZY_MIN_LENGTH, min(len(token), FUZZY_MAX_PREFIX) + 1):
+                        prefix = token[:end]
+                        for variant in _deletes(prefix) | {prefix}:
+                            self.fuzzy.setdefault(variant, set()).add(token)
+
+        self.tokens = sorted(postings)
+        self.postings = postings
+        self._term_cache = {}
+        self._query_cache = {}
+        # Short prefixes match the most meals; score and rank them up front
+        self._prefix_scores = {}
+        self._ranked_cache = {}
+        for prefix in {token[:n] for token in self.tokens for n in (1, 2)}:
+            scores = self._prefix_scores[prefix] = self._score_term(prefix)
+            self._ranked_cache[prefix] = sorted(
+                ((total + self.boost[meal_id], -meal_id)
+                 for meal_id, total in scores.items()),
+                reverse=True,
+            )
+
+    def _prefixed(self, term):
+        start = bisect_left(self.tokens, term)
+        for token in self.tokens[start:]:
+            if not token.startswith(term):
+                break
+            yield token
+
+    def _term_scores(self, term):
+        """{meal_id: best score of the term in that meal}"""
+        # Type-ahead repeats the same prefixes; the index never changes
+        scores = self._prefix_scores.get(term) or self._term_cache.get(term)
+        if scores is None:
+            if len(self._term_cache) >= TERM_CACHE_SIZE:
+                self._term_cache.clear()
+            scores = self._term_cache[term] = self._score_term(term)
+        return scores
+
+    def _score_term(self, term):
+        matches = {}
+        for token in self._prefixed(term):
+            matches[token] = MATCH_EXACT if token == term else MATCH_PREFIX
+        if len(term) >= FUZZY_MIN_LENGTH:
+            for variant in _deletes(term) | {term}:
+                for token in self.fuzzy.get(variant, ()):
+                    matches.setdefault(token, MATCH_FUZZY)
+
+        scores = {}
+        for token, quality in matches.items():
+            for meal_id, weight in self.postings[token].items():
+                score = quality * weight
+                if score > scores.get(meal_id, 0):
+                    scores[meal_id] = score
+        return scores
+
+    def search(self, query, limit=20, category_id=None):
+        """[(meal row, score)] best first."""
+        key = (fold(query).strip(), limit, category_id)
+        results = self._query_cache.get(key)
+        if results is None:
+            if len(self._query_cache) >= TERM_CACHE_SIZE:
+                self._query_cache.clear()
+            results = self._query_cache[key] = self._search(query, limit, category_id)
+        return results
+
+    def _search(self, query, limit, category_id):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        if len(terms) == 1 and category_id is None and terms[0] in self._ranked_cache:
+            return [
+                (self.meals[-meal_id], round(score, 3))
+                for score, meal_id in self._ranked_cache[terms[0]][:limit]
+            ]
+
+        totals = None
+        # Rarest-looking (longest) terms first narrows the candidates early
+        for term in sorted(set(terms), key=len, reverse=True):
+            scores = self._term_scores(term)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {
+                    meal_id: total + scores[meal_id]
+                    for meal_id, total in totals.items() if meal_id in scores
+                }
+            if not totals:
+                return []
+
+        if category_id is not None:
+            totals = {
+                meal_id: total for meal_id, total in totals.items()
+                if self.meals[meal_id]["category"] == category_id
+            }
+        best = heapq.nlargest(
+            limit,
+            [(total + self.boost[meal_id], -meal_id) for meal_id, total in totals.items()],
+        )
+        return [(self.meals[-meal_id], round(score, 3)) for score, meal_id in best]
+
+
+def build_index():
+    meals = [
+        {
+            "id": row["id"],
+            "name": row["name"],
+            "description": row["description"],
+            "price": str(row["price"]),
+            "category": row["category_id"],
+            "category_name": row["category__name"],
+            "is_extra": bool(row["category__is_extra"]),
+        }
+        for row in Meal.objects.order_by("pk").values(
+            "id", "name", "description", "price", "category_id",
+            "category__name", "category__is_extra")
+    ]
+    return SearchIndex(meals, _popularity())
+
+
+def get_index():
+    global _index
+
+    version = menu_cache.get_version()
+    current = _index
+    if (current is None or current[0] != version
+            or time.monotonic() - current[1] > REFRESH_SECONDS):
+        with _lock:
+            if (_index is None or _index[0] != version
+                    or time.monotonic() - _index[1] > REFRESH_SECONDS):
+                _index = (version, time.monotonic(), build_index())
+            current = _index
+    return current[2]
+
+
+def search(query, limit=20, category_id=None):
+    return get_index().search(query, limit=limit, category_id=category_id)
@@ -43,3 +43,19 @@ class MealSerializer(serializers.ModelSerializer):
 
     def get_is_extra(self, meal: Meal):
         return meal.category.is_extra if meal.category else False
+
+
+def with_available_portions(rows):
+    """
+    The meal rows (dicts with `id`) with the portions left in stock
+    (`available_portions`, null when the meal has no recipe) and
+    `is_sold_out`, computed once per meal from the live stock projection.
+    """
+    from apps.inventory_connector.stock import available_portions_of
+
+    portions = available_portions_of([row["id"] for row in rows])
+    return [
+        dict(row, available_portions=portions[row["id"]],
+             is_sold_out=portions[row["id"]] == 0)
+        for row in rows
+    ]
@@ -0,0 +1,166 @@
+"""
+Full-menu snapshot for tablets.
+
+The whole menu (groups, categories, meals with their extras flag and
+preparation place, preparation places) is built with four queries,
+serialized once and kept in memory until the menu version changes (see
+menu_cache). Compressed bodies are produced once per snapshot.
+
+The snapshot version is a hash of its content, so it is the same in every
+process and survives restarts. Every snapshot is also stored in the Django
+cache under its version for SNAPSHOT_TIMEOUT; a client sending the
+version it holds gets only the rows that changed and the ids that were
+removed since then, or the full menu when that version is no longer known.
+
+Stock (available portions) changes with every order and is not part of
+the snapshot.
+"""
+import gzip
+import hashlib
+import json
+import threading
+
+from django.core.cache import cache
+
+from apps.meals import menu_cache
+from apps.meals.models import Meal, MealCategory, MealGroup
+from apps.printers.models.place import PreparationPlace
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+SNAPSHOT_KEY = "meals:snapshot:{}"
+SNAPSHOT_TIMEOUT = 7 * 24 * 3600
+SECTIONS = ("groups", "categories", "meals", "preparation_places")
+
+_lock = threading.Lock()
+_current = None
+
+
+def _dumps(data):
+    return json.dumps(
+        data, ensure_ascii=False, separators=(",", ":"), sort_keys=True
+    ).encode("utf-8")
+
+
+def _compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, mtime=0)
+    return body
+
+
+class Snapshot:
+    def __init__(self, data):
+        self.data = data
+        self.version = hashlib.sha256(_dumps(data)).hexdigest()[:16]
+        self.meals_by_id = {meal["id"]: meal for meal in data["meals"]}
+        self._bodies = {}
+
+    def body(self, since=None, encoding="identity"):
+        """
+        The response body: the full menu, or the delta from `since` when
+        that version is known. Bodies are cached per (since, encoding);
+        unknown versions share the full-menu body, so clients cannot grow
+        the cache with made-up values.
+        """
+        base = None
+        if since and (since, encoding) not in self._bodies:
+            base = cache.get(SNAPSHOT_KEY.format(since))
+            if base is None:
+                since = None
+        key = (since or None, encoding)
+        body = self._bodies.get(key)
+        if body is None:
+            if since:
+                payload = self._delta(base, since)
+            else:
+                payload = dict(self.data, version=self.version, full=True)
+            body = _compress(_dumps(payload), encoding)
+            self._bodies[key] = body
+        return body
+
+    def _delta(self, base, since):
+        payload = {"version": self.version, "since": since, "full": False}
+        for section in SECTIONS:
+            old = {row["id"]: row for row in base.get(section, [])}
+            new = {row["id"]: row for row in self.data[section]}
+            payload[section] = {
+                "upserted": [
+                    row for row_id, row in new.items() if old.get(row_id) != row
+                ],
+                "deleted": sorted(set(old) - set(new)),
+            }
+        return payload
+
+
+def build_snapshot():
+    groups = list(
+        MealGroup.objects.order_by("pk").values("id", "name", "description")
+    )
+    categories = [
+        {
+            "id": row["id"],
+            "name": row["name"],
+            "description": row["description"],
+            "group": row["group_id"],
+            "is_extra": row["is_extra"],
+        }
+        for row in MealCategory.objects.order_by("pk").values(
+            "id", "name", "description", "group_id", "is_extra")
+    ]
+    meals = [
+        {
+            "id": row["id"],
+            "name": row["name"],
+            "description": row["description"],
+            "price": str(row["price"]),
+            "category": row["category_id"],
+            "is_extra": bool(row["category__is_extra"]),
+            "preparation_place": row["preparation_place_id"],
+        }
+        for row in Meal.objects.order_by("pk").values(
+            "id", "name", "description", "price", "category_id",
+            "category__is_extra", "preparation_place_id")
+    ]
+    places = list(PreparationPlace.objects.order_by("pk").values("id", "name"))
+
+    snapshot = Snapshot({
+        "groups": groups,
+        "categories": categories,
+        "meals": meals,
+        "preparation_places": places,
+    })
+    cache.set(SNAPSHOT_KEY.format(snapshot.version), snapshot.data, SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def get_snapshot():
+    """The snapshot of the current menu version."""
+    global _current
+
+    version = menu_cache.get_version()
+    current = _current
+    if current is None or current[0] != version:
+        with _lock:
+            if _current is None or _current[0] != version:
+                _current = (version, build_snapshot())
+            current = _current
+    return current[1]
+
+
+def accepted_encoding(accept_encoding):
+    """Best supported content coding of an Accept-Encoding header."""
+    offered = {
+        part.split(";")[0].strip().lower()
+        for part in (accept_encoding or "").split(",")
+        if not part.strip().endswith(";q=0")
+    }
+    if brotli is not None and "br" in offered:
+        return "br"
+    if "gzip" in offered:
+        return "gzip"
+    return "identity"
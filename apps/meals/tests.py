@@ -0,0 +1,241 @@
+import json
+from decimal import Decimal
+from pathlib import Path
+
+from django.test import TestCase
+
+from apps.inventory_connector.models import MealCost, MealInventoryMapping
+from apps.meals import menu_cache
+from apps.meals.menu_io import (MenuImportError, export_menu, import_menu,
+                                load_menu)
+from apps.meals.models import Meal, MealCategory, MealGroup
+from inventory.models import InventoryItem
+
+SEED_DIR = Path(__file__).resolve().parent.parent / 'commons' / 'meals'
+
+
+def seed(*names):
+    return [json.loads((SEED_DIR / name).read_text(encoding='utf-8')) for name in names]
+
+
+class MenuImportTests(TestCase):
+    def import_seed(self, dry_run=False):
+        documents = seed('menu_groups.json', 'menu_categories.json', 'menu_meals.json')
+        return import_menu(load_menu(*documents), dry_run=dry_run)
+
+    def test_seed_import_is_idempotent(self):
+        diff = self.import_seed(dry_run=True)
+        self.assertEqual(len(diff['meals']['created']), 61)
+        self.assertFalse(Meal.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.import_seed()
+        self.assertEqual(MealGroup.objects.count(), 4)
+        self.assertEqual(MealCategory.objects.count(), 8)
+        self.assertEqual(Meal.objects.count(), 61)
+
+        # Meals without pk are matched by category and name
+        with self.assertNumQueries(3):
+            diff = self.import_seed()
+        self.assertEqual(diff['meals']['unchanged'], 61)
+        self.assertEqual(Meal.objects.count(), 61)
+
+    def test_changes_are_diffed_and_published(self):
+        self.import_seed()
+        menu = export_menu()
+        menu['meals'][0]['price'] = '99.00'
+        version = menu_cache.get_version()
+
+        diff = import_menu(load_menu(menu), dry_run=True)
+        self.assertEqual(
+            diff['meals']['updated'][0]['changes'], {'price': ['8.00', '99.00']})
+        self.assertEqual(Meal.objects.get(pk=menu['meals'][0]['id']).price, Decimal('8.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            import_menu(load_menu(menu))
+        self.assertEqual(Meal.objects.get(pk=menu['meals'][0]['id']).price, Decimal('99.00'))
+        self.assertEqual(menu_cache.get_version(), version + 1)
+
+    def test_recipes_replace_mappings(self):
+        self.import_seed()
+        rice = InventoryItem.objects.create(name='Düyü', unit='kq')
+        meat = InventoryItem.objects.create(name='Ət', unit='kq')
+        menu = export_menu()
+        meal_id = menu['meals'][0]['id']
+        menu['meals'][0]['recipe'] = [
+            {'inventory_item': rice.id, 'quantity': '0.300', 'price': '2'},
+            {'inventory_item': meat.id, 'quantity': '0.200', 'price': '15'},
+        ]
+        import_menu(load_menu(menu))
+        self.assertEqual(MealCost.objects.get(meal_id=meal_id).cost, Decimal('3.600'))
+
+        menu['meals'][0]['recipe'] = [
+            {'inventory_item': meat.id, 'quantity': '0.250', 'price': '15'},
+        ]
+        diff = import_menu(load_menu(menu))
+        self.assertEqual(len(diff['recipes']['updated']), 1)
+        self.assertEqual(
+            list(MealInventoryMapping.objects.values_list('inventory_item_id', 'quantity')),
+            [(meat.id, Decimal('0.250'))])
+
+    def test_unknown_reference_is_rejected(self):
+        menu = {'meals': [{'name': 'Çay', 'price': '1.00', 'category': 999}]}
+        with self.assertRaises(MenuImportError):
+            import_menu(load_menu(menu))
+        self.assertFalse(Meal.objects.exists())
+
+    def test_admin_import_dry_run(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from apps.users.models import User
+
+        admin = User.objects.create_superuser(username='admin', password='pass')
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile(
+            'menu.json', (SEED_DIR / 'menu_groups.json').read_bytes())
+
+        response = self.client.post(
+            '/admin/meals/meal/import-menu/',
+            {'menu_file': upload, 'dry_run': 'on'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Əsas Yeməklər')
+        self.assertFalse(MealGroup.objects.exists())
+
+        response = self.client.get('/admin/meals/meal/export-menu/')
+        self.assertEqual(response['Content-Type'], 'application/json; charset=utf-8')
+
+    def test_admin_menu_file_permissions(self):
+        from django.contrib.auth.models import Permission
+        from apps.users.models import User
+
+        staff = User.objects.create_user(username='menu_staff', password='pass', is_staff=True)
+        staff.user_permissions.add(*Permission.objects.filter(
+            codename__in=['view_meal', 'change_meal']))
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get('/admin/meals/meal/export-menu/').status_code, 403)
+        self.assertEqual(self.client.get('/admin/meals/meal/import-menu/').status_code, 403)
+        self.assertNotContains(
+            self.client.get('/admin/meals/meal/'), '/admin/meals/meal/import-menu/')
+
+        staff.user_permissions.add(*Permission.objects.filter(
+            codename__startswith='view_',
+            content_type__app_label__in=['meals', 'printers', 'inventory_connector']))
+        staff = User.objects.get(pk=staff.pk)  # drop the cached permissions
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get('/admin/meals/meal/export-menu/').status_code, 200)
+        self.assertEqual(self.client.get('/admin/meals/meal/import-menu/').status_code, 403)
+
+
+class MenuSnapshotTests(TestCase):
+    def setUp(self):
+        documents = seed('menu_groups.json', 'menu_categories.json', 'menu_meals.json')
+        with self.captureOnCommitCallbacks(execute=True):
+            import_menu(load_menu(*documents))
+
+    def get(self, **params):
+        return self.client.get('/api/meals/snapshot/', params)
+
+    def test_full_snapshot(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['full'])
+        self.assertEqual(len(data['groups']), 4)
+        self.assertEqual(len(data['meals']), 61)
+        self.assertEqual(response['ETag'], f'"{data["version"]}"')
+
+        response = self.client.get(
+            '/api/meals/snapshot/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_gzip_body(self):
+        import gzip
+
+        response = self.client.get(
+            '/api/meals/snapshot/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(data['meals']), 61)
+
+    def test_delta_since_client_version(self):
+        version = self.get().json()['version']
+        meal = Meal.objects.order_by('pk').first()
+        removed = Meal.objects.order_by('pk').last()
+        removed_id = removed.id
+        with self.captureOnCommitCallbacks(execute=True):
+            meal.price = Decimal('12.50')
+            meal.save()
+            removed.delete()
+
+        data = self.get(since=version).json()
+        self.assertFalse(data['full'])
+        self.assertEqual(data['since'], version)
+        self.assertEqual(
+            [(row['id'], row['price']) for row in data['meals']['upserted']],
+            [(meal.id, '12.50')])
+        self.assertEqual(data['meals']['deleted'], [removed_id])
+        self.assertEqual(data['groups'], {'upserted': [], 'deleted': []})
+
+        self.assertEqual(self.get(since=data['version']).status_code, 304)
+        self.assertTrue(self.get(since='unknown').json()['full'])
+
+    def test_unknown_versions_share_the_full_body(self):
+        from apps.meals.snapshot import get_snapshot
+
+        snapshot = get_snapshot()
+        full = snapshot.body()
+        for n in range(20):
+            self.assertIs(snapshot.body(since=f'made-up-{n}'), full)
+        self.assertEqual(list(snapshot._bodies), [(None, 'identity')])
+
+
+class MealSearchTests(TestCase):
+    def setUp(self):
+        from apps.orders.models import Order, OrderItem
+        from apps.tables.models import Room, Table
+        from apps.users.models import User
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category = MealCategory.objects.create(name='Salatlar')
+            self.coban = Meal.objects.create(
+                name='Çoban salatı', price=Decimal('4.00'), category=category)
+            self.sezar = Meal.objects.create(
+                name='Sezar salatı', price=Decimal('7.00'), category=category)
+            self.kabab = Meal.objects.create(
+                name='Tikə kababı', price=Decimal('9.00'),
+                description='Quzu əti')
+
+        user = User.objects.create_user(username='w', password='p', type='waitress')
+        table = Table.objects.create(number='1', room=Room.objects.create(name='Zal'))
+        order = Order.objects.create(table=table, waitress=user)
+        OrderItem.objects.create(order=order, meal=self.sezar, quantity=5, price=35)
+
+    def search(self, q, **params):
+        response = self.client.get('/api/meals/search/', dict(params, q=q))
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()]
+
+    def test_folded_prefix_match(self):
+        self.assertEqual(self.search('coban'), [self.coban.id])
+        self.assertEqual(self.search('ÇOB sal'), [self.coban.id])
+        self.assertEqual(self.search('quzu'), [self.kabab.id])
+
+    def test_typo_match(self):
+        self.assertEqual(self.search('kabeb'), [self.kabab.id])
+
+    def test_popular_meals_rank_first(self):
+        self.assertEqual(self.search('salat'), [self.sezar.id, self.coban.id])
+        self.assertEqual(self.search('salatlar', limit=1), [self.sezar.id])
+
+    def test_popularity_counts_closed_shifts(self):
+        from apps.meals.search import _popularity
+        from apps.orders.models import Order
+
+        # Closing a shift flags its orders as deleted
+        Order.objects.update(is_deleted=True)
+        self.assertEqual(_popularity(), {self.sezar.id: 5})
+
+    def test_index_follows_menu_version(self):
+        self.assertEqual(self.search('dolma'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            dolma = Meal.objects.create(name='Yarpaq dolması', price=Decimal('6.00'))
+        self.assertEqual(self.search('dolma'), [dolma.id])
@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from apps.orders.models import BotSubscription
+
+
+@admin.register(BotSubscription)
+class BotSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ('chat_id', 'title', 'daily_summary',
+                    'hourly_snapshot', 'alerts', 'created_at')
+    list_filter = ('daily_summary', 'hourly_snapshot', 'alerts')
+    search_fields = ('title', 'chat_id')
+    readonly_fields = ('created_at',)
@@ -0,0 +1,111 @@
+from django import forms
+from django.contrib.auth import get_permission_codename
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import render
+from django.urls import path, reverse
+from django.utils import timezone
+
+from apps.orders.analytics import streaming
+
+
+class ExportForm(forms.Form):
+    dataset = forms.ChoiceField(label="Məlumat")
+    file_format = forms.ChoiceField(
+        label="Format",
+        choices=[('csv', 'CSV'), ('xlsx', 'Excel (XLSX)')],
+    )
+    start_date = forms.DateField(
+        label="Başlanğıc tarixi", widget=forms.DateInput(attrs={'type': 'date'}))
+    end_date = forms.DateField(
+        label="Bitiş tarixi", widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def __init__(self, *args, datasets=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['dataset'].choices = [
+            (name, streaming.dataset_label(name)) for name in datasets
+        ]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date, end_date = cleaned_data.get('start_date'), cleaned_data.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise forms.ValidationError(
+                "Başlanğıc tarixi bitiş tarixindən əvvəl olmalıdır.")
+        return cleaned_data
+
+
+class StreamingExportMixin:
+    """
+    Adds an "Export" button to the change list that streams the chosen
+    dataset (see analytics.streaming) for a date range as CSV or XLSX.
+    """
+    export_datasets = ()
+    change_list_template = 'admin/orders/export_change_list.html'
+
+    def _export_url_name(self):
+        opts = self.model._meta
+        return f'{opts.app_label}_{opts.model_name}_export'
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom = [
+            path('export/',
+                 self.admin_site.admin_view(self.export_view),
+                 name=self._export_url_name()),
+        ]
+        return custom + urls
+
+    def get_export_datasets(self, request):
+        """The export_datasets whose own model the user may view."""
+        datasets = []
+        for name in self.export_datasets:
+            opts = streaming.dataset_model(name)._meta
+            codename = get_permission_codename('view', opts)
+            if request.user.has_perm(f'{opts.app_label}.{codename}'):
+                datasets.append(name)
+        return datasets
+
+    def get_export_url(self, request):
+        """URL of the export page, or None when nothing may be exported."""
+        if not self.get_export_datasets(request):
+            return None
+        return reverse(f'admin:{self._export_url_name()}')
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {
+            **(extra_context or {}),
+            'export_url': self.get_export_url(request),
+        }
+        return super().changelist_view(request, extra_context=extra_context)
+
+    def export_view(self, request):
+        datasets = self.get_export_datasets(request)
+        if not self.has_view_permission(request) or not datasets:
+            raise PermissionDenied
+
+        if 'dataset' in request.GET:
+            form = ExportForm(request.GET, datasets=datasets)
+            if form.is_valid():
+                return streaming.export_response(
+                    form.cleaned_data['dataset'],
+                    form.cleaned_data['file_format'],
+                    form.cleaned_data['start_date'],
+                    form.cleaned_data['end_date'],
+                )
+        else:
+            today = timezone.localdate()
+            form = ExportForm(
+                initial={'start_date': today.replace(day=1), 'end_date': today},
+                datasets=datasets,
+            )
+
+        opts = self.model._meta
+        return render(request, 'admin/orders/export_form.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Məlumatların ixracı',
+            'form': form,
+            'opts': opts,
+            'app_label': opts.app_label,
+            'changelist_url': reverse(
+                f'admin:{opts.app_label}_{opts.model_name}_changelist'),
+        })
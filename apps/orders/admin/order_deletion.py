@@ -2,10 +2,12 @@
 
 from django.contrib import admin
 from apps.orders.models import OrderItemDeletionLog
+from apps.orders.admin.exports import StreamingExportMixin
 
 
 @admin.register(OrderItemDeletionLog)
-class OrderItemDeletionLogAdmin(admin.ModelAdmin):
+class OrderItemDeletionLogAdmin(StreamingExportMixin, admin.ModelAdmin):
+    export_datasets = ('deletion_logs',)
     list_display = (
         'deleted_at',
         'order_id',
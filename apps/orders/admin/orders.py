@@ -3,13 +3,15 @@ from django.contrib import admin
 from simple_history.admin import SimpleHistoryAdmin
 from apps.orders.models import Order
 from apps.orders.models import OrderItem
+from apps.orders.admin.exports import StreamingExportMixin
 
 
 # Register the Order model with SimpleHistoryAdmin
 
 
 @admin.register(Order)
-class OrderAdmin(SimpleHistoryAdmin):
+class OrderAdmin(StreamingExportMixin, SimpleHistoryAdmin):
+    export_datasets = ('orders', 'order_items', 'payments')
     list_display = [
 
         'table_number',
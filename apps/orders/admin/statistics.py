@@ -3,7 +3,9 @@ from django.contrib import admin, messages
 from django.forms import ValidationError
 from django.urls import path, reverse
 from django.http import Http404, HttpResponseRedirect, JsonResponse
+from django.shortcuts import render
 from django.utils.dateformat import format
+from django.utils import timezone
 from django.utils.timezone import localtime
 from django.db.models import Min
 from django.db.models import Max
@@ -180,6 +182,9 @@ class StatisticsAdmin(SimpleHistoryAdmin):
             path('date-range-summary/',
                  self.admin_site.admin_view(self.date_range_summary_view),
                  name='orders_statistics_date_range_summary'),
+            path('sales-analytics/',
+                 self.admin_site.admin_view(self.sales_analytics_view),
+                 name='orders_statistics_sales_analytics'),
         ]
         return custom + urls
 
@@ -394,6 +399,51 @@ class StatisticsAdmin(SimpleHistoryAdmin):
         """
         return HttpResponseRedirect(reverse('admin:orders_summary_date_range'))
 
+    def sales_analytics_view(self, request):
+        """
+        Sales analytics computed from the columnar export.
+        """
+        from apps.orders.analytics.metrics import sales_analytics
+
+        start_date = request.GET.get('start_date') or ''
+        end_date = request.GET.get('end_date') or ''
+        try:
+            metrics = sales_analytics(
+                datetime.strptime(start_date, '%Y-%m-%d').date()
+                if start_date else None,
+                datetime.strptime(end_date, '%Y-%m-%d').date()
+                if end_date else None,
+            )
+        except ValueError:
+            self.message_user(
+                request, "Tarix formatını yoxlayın.", level=messages.ERROR)
+            return HttpResponseRedirect('.')
+
+        heatmap = metrics['heatmap']
+        peak = max(max(row) for row in heatmap['revenue']) or 1
+        heatmap_rows = [
+            {
+                'weekday': weekday,
+                'cells': [
+                    {'revenue': value, 'alpha': round(value / peak, 2)}
+                    for value in row
+                ],
+            }
+            for weekday, row in zip(heatmap['weekdays'], heatmap['revenue'])
+        ]
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Satış analitikası',
+            'opts': self.model._meta,
+            'metrics': metrics,
+            'heatmap_rows': heatmap_rows,
+            'hours': heatmap['hours'],
+            'start_date': start_date,
+            'end_date': end_date,
+        }
+        return render(request, 'admin/sales_analytics.html', context)
+
     title_with_date = SimpleHistoryAdmin.date_hierarchy
 
     def display_per_waitress(self, obj):
@@ -408,35 +458,32 @@ class StatisticsAdmin(SimpleHistoryAdmin):
 
         oldest_order = order_dates['oldest_order']
         latest_order = order_dates['latest_order']
+        if oldest_order is None:
+            return "No orders found."
 
-        # Group by waitress and sum the total_price
-        waitress_totals = orders.values('waitress__first_name', 'waitress__last_name').annotate(
-            total_served=Sum('total_price')
+        waitress_totals = Statistics.objects.waitress_performance(
+            oldest_order, obj.end_time or timezone.now(), orders=orders
         )
         return self.create_table_for_per_waitress(waitress_totals, oldest_order, latest_order)
 
     def display_order_items(self, obj):
-        # Get all orders related to this statistic
-        orders = Order.objects.all_orders().filter(statistics=obj)
-
-        # Get the oldest and latest created_at dates
-        order_dates = orders.aggregate(
-            oldest_order=Min('created_at'),
-            latest_order=Max('created_at')
-        )
-
-        oldest_order = order_dates['oldest_order']
-        latest_order = order_dates['latest_order']
-
-        # Get all order items related to these orders
-        order_items = OrderItem.objects.all_order_items().filter(order__in=orders)
-        order_items = order_items.values('meal__name').annotate(
-            total_quantity=Sum('quantity')
-        ).annotate(total_price=Sum('price'))
+        summary = Statistics.objects.sold_items_summary(obj)
+
+        order_items = [
+            {
+                "meal__name": meal["name"],
+                "total_quantity": meal["qty"],
+                "total_price": meal["total"],
+            }
+            for group in summary["groups"]
+            for meal in group["meals"]
+        ]
 
-        if not order_items.exists():
+        if not order_items:
             return "No orders found."
-        return self.create_table_for_order_items(order_items, oldest_order, latest_order)
+        return self.create_table_for_order_items(
+            order_items, summary["oldest_order"], summary["latest_order"]
+        )
 
     def create_table_for_per_waitress(self, waitress_totals, oldest_order, latest_order):
         # Format dates to include time (hours and minutes)
@@ -463,6 +510,11 @@ class StatisticsAdmin(SimpleHistoryAdmin):
                 <tr>
                     <th style="padding: 10px; border-bottom: 1px solid #ddd;">#</th>
                     <th style="padding: 10px; border-bottom: 1px solid #ddd;">Ofisiant</th>
+                    <th style="padding: 10px; border-bottom: 1px solid #ddd;">Sifariş</th>
+                    <th style="padding: 10px; border-bottom: 1px solid #ddd;">Müştəri</th>
+                    <th style="padding: 10px; border-bottom: 1px solid #ddd;">Orta çek</th>
+                    <th style="padding: 10px; border-bottom: 1px solid #ddd;">Məhsul / sifariş</th>
+                    <th style="padding: 10px; border-bottom: 1px solid #ddd;">Tullantı / Qaytarma</th>
                     <th style="padding: 10px; border-bottom: 1px solid #ddd;">Ümumi Məbləğ</th>
                 </tr>
             </thead>
@@ -471,13 +523,18 @@ class StatisticsAdmin(SimpleHistoryAdmin):
         total_server_by_waitresses = 0
         # Iterate through each waitress and display their total served amount
         for index, waitress in enumerate(waitress_totals, start=1):
-            waitress_name = f"{waitress['waitress__first_name']} {waitress['waitress__last_name']}" or "Məlum deyil"
-            total_served = waitress['total_served'] or 0
+            waitress_name = waitress['waitress'] or "Məlum deyil"
+            total_served = waitress['revenue'] or 0
             total_server_by_waitresses += float(total_served)
             table_html += f"""
                 <tr style="background-color: {'#ffffff' if index % 2 == 0 else '#f9f9f9'};">
                     <td style="padding: 10px; border-bottom: 1px solid #ddd;">{index}</td>
                     <td style="padding: 10px; border-bottom: 1px solid #ddd;">{waitress_name}</td>
+                    <td style="padding: 10px; border-bottom: 1px solid #ddd;">{waitress['orders']}</td>
+                    <td style="padding: 10px; border-bottom: 1px solid #ddd;">{waitress['covers']}</td>
+                    <td style="padding: 10px; border-bottom: 1px solid #ddd;">{waitress['average_ticket']} (AZN)</td>
+                    <td style="padding: 10px; border-bottom: 1px solid #ddd;">{waitress['items_per_order']}</td>
+                    <td style="padding: 10px; border-bottom: 1px solid #ddd;">{waitress['voids']['total']} / {waitress['returns']['total']} (AZN)</td>
                     <td style="padding: 10px; border-bottom: 1px solid #ddd;">{total_served} (AZN)</td>
                 </tr>
             """
@@ -485,7 +542,7 @@ class StatisticsAdmin(SimpleHistoryAdmin):
         table_html += f"""
             <tr style="font-weight: bold; background-color: #e6e6e6;">
                 <td style="padding: 10px; border-bottom: 1px solid #ddd;">Cəmi</td>
-                <td></td>
+                <td colspan="6"></td>
                 <td style="padding: 10px; border-bottom: 1px solid #ddd;">{total_server_by_waitresses} (AZN)</td>
             </tr>
         """
@@ -0,0 +1,271 @@
+"""
+Change timeline of orders for the history admin.
+
+A page of HistoricalOrder rows is read with keyset pagination on
+(history_date, history_id), newest first. The previous record of every row
+comes from a subquery annotation; those that are not on the page are read
+in one more query. The order item history of the page is read the same way
+(one query for the rows, one for their previous records), and the diffs
+are computed in memory in one pass, so a page costs the same few queries
+whatever its size.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import OuterRef, Q, Subquery
+
+from apps.orders.models import Order, OrderItem
+
+HistoricalOrder = Order.history.model
+HistoricalOrderItem = OrderItem.history.model
+
+PAGE_SIZE = 50
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Order fields that are not shown as changes
+ORDER_SKIP_FIELDS = ('id', 'created_at')
+ITEM_SKIP_FIELDS = ('updated_at',)
+
+
+# ========================= #
+#          CURSORS          #
+# ========================= #
+
+def make_cursor(record):
+    """URL-safe cursor of a history record: '<µs since epoch>-<history_id>'."""
+    micros = (record.history_date - EPOCH) // timedelta(microseconds=1)
+    return f"{micros}-{record.history_id}"
+
+
+def parse_cursor(cursor):
+    """(history_date, history_id) of a cursor; ValueError when malformed."""
+    micros, history_id = cursor.split('-')
+    return EPOCH + timedelta(microseconds=int(micros)), int(history_id)
+
+
+def _before(cursor):
+    history_date, history_id = parse_cursor(cursor)
+    return Q(history_date__lt=history_date) | Q(
+        history_date=history_date, history_id__lt=history_id)
+
+
+def _after(cursor):
+    history_date, history_id = parse_cursor(cursor)
+    return Q(history_date__gt=history_date) | Q(
+        history_date=history_date, history_id__gt=history_id)
+
+
+def _with_previous(queryset):
+    """Annotate prev_history_id: the record of the same object just before."""
+    previous = queryset.model.objects.filter(
+        Q(history_date__lt=OuterRef('history_date'))
+        | Q(history_date=OuterRef('history_date'), history_id__lt=OuterRef('history_id')),
+        id=OuterRef('id'),
+    ).order_by('-history_date', '-history_id').values('history_id')[:1]
+    return queryset.annotate(prev_history_id=Subquery(previous))
+
+
+def _previous_records(queryset, records, *related, changed_only=False):
+    """
+    {history_id: record} of records and their previous records (only of the
+    '~' records with changed_only).
+    """
+    by_id = {record.history_id: record for record in records}
+    missing = {
+        record.prev_history_id for record in records
+        if record.prev_history_id is not None and record.prev_history_id not in by_id
+        and (not changed_only or record.history_type == '~')
+    }
+    if missing:
+        by_id.update(
+            queryset.select_related(*related).in_bulk(missing, field_name='history_id'))
+    return by_id
+
+
+# ========================= #
+#           DIFFS           #
+# ========================= #
+
+def _value(record, field):
+    return getattr(record, field.attname)
+
+
+def _display(record, field):
+    """A field value for display; relations only when already loaded."""
+    if field.is_relation:
+        if field.is_cached(record):
+            return getattr(record, field.name)
+        return getattr(record, field.attname)
+    return getattr(record, field.name)
+
+
+def format_elapsed(old, new):
+    """Return human-readable elapsed time between two datetimes."""
+    delta = new - old
+    secs = delta.total_seconds()
+    if secs < 1:
+        return f"{int(delta.microseconds/1000)} ms"
+    if secs < 60:
+        return f"{secs:.1f} s"
+    m, s = divmod(int(secs), 60)
+    return f"{m} m {s} s"
+
+
+def _bool_label(value):
+    return 'Bəli' if value else 'Xeyr'
+
+
+def order_field_changes(record, prev):
+    """Changes on the Order itself; elapsed time for datetime fields."""
+    if prev is None:
+        return []
+
+    changes = []
+    for field in Order._meta.fields:
+        if field.name in ORDER_SKIP_FIELDS or _value(prev, field) == _value(record, field):
+            continue
+        old, new = _display(prev, field), _display(record, field)
+        if isinstance(old, datetime) and isinstance(new, datetime):
+            changes.append(f"{field.verbose_name}: {format_elapsed(old, new)}")
+        elif isinstance(old, bool) and isinstance(new, bool):
+            changes.append(
+                f"{field.verbose_name}: {_bool_label(old)} → {_bool_label(new)}")
+        else:
+            changes.append(f"{field.verbose_name}: {old} → {new}")
+    return changes
+
+
+def item_changes(items, previous_items):
+    """Additions, removals and field changes of the item records of one order change."""
+    adds, removes, updates = {}, {}, {}
+    for item in items:
+        meal = str(item.meal) if item.meal_id and item.meal else "—"
+
+        if item.history_type == '+':
+            adds[meal] = adds.get(meal, 0) + item.quantity
+        elif item.history_type == '-':
+            removes[meal] = removes.get(meal, 0) + item.quantity
+        elif item.history_type == '~':
+            prev = previous_items.get(item.prev_history_id)
+            if prev is None:
+                continue
+            for field in OrderItem._meta.fields:
+                if field.name in ITEM_SKIP_FIELDS or _value(prev, field) == _value(item, field):
+                    continue
+                key = (meal, field.verbose_name or field.name,
+                       _display(prev, field), _display(item, field))
+                updates[key] = updates.get(key, 0) + 1
+
+    lines = []
+    for meal, total in adds.items():
+        lines.append(f"Əlavə edildi: {meal} ({total} ədəd)")
+    for meal, total in removes.items():
+        lines.append(f"Silindi: {meal} ({total} ədəd)")
+    for (meal, name, old, new), count in updates.items():
+        if isinstance(old, bool) and isinstance(new, bool):
+            old, new = _bool_label(old), _bool_label(new)
+        lines.append(f"Dəyişdi: {meal} — {name}: {old} → {new} ({count} ədəd)")
+    return lines
+
+
+# ========================= #
+#           PAGE            #
+# ========================= #
+
+class TimelinePage:
+    def __init__(self, entries, newer=None, older=None):
+        # entries: [(record, lines)], newest first
+        self.entries = entries
+        self.newer = newer
+        self.older = older
+
+
+def _item_windows(records, by_id):
+    """{order id: sorted [(start, end, record)]} of the '~' records."""
+    windows = defaultdict(list)
+    for record in records:
+        if record.history_type != '~':
+            continue
+        prev = by_id.get(record.prev_history_id)
+        start = prev.history_date if prev else record.history_date - timedelta(seconds=1)
+        windows[record.id].append((start, record.history_date, record))
+    for order_windows in windows.values():
+        order_windows.sort(key=lambda window: window[1])
+    return windows
+
+
+def _load_items(windows):
+    """{record history_id: [item records]} and the previous item records."""
+    if not windows:
+        return {}, {}
+
+    condition = Q()
+    for order_id, order_windows in windows.items():
+        condition |= Q(
+            order_id=order_id,
+            history_date__gt=min(start for start, _end, _record in order_windows),
+            history_date__lte=order_windows[-1][1],
+        )
+    items = list(
+        _with_previous(HistoricalOrderItem.objects.filter(condition))
+        .select_related('meal__category')
+        .order_by('history_date', 'history_id')
+    )
+
+    by_record = defaultdict(list)
+    ends = {order_id: [end for _start, end, _record in order_windows]
+            for order_id, order_windows in windows.items()}
+    for item in items:
+        order_windows = windows[item.order_id]
+        index = bisect_left(ends[item.order_id], item.history_date)
+        if index < len(order_windows) and order_windows[index][0] < item.history_date:
+            by_record[order_windows[index][2].history_id].append(item)
+
+    previous = _previous_records(
+        HistoricalOrderItem.objects.all(), items, 'meal__category', changed_only=True)
+    return by_record, previous
+
+
+def load_page(queryset=None, before=None, after=None, page_size=PAGE_SIZE):
+    """
+    One page of the timeline of `queryset` (HistoricalOrder rows, filtered
+    by the caller): the records just older than cursor `before`, just newer
+    than `after`, or the newest ones.
+    """
+    related = ('table__room', 'waitress', 'history_user')
+    queryset = HistoricalOrder.objects.all() if queryset is None else queryset
+    page = _with_previous(queryset).select_related(*related)
+
+    if after:
+        records = list(
+            page.filter(_after(after)).order_by('history_date', 'history_id')[:page_size + 1])
+        has_newer, has_older = len(records) > page_size, True
+        records = records[:page_size][::-1]
+    else:
+        if before:
+            page = page.filter(_before(before))
+        records = list(page.order_by('-history_date', '-history_id')[:page_size + 1])
+        has_newer, has_older = bool(before), len(records) > page_size
+        records = records[:page_size]
+
+    by_id = _previous_records(HistoricalOrder.objects.all(), records, *related)
+    items, previous_items = _load_items(_item_windows(records, by_id))
+
+    entries = []
+    for record in records:
+        if record.history_type == '+':
+            lines = ["Yeni sifariş yaradıldı"]
+        elif record.history_type == '-':
+            lines = ["Sifariş silindi"]
+        else:
+            lines = order_field_changes(record, by_id.get(record.prev_history_id))
+            lines += item_changes(items.get(record.history_id, ()), previous_items)
+        entries.append((record, lines or ["Dəyişiklik tapılmadı"]))
+
+    return TimelinePage(
+        entries,
+        newer=make_cursor(records[0]) if records and has_newer else None,
+        older=make_cursor(records[-1]) if records and has_older else None,
+    )
@@ -0,0 +1,368 @@
+"""
+Columnar export of orders, order items, payments and deletion logs.
+
+Every dataset is written as one file per local calendar day:
+
+    <export_dir>/<dataset>/date=YYYY-MM-DD/part.<parquet|arrow>
+
+A `_state.json` file in the export directory keeps a high-water mark per
+dataset. On the next run only the days that contain rows changed after the
+mark are rewritten, so the export can be run repeatedly (e.g. from cron)
+without touching the rest of the history.
+
+The mark is kept ANALYTICS_EXPORT_SAFETY_LAG seconds behind the newest
+change: a transaction that commits late can leave rows changed before the
+newest change seen. The rows of that overlap window are remembered with
+their change time, so they are only exported again when they changed.
+
+Deleted rows leave no change behind, so the days that lost rows are found
+separately: from the '-' history records of orders and order items, and
+for the payment datasets (no history) by comparing the row count of every
+day with the one of the previous run.
+"""
+import json
+import os
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.orders.models import Order, OrderItem, OrderItemDeletionLog
+from apps.payments.models import Payment, PaymentMethod
+
+STATE_FILE = "_state.json"
+
+# Deletion tracking of a dataset: the history of its model, or day counts
+COUNTS = "counts"
+
+FORMATS = ("parquet", "arrow")
+
+
+def _datasets():
+    """
+    Dataset definitions: (name, queryset, partition field, change field,
+    deletions, columns).
+
+    `columns` is a list of (output name, lookup, arrow type name). The change
+    field drives the high-water mark; rows are partitioned by the local date
+    of the partition field. `deletions` is the model whose history records
+    the deleted rows, COUNTS, or None for append-only datasets.
+    """
+    return [
+        (
+            "orders",
+            Order.objects.all_orders(),
+            "created_at",
+            "updated_at",
+            Order,
+            [
+                ("id", "id", "int64"),
+                ("table_id", "table_id", "int64"),
+                ("room_id", "table__room_id", "int64"),
+                ("waitress_id", "waitress_id", "int64"),
+                ("customer_count", "customer_count", "int32"),
+                ("total_price", "total_price", "money"),
+                ("is_paid", "is_paid", "bool"),
+                ("is_deleted", "is_deleted", "bool"),
+                ("is_main", "is_main", "bool"),
+                ("is_check_printed", "is_check_printed", "bool"),
+                ("created_at", "created_at", "timestamp"),
+                ("updated_at", "updated_at", "timestamp"),
+            ],
+        ),
+        (
+            "order_items",
+            OrderItem.objects.all_order_items(),
+            "created_at",
+            "updated_at",
+            OrderItem,
+            [
+                ("id", "id", "int64"),
+                ("order_id", "order_id", "int64"),
+                ("meal_id", "meal_id", "int64"),
+                ("category_id", "meal__category_id", "int64"),
+                ("quantity", "quantity", "int32"),
+                ("price", "price", "money"),
+                ("confirmed", "confirmed", "bool"),
+                ("customer_number", "customer_number", "int32"),
+                ("item_added_at", "item_added_at", "timestamp"),
+                ("created_at", "created_at", "timestamp"),
+                ("updated_at", "updated_at", "timestamp"),
+            ],
+        ),
+        (
+            "payments",
+            Payment.objects.all(),
+            "paid_at",
+            "updated_at",
+            COUNTS,
+            [
+                ("id", "id", "int64"),
+                ("table_id", "table_id", "int64"),
+                ("paid_by_id", "paid_by_id", "int64"),
+                ("total_price", "total_price", "money"),
+                ("discount_amount", "discount_amount", "money"),
+                ("final_price", "final_price", "money"),
+                ("paid_amount", "paid_amount", "money"),
+                ("change", "change", "money"),
+                ("payment_type", "payment_type", "string"),
+                ("paid_at", "paid_at", "timestamp"),
+                ("updated_at", "updated_at", "timestamp"),
+            ],
+        ),
+        (
+            "payment_orders",
+            Payment.orders.through.objects.all(),
+            "payment__paid_at",
+            "payment__updated_at",
+            COUNTS,
+            [
+                ("payment_id", "payment_id", "int64"),
+                ("order_id", "order_id", "int64"),
+            ],
+        ),
+        (
+            "payment_methods",
+            PaymentMethod.objects.all(),
+            "created_at",
+            "updated_at",
+            COUNTS,
+            [
+                ("id", "id", "int64"),
+                ("payment_id", "payment_id", "int64"),
+                ("payment_type", "payment_type", "string"),
+                ("amount", "amount", "money"),
+                ("created_at", "created_at", "timestamp"),
+                ("updated_at", "updated_at", "timestamp"),
+            ],
+        ),
+        (
+            "deletion_logs",
+            OrderItemDeletionLog.objects.all(),
+            "deleted_at",
+            "deleted_at",
+            None,
+            [
+                ("id", "id", "int64"),
+                ("order_id", "order_id", "int64"),
+                ("order_item_id", "order_item_id", "int64"),
+                ("table_id", "table_id", "int64"),
+                ("waitress_name", "waitress_name", "string"),
+                ("meal_name", "meal_name", "string"),
+                ("quantity", "quantity", "quantity"),
+                ("price", "price", "money"),
+                ("customer_number", "customer_number", "int32"),
+                ("reason", "reason", "string"),
+                ("deleted_by_id", "deleted_by_id", "int64"),
+                ("deleted_at", "deleted_at", "timestamp"),
+            ],
+        ),
+    ]
+
+
+def _arrow_type(pa, name):
+    return {
+        "int32": pa.int32(),
+        "int64": pa.int64(),
+        "bool": pa.bool_(),
+        "string": pa.string(),
+        "money": pa.decimal128(15, 2),
+        "quantity": pa.decimal128(10, 3),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+    }[name]
+
+
+class AnalyticsExporter:
+    """
+    Streams the OLTP tables into day-partitioned columnar files.
+    """
+
+    def __init__(self, export_dir=None, file_format="parquet", chunk_size=2000):
+        if file_format not in FORMATS:
+            raise ValueError(f"Unsupported format: {file_format}")
+        self.export_dir = str(
+            export_dir or getattr(settings, "ANALYTICS_EXPORT_DIR")
+        )
+        self.file_format = file_format
+        self.chunk_size = chunk_size
+
+    # ========================= #
+    #          STATE            #
+    # ========================= #
+
+    @property
+    def state_path(self):
+        return os.path.join(self.export_dir, STATE_FILE)
+
+    def load_state(self):
+        try:
+            with open(self.state_path) as fp:
+                return json.load(fp)
+        except FileNotFoundError:
+            return {}
+
+    def save_state(self, state):
+        os.makedirs(self.export_dir, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as fp:
+            json.dump(state, fp, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    # ========================= #
+    #          EXPORT           #
+    # ========================= #
+
+    def run(self, full=False, datasets=None):
+        """
+        Export every dataset (or only the given names) and return
+        {dataset: number of rewritten day partitions}.
+        """
+        state = {} if full else self.load_state()
+        lag = timedelta(seconds=settings.ANALYTICS_EXPORT_SAFETY_LAG)
+        result = {}
+
+        for name, queryset, part_field, change_field, deletions, columns in _datasets():
+            if datasets and name not in datasets:
+                continue
+
+            started = timezone.now()
+            days = set()
+            seen = state.setdefault("_seen", {})
+            new_mark = queryset.aggregate(mark=Max(change_field))["mark"]
+            if new_mark is not None:
+                changed = queryset.filter(**{f"{change_field}__lte": new_mark})
+                days.update(self._changed_days(
+                    changed, change_field, part_field, state.get(name), seen.get(name, {})))
+
+            if deletions == COUNTS:
+                counts = self._day_counts(queryset, part_field)
+                previous = state.get("_counts", {}).get(name, {})
+                days.update(
+                    date.fromisoformat(day) for day, count in previous.items()
+                    if counts.get(day) != count
+                )
+                state.setdefault("_counts", {})[name] = counts
+            elif deletions is not None:
+                # The '-' history records of the rows deleted so far
+                deleted = deletions.history.model.objects.filter(
+                    history_type="-", history_date__lte=started)
+                deleted_since = state.get("_deletions", {}).get(name)
+                deleted_seen = state.setdefault("_deleted_seen", {})
+                if deleted_since:
+                    days.update(self._changed_days(
+                        deleted, "history_date", part_field, deleted_since,
+                        deleted_seen.get(name, {})))
+                state.setdefault("_deletions", {})[name] = (started - lag).isoformat()
+                deleted_seen[name] = self._window(deleted, "history_date", started - lag)
+
+            days = sorted(day for day in days if day is not None)
+            for day in days:
+                self.write_partition(name, queryset, part_field, columns, day)
+
+            if new_mark is not None:
+                state[name] = (new_mark - lag).isoformat()
+                seen[name] = self._window(changed, change_field, new_mark - lag)
+            self.save_state(state)
+            result[name] = len(days)
+
+        return result
+
+    @staticmethod
+    def _day_counts(queryset, part_field):
+        """{ISO day: number of rows} of every day of the dataset."""
+        return {
+            row["day"].isoformat(): row["count"]
+            for row in queryset.annotate(day=TruncDate(part_field))
+            .values("day").annotate(count=Count("pk")).order_by()
+            if row["day"] is not None
+        }
+
+    @staticmethod
+    def _changed_days(queryset, field, part_field, since, seen):
+        """
+        Days of the rows with `field` after the ISO time `since` (all rows
+        without it), skipping the rows in `seen` ({pk: ISO time of `field`})
+        that have not changed since they were exported.
+        """
+        rows = queryset.annotate(day=TruncDate(part_field))
+        if not since:
+            return set(rows.values_list("day", flat=True).distinct())
+        rows = rows.filter(**{f"{field}__gt": datetime.fromisoformat(since)})
+        return {
+            day for pk, value, day in rows.values_list("pk", field, "day")
+            if seen.get(str(pk)) != value.isoformat()
+        }
+
+    @staticmethod
+    def _window(queryset, field, start):
+        """{pk: ISO time of `field`} of the rows with `field` after `start`."""
+        return {
+            str(pk): value.isoformat()
+            for pk, value in queryset.filter(**{f"{field}__gt": start}).values_list("pk", field)
+        }
+
+    def write_partition(self, name, queryset, part_field, columns, day):
+        """
+        Rewrite one day partition, reading the rows in chunks and writing
+        them as record batches so memory stays bounded by `chunk_size`.
+        """
+        import pyarrow as pa
+
+        schema = pa.schema([
+            (out, _arrow_type(pa, type_name))
+            for out, _lookup, type_name in columns
+        ])
+        lookups = [lookup for _out, lookup, _type in columns]
+
+        rows = (
+            queryset.annotate(day=TruncDate(part_field))
+            .filter(day=day)
+            .order_by(part_field, "pk")
+            .values_list(*lookups)
+            .iterator(chunk_size=self.chunk_size)
+        )
+
+        directory = os.path.join(self.export_dir, name, f"date={day.isoformat()}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part.{self.file_format}")
+        tmp_path = f"{path}.tmp"
+
+        writer = self._open_writer(tmp_path, schema)
+        try:
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    writer.write_batch(self._batch(pa, schema, chunk))
+                    chunk = []
+            if chunk:
+                writer.write_batch(self._batch(pa, schema, chunk))
+        finally:
+            writer.close()
+        os.replace(tmp_path, path)
+
+    def _open_writer(self, path, schema):
+        if self.file_format == "parquet":
+            import pyarrow.parquet as pq
+
+            return pq.ParquetWriter(path, schema, compression="zstd")
+
+        import pyarrow as pa
+
+        return pa.ipc.new_file(
+            path, schema, options=pa.ipc.IpcWriteOptions(compression="zstd")
+        )
+
+    @staticmethod
+    def _batch(pa, schema, rows):
+        columns = list(zip(*rows))
+        return pa.record_batch(
+            [
+                pa.array(column, type=field.type)
+                for column, field in zip(columns, schema)
+            ],
+            schema=schema,
+        )
+
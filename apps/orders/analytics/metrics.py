@@ -0,0 +1,395 @@
+"""
+Vectorized sales metrics over the columnar export (see export.py).
+
+The export is loaded into pandas DataFrames once and every metric is
+computed with whole-column operations (bincount, groupby, merge) instead
+of ORM loops, so a year of orders is processed in seconds.
+"""
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+DATASETS = ("orders", "order_items", "payments", "payment_orders")
+
+WEEKDAYS = ["B.e", "Ç.a", "Ç", "C.a", "C", "Ş", "B"]
+
+
+def _partition_files(export_dir, name, start_date=None, end_date=None):
+    """Files of the dataset whose `date=` partition is inside the range."""
+    directory = os.path.join(export_dir, name)
+    if not os.path.isdir(directory):
+        return []
+
+    files = []
+    for entry in sorted(os.listdir(directory)):
+        if not entry.startswith("date="):
+            continue
+        day = date.fromisoformat(entry[len("date="):])
+        if start_date and day < start_date:
+            continue
+        if end_date and day > end_date:
+            continue
+        partition = os.path.join(directory, entry)
+        files.extend(
+            os.path.join(partition, f) for f in sorted(os.listdir(partition))
+            if f.startswith("part.") and not f.endswith(".tmp")
+        )
+    return files
+
+
+def _read_file(path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if path.endswith(".arrow"):
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_all()
+    return pq.read_table(path)
+
+
+def _to_frame(table):
+    """Arrow table -> DataFrame with decimals as float64 for fast math."""
+    import pyarrow as pa
+
+    columns = {}
+    for field, column in zip(table.schema, table.columns):
+        if pa.types.is_decimal(field.type):
+            column = column.cast(pa.float64())
+        columns[field.name] = column
+    return pa.table(columns).to_pandas()
+
+
+def load_frames(export_dir=None, start_date=None, end_date=None):
+    """
+    Load the exported orders, items, payments and payment/order links
+    into DataFrames, keyed by dataset name.
+    """
+    import pyarrow as pa
+
+    export_dir = str(export_dir or settings.ANALYTICS_EXPORT_DIR)
+    frames = {}
+    for name in DATASETS:
+        files = _partition_files(export_dir, name, start_date, end_date)
+        if files:
+            frames[name] = _to_frame(
+                pa.concat_tables([_read_file(f) for f in files])
+            )
+        else:
+            frames[name] = pd.DataFrame()
+    return frames
+
+
+# ========================= #
+#          METRICS          #
+# ========================= #
+
+def paid_orders(orders):
+    if orders.empty:
+        return orders
+    return orders[orders["is_paid"].to_numpy(dtype=bool)]
+
+
+def hourly_heatmap(orders, tz=None):
+    """
+    Revenue and order count of paid orders as weekday × hour matrices
+    (7 rows starting on Monday, 24 columns).
+    """
+    revenue = np.zeros((7, 24))
+    count = np.zeros((7, 24), dtype=np.int64)
+    orders = paid_orders(orders)
+    if not orders.empty:
+        local = orders["created_at"].dt.tz_convert(tz or settings.TIME_ZONE)
+        cell = local.dt.weekday.to_numpy() * 24 + local.dt.hour.to_numpy()
+        revenue = np.bincount(
+            cell, weights=orders["total_price"].to_numpy(), minlength=168
+        ).reshape(7, 24)
+        count = np.bincount(cell, minlength=168).reshape(7, 24)
+
+    return {
+        "weekdays": WEEKDAYS,
+        "hours": list(range(24)),
+        "revenue": np.round(revenue, 2).tolist(),
+        "orders": count.tolist(),
+    }
+
+
+def table_turnover(orders, payments, payment_orders):
+    """
+    Minutes between opening an order and its payment, per table.
+    """
+    if orders.empty or payments.empty or payment_orders.empty:
+        return {"average_minutes": None, "tables": []}
+
+    paid_at = (
+        payment_orders.merge(
+            payments[["id", "paid_at"]],
+            left_on="payment_id", right_on="id"
+        )
+        .groupby("order_id")["paid_at"].min()
+    )
+    seated = orders.set_index("id")[["table_id", "created_at"]].join(
+        paid_at, how="inner"
+    )
+    seated["minutes"] = (
+        seated["paid_at"] - seated["created_at"]
+    ).dt.total_seconds().to_numpy() / 60.0
+    seated = seated[seated["minutes"] >= 0]
+    if seated.empty:
+        return {"average_minutes": None, "tables": []}
+
+    per_table = seated.groupby("table_id")["minutes"].agg(
+        ["count", "mean", "median"]
+    )
+    return {
+        "average_minutes": round(float(seated["minutes"].mean()), 1),
+        "tables": [
+            {
+                "table_id": int(table_id),
+                "turns": int(row["count"]),
+                "average_minutes": round(float(row["mean"]), 1),
+                "median_minutes": round(float(row["median"]), 1),
+            }
+            for table_id, row in per_table.iterrows()
+        ],
+    }
+
+
+def check_per_cover(orders):
+    """Average check per order and per cover (customer_count)."""
+    orders = paid_orders(orders)
+    if orders.empty:
+        return {"orders": 0, "covers": 0, "revenue": 0.0,
+                "average_check": 0.0, "average_per_cover": 0.0}
+
+    revenue = float(orders["total_price"].sum())
+    covers = int(orders["customer_count"].clip(lower=1).sum())
+    count = len(orders)
+    return {
+        "orders": count,
+        "covers": covers,
+        "revenue": round(revenue, 2),
+        "average_check": round(revenue / count, 2),
+        "average_per_cover": round(revenue / covers, 2),
+    }
+
+
+def attach_rates(orders, items, limit=20):
+    """
+    Share of paid orders that contain each meal, highest first.
+    """
+    orders = paid_orders(orders)
+    if orders.empty or items.empty:
+        return []
+
+    paid_items = items[items["order_id"].isin(orders["id"])]
+    pairs = paid_items[["order_id", "meal_id"]].drop_duplicates()
+    counts = pairs["meal_id"].value_counts()
+    rates = (counts / len(orders)).head(limit)
+    return [
+        {
+            "meal_id": int(meal_id),
+            "orders": int(counts[meal_id]),
+            "attach_rate": round(float(rate), 4),
+        }
+        for meal_id, rate in rates.items()
+    ]
+
+
+def waitress_productivity(orders, items, tz=None):
+    """
+    Revenue, orders, covers, items and revenue per active hour per waitress.
+    """
+    orders = paid_orders(orders)
+    if orders.empty:
+        return []
+    orders = orders[orders["waitress_id"].notna()]
+    if orders.empty:
+        return []
+
+    local = orders["created_at"].dt.tz_convert(tz or settings.TIME_ZONE)
+    frame = pd.DataFrame({
+        "waitress_id": orders["waitress_id"].astype("int64").to_numpy(),
+        "order_id": orders["id"].to_numpy(),
+        "revenue": orders["total_price"].to_numpy(),
+        "covers": orders["customer_count"].to_numpy(),
+        "hour": local.dt.floor("h").to_numpy(),
+    })
+
+    if items.empty:
+        item_counts = pd.Series(dtype="int64")
+    else:
+        item_counts = items.groupby("order_id")["quantity"].sum()
+    frame["items"] = frame["order_id"].map(item_counts).fillna(0).to_numpy()
+
+    grouped = frame.groupby("waitress_id").agg(
+        revenue=("revenue", "sum"),
+        orders=("order_id", "count"),
+        covers=("covers", "sum"),
+        items=("items", "sum"),
+        active_hours=("hour", "nunique"),
+    ).sort_values("revenue", ascending=False)
+
+    return [
+        {
+            "waitress_id": int(waitress_id),
+            "revenue": round(float(row["revenue"]), 2),
+            "orders": int(row["orders"]),
+            "covers": int(row["covers"]),
+            "average_check": round(float(row["revenue"] / row["orders"]), 2),
+            "items_per_order": round(float(row["items"] / row["orders"]), 2),
+            "revenue_per_hour": round(
+                float(row["revenue"] / max(row["active_hours"], 1)), 2
+            ),
+        }
+        for waitress_id, row in grouped.iterrows()
+    ]
+
+
+def meal_sales(orders, items):
+    """
+    Quantity sold and revenue per meal over paid orders, as a DataFrame
+    indexed by meal_id.
+    """
+    orders = paid_orders(orders)
+    if orders.empty or items.empty:
+        return pd.DataFrame(columns=["quantity", "revenue"])
+
+    paid_items = items[items["order_id"].isin(orders["id"])]
+    return paid_items.groupby("meal_id").agg(
+        quantity=("quantity", "sum"),
+        revenue=("price", "sum"),
+    )
+
+
+def classify_menu(sales, costs, popularity_factor=0.7):
+    """
+    Menu engineering matrix (Kasavana & Smith): every sold meal is ranked
+    by popularity (its share of the items sold) against contribution
+    margin (average selling price minus cost).
+
+    - popularity is high when the share reaches `popularity_factor` of an
+      even share (1 / number of meals);
+    - margin is high when it reaches the sales-weighted average margin.
+
+    `costs` maps meal_id -> unit cost; meals without a cost count as 0.
+    """
+    sales = sales[sales["quantity"] > 0]
+    if sales.empty:
+        return {"popularity_threshold": 0.0, "margin_threshold": 0.0, "meals": []}
+
+    quantity = sales["quantity"].to_numpy(dtype=float)
+    revenue = sales["revenue"].to_numpy(dtype=float)
+    cost = sales.index.map(
+        lambda meal_id: float(costs.get(meal_id) or 0)
+    ).to_numpy(dtype=float)
+
+    unit_price = revenue / quantity
+    margin = unit_price - cost
+    mix = quantity / quantity.sum()
+
+    popularity_threshold = popularity_factor / len(sales)
+    margin_threshold = float((margin * quantity).sum() / quantity.sum())
+
+    popular = mix >= popularity_threshold
+    profitable = margin >= margin_threshold
+    classes = np.where(
+        popular,
+        np.where(profitable, "star", "plowhorse"),
+        np.where(profitable, "puzzle", "dog"),
+    )
+
+    order = np.lexsort((-margin, -quantity))
+    return {
+        "popularity_threshold": round(popularity_threshold, 4),
+        "margin_threshold": round(margin_threshold, 2),
+        "meals": [
+            {
+                "meal_id": int(sales.index[i]),
+                "quantity": int(quantity[i]),
+                "revenue": round(float(revenue[i]), 2),
+                "average_price": round(float(unit_price[i]), 2),
+                "cost": round(float(cost[i]), 3),
+                "margin": round(float(margin[i]), 2),
+                "margin_percentage": round(
+                    float(margin[i] / unit_price[i] * 100) if unit_price[i] else 0.0, 1
+                ),
+                "total_margin": round(float(margin[i] * quantity[i]), 2),
+                "popularity": round(float(mix[i]), 4),
+                "class": str(classes[i]),
+            }
+            for i in order
+        ],
+    }
+
+
+def compute_metrics(frames, tz=None):
+    orders = frames.get("orders", pd.DataFrame())
+    items = frames.get("order_items", pd.DataFrame())
+    payments = frames.get("payments", pd.DataFrame())
+    payment_orders = frames.get("payment_orders", pd.DataFrame())
+
+    return {
+        "summary": check_per_cover(orders),
+        "heatmap": hourly_heatmap(orders, tz),
+        "turnover": table_turnover(orders, payments, payment_orders),
+        "attach_rates": attach_rates(orders, items),
+        "waitresses": waitress_productivity(orders, items, tz),
+    }
+
+
+def sales_analytics(start_date=None, end_date=None, export_dir=None):
+    """
+    Load the export for the date range, compute the metrics and resolve
+    meal and waitress names with two small lookups.
+    """
+    from apps.meals.models import Meal
+    from apps.users.models import User
+
+    frames = load_frames(export_dir, start_date, end_date)
+    metrics = compute_metrics(frames)
+
+    meals = Meal.objects.in_bulk(
+        [row["meal_id"] for row in metrics["attach_rates"]]
+    )
+    for row in metrics["attach_rates"]:
+        meal = meals.get(row["meal_id"])
+        row["meal"] = meal.name if meal else "—"
+
+    users = User.objects.in_bulk(
+        [row["waitress_id"] for row in metrics["waitresses"]]
+    )
+    for row in metrics["waitresses"]:
+        user = users.get(row["waitress_id"])
+        row["waitress"] = (user.get_full_name() or user.username) if user else "—"
+
+    return metrics
+
+
+def menu_engineering(start_date=None, end_date=None, export_dir=None):
+    """
+    Menu engineering over the export for the date range, with costs from
+    the precomputed MealCost table and meal names from one lookup.
+    """
+    from apps.inventory_connector.models import MealCost
+    from apps.meals.models import Meal
+
+    frames = load_frames(export_dir, start_date, end_date)
+    sales = meal_sales(
+        frames.get("orders", pd.DataFrame()),
+        frames.get("order_items", pd.DataFrame()),
+    )
+    meal_ids = [int(meal_id) for meal_id in sales.index]
+    costs = dict(
+        MealCost.objects.filter(meal_id__in=meal_ids).values_list("meal_id", "cost")
+    )
+    result = classify_menu(sales, costs)
+
+    meals = Meal.objects.select_related("category").in_bulk(meal_ids)
+    for row in result["meals"]:
+        meal = meals.get(row["meal_id"])
+        row["meal"] = meal.name if meal else "—"
+        row["category"] = meal.category.name if meal and meal.category else None
+    return result
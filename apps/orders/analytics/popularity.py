@@ -0,0 +1,198 @@
+"""
+Quick picks for the waiter UI: top sellers per room and hour of day, and
+meals frequently ordered together.
+
+`compute_popularity` (run periodically by `manage.py
+compute_meal_popularity`) scans the OrderItem history of the last
+WINDOW_DAYS once and replaces the compact MealPopularity and MealPairing
+tables. Lookups read an in-memory copy of those tables that is reloaded
+when the job publishes a new version (read at most every
+VERSION_CHECK_SECONDS) and, for processes that do not share the cache,
+every REFRESH_SECONDS, so serving never touches OrderItem.
+"""
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from itertools import combinations
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractHour
+from django.utils import timezone
+
+VERSION_KEY = "orders:popularity:version"
+
+WINDOW_DAYS = 60
+TOP_PER_SLOT = 20
+PAIRS_PER_MEAL = 10
+MIN_PAIR_ORDERS = 2
+REFRESH_SECONDS = 600
+VERSION_CHECK_SECONDS = 5
+
+_lock = threading.Lock()
+_state = None
+_checked_at = 0.0
+
+
+# ========================= #
+#          COMPUTE          #
+# ========================= #
+
+def _ranked(counter, limit):
+    return sorted(counter.items(), key=lambda kv: (-kv[1][0], -kv[1][1], kv[0]))[:limit]
+
+
+def compute_popularity(days=WINDOW_DAYS, top=TOP_PER_SLOT,
+                       pairs_per_meal=PAIRS_PER_MEAL, min_pair_orders=MIN_PAIR_ORDERS):
+    """
+    Recompute the popularity and pairing tables. Returns the number of
+    (popularity, pairing) rows written.
+    """
+    from apps.orders.models import MealPairing, MealPopularity, OrderItem
+
+    since = timezone.now() - timedelta(days=days)
+    # Closed shifts flag their orders is_deleted; the default manager hides them
+    items = OrderItem.objects.all_order_items().filter(item_added_at__gte=since)
+
+    # (room, hour) -> meal -> [quantity, orders]; room None is the whole house
+    slots = {}
+    rows = (
+        items.annotate(hour=ExtractHour("item_added_at"))
+        .values("order__table__room_id", "hour", "meal_id")
+        .annotate(quantity=Sum("quantity"), orders=Count("order_id", distinct=True))
+        .order_by()
+    )
+    for row in rows.iterator():
+        for room_id in {row["order__table__room_id"], None}:
+            counts = slots.setdefault((room_id, row["hour"]), {})
+            totals = counts.setdefault(row["meal_id"], [0, 0])
+            totals[0] += row["quantity"] or 0
+            totals[1] += row["orders"]
+    popularity = [
+        MealPopularity(
+            room_id=room_id, hour=hour, meal_id=meal_id,
+            quantity=quantity, orders=orders, rank=rank,
+        )
+        for (room_id, hour), counts in slots.items()
+        for rank, (meal_id, (quantity, orders)) in enumerate(_ranked(counts, top), 1)
+    ]
+
+    # Pairs of distinct meals inside the same order
+    meal_orders = Counter()
+    pair_orders = Counter()
+    current_order, basket = None, set()
+    pairs = items.values_list("order_id", "meal_id").distinct().order_by("order_id")
+    for order_id, meal_id in pairs.iterator():
+        if order_id != current_order:
+            meal_orders.update(basket)
+            pair_orders.update(combinations(sorted(basket), 2))
+            current_order, basket = order_id, set()
+        basket.add(meal_id)
+    meal_orders.update(basket)
+    pair_orders.update(combinations(sorted(basket), 2))
+
+    partners = {}
+    for (a, b), count in pair_orders.items():
+        if count < min_pair_orders:
+            continue
+        partners.setdefault(a, []).append((b, count))
+        partners.setdefault(b, []).append((a, count))
+    pairings = [
+        MealPairing(
+            meal_id=meal_id, paired_meal_id=paired_id, orders=count,
+            confidence=round(count / meal_orders[meal_id], 4), rank=rank,
+        )
+        for meal_id, meal_partners in partners.items()
+        for rank, (paired_id, count) in enumerate(
+            sorted(meal_partners, key=lambda p: (-p[1], p[0]))[:pairs_per_meal], 1)
+    ]
+
+    with transaction.atomic():
+        MealPopularity.objects.all().delete()
+        MealPairing.objects.all().delete()
+        MealPopularity.objects.bulk_create(popularity, batch_size=1000)
+        MealPairing.objects.bulk_create(pairings, batch_size=1000)
+        transaction.on_commit(_publish)
+    return len(popularity), len(pairings)
+
+
+def _publish():
+    global _state
+
+    with _lock:
+        _state = None
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+# ========================= #
+#          LOOKUP           #
+# ========================= #
+
+def _load():
+    from apps.orders.models import MealPairing, MealPopularity
+
+    top = {}
+    for room_id, hour, meal_id, quantity in MealPopularity.objects.order_by(
+        "rank"
+    ).values_list("room_id", "hour", "meal_id", "quantity"):
+        top.setdefault((room_id, hour), []).append((meal_id, quantity))
+
+    pairs = {}
+    for meal_id, paired_id, orders, confidence in MealPairing.objects.order_by(
+        "rank"
+    ).values_list("meal_id", "paired_meal_id", "orders", "confidence"):
+        pairs.setdefault(meal_id, []).append((paired_id, orders, confidence))
+    return {"top": top, "pairs": pairs}
+
+
+def _get_state():
+    global _state, _checked_at
+
+    state = _state
+    now = time.monotonic()
+    if (state is not None and now - _checked_at < VERSION_CHECK_SECONDS
+            and now - state[1] <= REFRESH_SECONDS):
+        return state[2]
+
+    version = cache.get(VERSION_KEY, 0)
+    with _lock:
+        if (_state is None or _state[0] != version
+                or time.monotonic() - _state[1] > REFRESH_SECONDS):
+            _state = (version, time.monotonic(), _load())
+        _checked_at = time.monotonic()
+        return _state[2]
+
+
+def top_sellers(hour, room_id=None, limit=10):
+    """
+    [(meal_id, quantity)] best sellers of the room at that hour of day,
+    falling back to the whole house when the room has no history.
+    """
+    top = _get_state()["top"]
+    rows = top.get((room_id, hour)) if room_id is not None else None
+    if not rows:
+        rows = top.get((None, hour), [])
+    return rows[:limit]
+
+
+def ordered_together(meal_ids, limit=10):
+    """
+    [(meal_id, score)] meals most often ordered with the given ones, the
+    given meals excluded. The score sums the confidences.
+    """
+    pairs = _get_state()["pairs"]
+    basket = set(meal_ids)
+    scores = Counter()
+    for meal_id in basket:
+        for paired_id, _orders, confidence in pairs.get(meal_id, ()):
+            if paired_id not in basket:
+                scores[paired_id] += confidence
+    return [
+        (meal_id, round(score, 4))
+        for meal_id, score in sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+    ]
@@ -0,0 +1,208 @@
+"""
+Shared cache of payment reports (active-orders / period-report, and the
+Telegram bot reading them).
+
+A report is cached under its kind, its date range, the work period config
+version and a data version:
+
+- ranges that ended before the current work period are closed: they are
+  keyed by the history version, bumped only when orders or payments of
+  earlier periods change, and kept without timeout;
+- ranges reaching the current work period are open: they are keyed by the
+  live version too, bumped on every order or payment change, and kept for
+  REPORT_CACHE_OPEN_TTL seconds at most.
+
+Versions move when the transaction of the change commits. Every entry
+records when it was computed, so callers can show its age.
+"""
+import threading
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+CONFIG_VERSION_KEY = "orders:report:config-version"
+HISTORY_VERSION_KEY = "orders:report:history-version"
+LIVE_VERSION_KEY = "orders:report:live-version"
+REPORT_KEY = "orders:report:{kind}:{start}:{end}:{config}:{data}"
+
+DEFAULT_START_TIME, DEFAULT_END_TIME = time(12, 0), time(2, 0)
+
+_lock = threading.Lock()
+_work_period = None
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+# ========================= #
+#        WORK PERIOD        #
+# ========================= #
+
+def _work_times():
+    """(start, end) times of the active WorkPeriodConfig, kept per config version."""
+    global _work_period
+    from apps.orders.models import WorkPeriodConfig
+
+    version = _version(CONFIG_VERSION_KEY)
+    current = _work_period
+    if current is None or current[0] != version:
+        with _lock:
+            if _work_period is None or _work_period[0] != version:
+                times = WorkPeriodConfig.objects.filter(
+                    is_active=True
+                ).values_list("start_time", "end_time").first()
+                _work_period = (version, times or (DEFAULT_START_TIME, DEFAULT_END_TIME))
+            current = _work_period
+    return current[1]
+
+
+def current_work_date(now=None):
+    """The date of the work period in progress."""
+    now = timezone.localtime(now)
+    if now.time() < _work_times()[0]:
+        return now.date() - timedelta(days=1)
+    return now.date()
+
+
+def work_period_bounds(work_date):
+    """(start, end) datetimes of the work period of work_date."""
+    start_time, end_time = _work_times()
+    end_date = work_date + timedelta(days=1) if end_time < start_time else work_date
+    return (
+        timezone.make_aware(datetime.combine(work_date, start_time)),
+        timezone.make_aware(datetime.combine(end_date, end_time)),
+    )
+
+
+def _current_period_start():
+    return work_period_bounds(current_work_date())[0]
+
+
+# ========================= #
+#           CACHE           #
+# ========================= #
+
+def _key(kind, start_date, end_date):
+    data = str(_version(HISTORY_VERSION_KEY))
+    if end_date >= current_work_date():
+        data += f".{_version(LIVE_VERSION_KEY)}"
+    return REPORT_KEY.format(
+        kind=kind, start=start_date.isoformat(), end=end_date.isoformat(),
+        config=_version(CONFIG_VERSION_KEY), data=data,
+    )
+
+
+def lookup(kind, start_date, end_date):
+    """The cached entry {"data", "computed_at"} of the report, or None."""
+    return cache.get(_key(kind, start_date, end_date))
+
+
+def get_or_compute(kind, start_date, end_date, compute):
+    """
+    The cached entry of the report, computing and storing it with
+    `compute()` (JSON-serializable data) on a miss.
+    """
+    key = _key(kind, start_date, end_date)
+    entry = cache.get(key)
+    if entry is None:
+        entry = {"data": compute(), "computed_at": timezone.now().isoformat()}
+        closed = end_date < current_work_date()
+        cache.set(key, entry, None if closed else settings.REPORT_CACHE_OPEN_TTL)
+    return entry
+
+
+def range_report(start_date, end_date):
+    """Payment totals of the work periods of start_date..end_date (active-orders)."""
+    from apps.orders.models import Report
+
+    def compute():
+        totals = dict.fromkeys(
+            ('cash_total', 'card_total', 'other_total', 'unpaid_total'), Decimal('0.00'))
+        current_date = start_date
+        while current_date <= end_date:
+            report, created = Report.objects.get_or_create_for_date(current_date)
+            # Update totals to ensure current data
+            report.update_totals()
+            for field in totals:
+                totals[field] += getattr(report, field)
+            current_date += timedelta(days=1)
+
+        paid_total = totals['cash_total'] + totals['card_total'] + totals['other_total']
+        return {
+            **{field: float(value) for field, value in totals.items()},
+            'paid_total': float(paid_total),
+        }
+
+    return get_or_compute('active-orders', start_date, end_date, compute)
+
+
+def period_report(work_date):
+    """Totals and bounds of the work period of work_date (period-report)."""
+    from apps.orders.models import Report
+
+    def compute():
+        report, created = Report.objects.get_or_create_for_date(work_date)
+        # Update totals to ensure current data
+        report.update_totals()
+        return {
+            'cash_total': float(report.cash_total),
+            'card_total': float(report.card_total),
+            'other_total': float(report.other_total),
+            'unpaid_total': float(report.unpaid_total),
+            'paid_total': float(report.cash_total + report.card_total + report.other_total),
+            'total_amount': float(report.total_amount),
+            'period_start': report.start_datetime.isoformat(),
+            'period_end': report.end_datetime.isoformat(),
+            'period_name': report.work_period_config.name,
+        }
+
+    return get_or_compute('period-report', work_date, work_date, compute)
+
+
+def age_seconds(computed_at, now=None):
+    """Seconds since an entry's `computed_at`."""
+    computed_at = datetime.fromisoformat(computed_at)
+    return max(0, int(((now or timezone.now()) - computed_at).total_seconds()))
+
+
+# ========================= #
+#       INVALIDATION        #
+# ========================= #
+
+def config_changed(**kwargs):
+    """post_save/post_delete of WorkPeriodConfig."""
+    transaction.on_commit(lambda: _bump(CONFIG_VERSION_KEY))
+
+
+def _changed(moment):
+    transaction.on_commit(lambda: _bump(LIVE_VERSION_KEY))
+    if moment is None or moment < _current_period_start():
+        transaction.on_commit(lambda: _bump(HISTORY_VERSION_KEY))
+
+
+def order_changed(sender, instance, **kwargs):
+    _changed(instance.created_at)
+
+
+def payment_changed(sender, instance, **kwargs):
+    _changed(instance.paid_at)
+
+
+def payment_method_changed(sender, instance, **kwargs):
+    _changed(instance.created_at)
@@ -0,0 +1,332 @@
+"""
+Streaming CSV / XLSX downloads of orders, order items, payments, order
+history and deletion logs for a range of local calendar dates.
+
+Rows are read with `values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE)`
+and written into a StreamingHttpResponse as they arrive, so memory stays
+bounded by one chunk whatever the size of the range. XLSX files are written
+as a zip stream (inline strings, no shared string table), which needs no
+extra library and no temporary file.
+"""
+import csv
+import re
+import zipfile
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+FORMATS = ("csv", "xlsx")
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Characters that make a spreadsheet read a text cell as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+# Control characters XML 1.0 does not allow
+ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _datasets():
+    """
+    Dataset definitions: name -> (label, queryset, date field, columns).
+
+    `columns` is a list of (header, lookup). Rows are selected and ordered
+    by the date field.
+    """
+    from apps.orders.models import Order, OrderItem, OrderItemDeletionLog
+    from apps.payments.models import Payment
+
+    return {
+        "orders": (
+            "Sifarişlər",
+            Order.objects.all_orders(),
+            "created_at",
+            [
+                ("ID", "id"),
+                ("Stol", "table__number"),
+                ("Zal", "table__room__name"),
+                ("Ofisiant", "waitress__username"),
+                ("Müştəri sayı", "customer_count"),
+                ("Məbləğ", "total_price"),
+                ("Ödənilib", "is_paid"),
+                ("Silinib", "is_deleted"),
+                ("Əsas sifariş", "is_main"),
+                ("Yaradılıb", "created_at"),
+                ("Yenilənib", "updated_at"),
+            ],
+        ),
+        "order_items": (
+            "Sifariş məhsulları",
+            OrderItem.objects.all_order_items(),
+            "created_at",
+            [
+                ("ID", "id"),
+                ("Sifariş ID", "order_id"),
+                ("Stol", "order__table__number"),
+                ("Yemək", "meal__name"),
+                ("Kateqoriya", "meal__category__name"),
+                ("Miqdar", "quantity"),
+                ("Qiymət", "price"),
+                ("Təsdiqlənib", "confirmed"),
+                ("Müştəri №", "customer_number"),
+                ("Əlavə olunub", "item_added_at"),
+                ("Yaradılıb", "created_at"),
+            ],
+        ),
+        "payments": (
+            "Ödənişlər",
+            Payment.objects.all(),
+            "paid_at",
+            [
+                ("ID", "id"),
+                ("Stol", "table__number"),
+                ("Ümumi məbləğ", "total_price"),
+                ("Endirim", "discount_amount"),
+                ("Endirim səbəbi", "discount_comment"),
+                ("Yekun məbləğ", "final_price"),
+                ("Ödənilən", "paid_amount"),
+                ("Qalıq", "change"),
+                ("Ödəniş növü", "payment_type"),
+                ("Operator", "paid_by__username"),
+                ("Ödəmə tarixi", "paid_at"),
+            ],
+        ),
+        "order_history": (
+            "Sifariş arxivi",
+            Order.history.all(),
+            "history_date",
+            [
+                ("Arxiv ID", "history_id"),
+                ("Sifariş ID", "id"),
+                ("Stol ID", "table_id"),
+                ("Ofisiant ID", "waitress_id"),
+                ("Məbləğ", "total_price"),
+                ("Ödənilib", "is_paid"),
+                ("Silinib", "is_deleted"),
+                ("Dəyişiklik", "history_type"),
+                ("İstifadəçi", "history_user__username"),
+                ("Tarix", "history_date"),
+            ],
+        ),
+        "deletion_logs": (
+            "Silinmə qeydləri",
+            OrderItemDeletionLog.objects.all(),
+            "deleted_at",
+            [
+                ("ID", "id"),
+                ("Sifariş ID", "order_id"),
+                ("Sifariş məhsulu ID", "order_item_id"),
+                ("Stol ID", "table_id"),
+                ("Ofisiant", "waitress_name"),
+                ("Yemək", "meal_name"),
+                ("Miqdar", "quantity"),
+                ("Qiymət", "price"),
+                ("Müştəri №", "customer_number"),
+                ("Səbəb", "reason"),
+                ("Şərh", "comment"),
+                ("Silən", "deleted_by__username"),
+                ("Silinmə tarixi", "deleted_at"),
+            ],
+        ),
+    }
+
+
+DATASETS = ("orders", "order_items", "payments", "order_history", "deletion_logs")
+
+
+def dataset_label(name):
+    return _datasets()[name][0]
+
+
+def dataset_model(name):
+    """The model whose view permission a download of the dataset needs."""
+    return _datasets()[name][1].model
+
+
+def date_bounds(start_date, end_date):
+    """Aware [start, end) datetimes covering the local dates start_date..end_date."""
+    return (
+        timezone.make_aware(datetime.combine(start_date, time.min)),
+        timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min)),
+    )
+
+
+def header_and_rows(name, start_date, end_date, chunk_size=None):
+    """The column headers and a lazy iterator over the rows of a dataset."""
+    _label, queryset, date_field, columns = _datasets()[name]
+    start, end = date_bounds(start_date, end_date)
+    rows = (
+        queryset
+        .filter(**{f"{date_field}__gte": start, f"{date_field}__lt": end})
+        .order_by(date_field, "pk")
+        .values_list(*[lookup for _header, lookup in columns])
+        .iterator(chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE)
+    )
+    return [header for header, _lookup in columns], rows
+
+
+def _cell(value):
+    """A row value as written to a file: numbers stay numbers, the rest is text."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "Bəli" if value else "Xeyr"
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, (int, float, Decimal)):
+        return value
+    return str(value)
+
+
+def _csv_cell(value):
+    value = _cell(value)
+    # Text typed by staff must not run as a formula when the file is opened
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+# ========================= #
+#            CSV            #
+# ========================= #
+
+class _Echo:
+    """File-like object whose write() hands the written line back."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows):
+    writer = csv.writer(_Echo())
+    # BOM so that Excel opens the file as UTF-8
+    yield "\ufeff" + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+# ========================= #
+#           XLSX            #
+# ========================= #
+
+XLSX_PARTS = (
+    ("[Content_Types].xml",
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+     '<Default Extension="xml" ContentType="application/xml"/>'
+     '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+     '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+     '</Types>'),
+    ("_rels/.rels",
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+     '</Relationships>'),
+    ("xl/workbook.xml",
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+     'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+     '<sheets><sheet name="{sheet}" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    ("xl/_rels/workbook.xml.rels",
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+     '</Relationships>'),
+)
+
+SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetData>'
+)
+SHEET_TAIL = '</sheetData></worksheet>'
+
+
+class _Sink:
+    """Unseekable file object collecting what the zip writer produces."""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        self.size = 0
+        return data
+
+
+def _column_letter(index):
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _xlsx_row(number, values, columns):
+    cells = []
+    for column, value in zip(columns, values):
+        ref = f"{column}{number}"
+        if value == "":
+            continue
+        if isinstance(value, (int, float, Decimal)):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            text = escape(ILLEGAL_XML.sub("", value))
+            cells.append(
+                f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+            )
+    return f'<row r="{number}">{"".join(cells)}</row>'.encode()
+
+
+def stream_xlsx(header, rows, sheet_name="Sheet1", flush_bytes=64 * 1024):
+    sink = _Sink()
+    columns = [_column_letter(index) for index in range(len(header))]
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as workbook:
+        for part, content in XLSX_PARTS:
+            workbook.writestr(part, content.replace("{sheet}", escape(sheet_name[:31])))
+        with workbook.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(SHEET_HEAD.encode())
+            sheet.write(_xlsx_row(1, header, columns))
+            for number, row in enumerate(rows, start=2):
+                sheet.write(_xlsx_row(number, [_cell(value) for value in row], columns))
+                if sink.size >= flush_bytes:
+                    yield sink.drain()
+            sheet.write(SHEET_TAIL.encode())
+    yield sink.drain()
+
+
+def export_response(name, file_format, start_date, end_date):
+    """A StreamingHttpResponse with the dataset's rows of start_date..end_date."""
+    if name not in DATASETS:
+        raise ValueError(f"Unknown dataset: {name}")
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+    header, rows = header_and_rows(name, start_date, end_date)
+    if file_format == "csv":
+        content = stream_csv(header, rows)
+    else:
+        content = stream_xlsx(header, rows, sheet_name=dataset_label(name))
+
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[file_format])
+    filename = f"{name}_{start_date.isoformat()}_{end_date.isoformat()}.{file_format}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -6,6 +6,7 @@ from django.http import JsonResponse
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
+from apps.orders.analytics import report_cache
 from apps.orders.models import Order, Statistics
 from apps.payments.models import Payment
 
@@ -23,8 +24,7 @@ def active_orders_api(request):
         return JsonResponse({'error': 'Method not allowed'}, status=405)
 
     try:
-        from datetime import datetime, timedelta
-        from apps.orders.models import Report
+        from datetime import datetime
 
         # Parse datetime filters from query parameters
         start_date_param = request.GET.get('start_date')
@@ -60,40 +60,11 @@ def active_orders_api(request):
             except (ValueError, TypeError):
                 return JsonResponse({'error': 'Invalid date format. Use ISO format: YYYY-MM-DDTHH:MM:SS'}, status=400)
 
-        # Initialize aggregate totals
-        total_cash = Decimal('0.00')
-        total_card = Decimal('0.00')
-        total_other = Decimal('0.00')
-        total_unpaid = Decimal('0.00')
-
-        # Generate reports for each date in the range
-        current_date = start_date
-        while current_date <= end_date:
-            # Get or create report for this date
-            report, created = Report.objects.get_or_create_for_date(
-                current_date)
-
-            # Update totals to ensure current data
-            report.update_totals()
-
-            # Add to aggregate totals
-            total_cash += report.cash_total
-            total_card += report.card_total
-            total_other += report.other_total
-            total_unpaid += report.unpaid_total
-
-            # Move to next date
-            current_date += timedelta(days=1)
-
-        # Calculate paid total
-        paid_total = total_cash + total_card + total_other
+        entry = report_cache.range_report(start_date, end_date)
 
         return JsonResponse({
-            'cash_total': float(total_cash),
-            'card_total': float(total_card),
-            'other_total': float(total_other),
-            'unpaid_total': float(total_unpaid),
-            'paid_total': float(paid_total),
+            **entry['data'],
+            'cached_at': entry['computed_at'],
             'filters_applied': {
                 'start_date': start_date_param,
                 'end_date': end_date_param,
@@ -114,7 +85,6 @@ def period_report_api(request):
 
     try:
         from datetime import datetime
-        from apps.orders.models import Report
 
         # Get date parameter
         date_str = request.GET.get('date')
@@ -127,26 +97,11 @@ def period_report_api(request):
         except ValueError:
             return JsonResponse({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
 
-        # Get or create report for this date
-        report, created = Report.objects.get_or_create_for_date(date_obj)
-
-        # Update totals to ensure current data
-        report.update_totals()
-
-        # Calculate paid total
-        paid_total = float(report.cash_total +
-                           report.card_total + report.other_total)
+        entry = report_cache.period_report(date_obj)
 
         return JsonResponse({
-            'cash_total': float(report.cash_total),
-            'card_total': float(report.card_total),
-            'other_total': float(report.other_total),
-            'unpaid_total': float(report.unpaid_total),
-            'paid_total': paid_total,
-            'total_amount': float(report.total_amount),
-            'period_start': report.start_datetime.isoformat(),
-            'period_end': report.end_datetime.isoformat(),
-            'period_name': report.work_period_config.name,
+            **entry['data'],
+            'cached_at': entry['computed_at'],
             'date': date_str
         })
 
@@ -259,3 +214,150 @@ def daily_report_api(request):
 
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
+
+
+def sales_analytics_api(request):
+    """
+    API endpoint with vectorized sales analytics computed from the
+    columnar export (hour-of-day heatmap, table turnover, average check
+    per cover, item attach rates and waitress productivity)
+
+    Query parameters:
+    - start_date: YYYY-MM-DD (optional)
+    - end_date: YYYY-MM-DD (optional)
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        from apps.orders.analytics.metrics import sales_analytics
+
+        start_date_param = request.GET.get('start_date')
+        end_date_param = request.GET.get('end_date')
+
+        try:
+            start_date = datetime.strptime(
+                start_date_param, '%Y-%m-%d').date() if start_date_param else None
+            end_date = datetime.strptime(
+                end_date_param, '%Y-%m-%d').date() if end_date_param else None
+        except ValueError:
+            return JsonResponse({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
+
+        data = sales_analytics(start_date, end_date)
+        data['filters_applied'] = {
+            'start_date': start_date_param,
+            'end_date': end_date_param,
+        }
+        return JsonResponse(data)
+
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+def menu_engineering_api(request):
+    """
+    API endpoint ranking meals by popularity against contribution margin
+    (stars, plowhorses, puzzles, dogs) using the sales export and the
+    precomputed meal costs
+
+    Query parameters:
+    - start_date: YYYY-MM-DD (optional)
+    - end_date: YYYY-MM-DD (optional)
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        from apps.orders.analytics.metrics import menu_engineering
+
+        start_date_param = request.GET.get('start_date')
+        end_date_param = request.GET.get('end_date')
+
+        try:
+            start_date = datetime.strptime(
+                start_date_param, '%Y-%m-%d').date() if start_date_param else None
+            end_date = datetime.strptime(
+                end_date_param, '%Y-%m-%d').date() if end_date_param else None
+        except ValueError:
+            return JsonResponse({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
+
+        data = menu_engineering(start_date, end_date)
+        data['filters_applied'] = {
+            'start_date': start_date_param,
+            'end_date': end_date_param,
+        }
+        return JsonResponse(data)
+
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+def waitress_performance_api(request):
+    """
+    API endpoint with per-waitress revenue, order count, covers, average
+    ticket, items per order, voids/returns and average table duration
+
+    Query parameters:
+    - start_date: ISO format datetime or date string (e.g., '2025-09-10T00:00:00')
+    - end_date: ISO format datetime or date string (e.g., '2025-09-10T23:59:59')
+
+    A date without a time covers the whole day.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        start_date_param = request.GET.get('start_date')
+        end_date_param = request.GET.get('end_date')
+        if not start_date_param or not end_date_param:
+            return JsonResponse({'error': 'Both start_date and end_date are required'}, status=400)
+
+        try:
+            start_datetime = parse_datetime(start_date_param)
+            if start_datetime is None:
+                start_datetime = datetime.combine(
+                    datetime.fromisoformat(start_date_param).date(), datetime.min.time())
+            end_datetime = parse_datetime(end_date_param)
+            if end_datetime is None:
+                end_datetime = datetime.combine(
+                    datetime.fromisoformat(end_date_param).date(), datetime.max.time())
+        except (ValueError, TypeError):
+            return JsonResponse({'error': 'Invalid date format. Use ISO format: YYYY-MM-DDTHH:MM:SS'}, status=400)
+
+        if timezone.is_naive(start_datetime):
+            start_datetime = timezone.make_aware(start_datetime)
+        if timezone.is_naive(end_datetime):
+            end_datetime = timezone.make_aware(end_datetime)
+
+        rows = Statistics.objects.waitress_performance(
+            start_datetime, end_datetime)
+
+        waitresses = []
+        for row in rows:
+            waitresses.append({
+                'waitress_id': row['waitress_id'],
+                'waitress': row['waitress'],
+                'revenue': float(row['revenue']),
+                'orders': row['orders'],
+                'covers': row['covers'],
+                'average_ticket': float(row['average_ticket']),
+                'items_per_order': float(row['items_per_order']),
+                'average_table_minutes': row['average_table_minutes'],
+                'voids': {
+                    'qty': float(row['voids']['qty']),
+                    'total': float(row['voids']['total']),
+                },
+                'returns': {
+                    'qty': float(row['returns']['qty']),
+                    'total': float(row['returns']['total']),
+                },
+            })
+
+        return JsonResponse({
+            'start_date': start_datetime.isoformat(),
+            'end_date': end_datetime.isoformat(),
+            'waitresses': waitresses,
+        })
+
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
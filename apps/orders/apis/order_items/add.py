@@ -1,5 +1,6 @@
 from drf_yasg.utils import swagger_auto_schema
 
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 
@@ -8,12 +9,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.inventory_connector.stock import available_portions
 from apps.meals.models import Meal
 from apps.orders.models import OrderItem
 from apps.orders.models.order import Order
 from apps.orders.serializers import OrderItemSerializer
 from apps.tables.models import Table
 from apps.users.permissions import AtMostAdmin
+from apps.users.principal import get_principal
 
 
 class AddOrderItemAPIView(APIView):
@@ -60,6 +63,12 @@ class AddOrderItemAPIView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+        if settings.INVENTORY_REJECT_SOLD_OUT and available_portions(meal.id) == 0:
+            return Response(
+                {'error': 'Meal is out of stock'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         try:
             with transaction.atomic():
                 order_item = self.create_order_item(
@@ -98,10 +107,7 @@ class AddOrderItemAPIView(APIView):
             else table.orders.exclude(is_deleted=True).filter(is_paid=False, is_main=True).first()
         )
 
-        if order and (
-            request.user.type in ["admin", "captain_waitress", "restaurant"]
-            or order.waitress == request.user
-        ):
+        if order and get_principal(request).can_manage(order):
             return order
 
         return None
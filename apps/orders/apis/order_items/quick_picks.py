@@ -0,0 +1,80 @@
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.meals.snapshot import get_snapshot
+from apps.orders.analytics.popularity import ordered_together, top_sellers
+from apps.users.permissions import AtMostAdmin
+
+
+class QuickPicksAPIView(APIView):
+    """
+    Top sellers of the room at this hour and meals frequently ordered
+    together with the ones already on the order. Served from precomputed
+    tables (see compute_meal_popularity); no order history is scanned.
+    """
+    permission_classes = [IsAuthenticated, AtMostAdmin]
+
+    room_id_param = openapi.Parameter(
+        'room_id', openapi.IN_QUERY,
+        description="Room of the table (whole restaurant when omitted)",
+        type=openapi.TYPE_INTEGER
+    )
+    hour_param = openapi.Parameter(
+        'hour', openapi.IN_QUERY,
+        description="Hour of day 0-23 (current hour when omitted)",
+        type=openapi.TYPE_INTEGER
+    )
+    meal_ids_param = openapi.Parameter(
+        'meal_ids', openapi.IN_QUERY,
+        description="Comma separated meal IDs already on the order",
+        type=openapi.TYPE_STRING
+    )
+    limit_param = openapi.Parameter(
+        'limit', openapi.IN_QUERY,
+        description="Maximum meals per list (default 10)",
+        type=openapi.TYPE_INTEGER
+    )
+
+    @swagger_auto_schema(manual_parameters=[room_id_param, hour_param, meal_ids_param, limit_param])
+    def get(self, request, *args, **kwargs):
+        try:
+            room_id = request.GET.get("room_id")
+            room_id = int(room_id) if room_id else None
+            hour = request.GET.get("hour")
+            hour = int(hour) if hour else timezone.localtime().hour
+            meal_ids = [
+                int(meal_id) for meal_id in request.GET.get("meal_ids", "").split(",")
+                if meal_id.strip()
+            ]
+            limit = min(max(int(request.GET.get("limit", 10)), 1), 50)
+        except ValueError:
+            return Response(
+                {"error": "room_id, hour, meal_ids and limit must be integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 <= hour <= 23:
+            return Response(
+                {"error": "hour must be between 0 and 23"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        meals = get_snapshot().meals_by_id
+
+        def rows(pairs, field):
+            # Meals removed from the menu since the last computation are skipped
+            return [
+                dict(meals[meal_id], **{field: value})
+                for meal_id, value in pairs if meal_id in meals
+            ]
+
+        return Response({
+            "hour": hour,
+            "room_id": room_id,
+            "top_sellers": rows(top_sellers(hour, room_id, limit), "quantity"),
+            "ordered_together": rows(ordered_together(meal_ids, limit), "score"),
+        })
@@ -2,7 +2,7 @@
 
 from decimal import Decimal
 from django.db.models import Sum
-from django.db import models
+from django.db import models, transaction
 
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
@@ -58,8 +58,10 @@ class DeleteOrderItemAPIView(APIView):
             error_response = self._validate_reason(reason)
             if error_response:
                 return error_response
-            self._handle_confirmed(
-                order, order_item, reason, comment, request.user)
+            # Returned ingredients are written with one bulk insert
+            with transaction.atomic(), OrderItemInventoryManager.batch():
+                self._handle_confirmed(
+                    order, order_item, reason, comment, request.user)
         else:
             self._handle_unconfirmed(order_item)
 
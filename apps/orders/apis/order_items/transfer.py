@@ -5,6 +5,7 @@ from rest_framework import status, serializers
 from rest_framework.response import Response
 from django.db import transaction
 
+from apps.inventory_connector.signals import OrderItemInventoryManager
 from apps.orders.models import OrderItem, Order
 from apps.orders.serializers import OrderItemSerializer
 from apps.tables.models import Table
@@ -96,7 +97,7 @@ class TransferOrderItemsAPIView(APIView):
 
         # 5. Transfer in a transaction
         try:
-            with transaction.atomic():
+            with transaction.atomic(), OrderItemInventoryManager.batch():
                 transferred = self._bulk_transfer(
                     items_qs,
                     tgt_order,
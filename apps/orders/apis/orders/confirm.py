@@ -8,6 +8,7 @@ from rest_framework.permissions import IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from apps.inventory_connector.signals import OrderItemInventoryManager
 from apps.tables.models import Table
 from apps.printers.utils.service_v2 import PrinterService
 from apps.users.permissions import AtMostAdmin
@@ -128,7 +129,8 @@ class ConfirmOrderItemsToWorkerPrintersAPIView(APIView):
         return groups
 
     def confirm_order_items(self, printer_groups):
-        with transaction.atomic():
+        # Inventory for all confirmed items is deducted with one bulk insert
+        with transaction.atomic(), OrderItemInventoryManager.batch():
             for items in printer_groups.values():
                 for item in items:
                     item.confirmed = True
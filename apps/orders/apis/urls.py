@@ -1,7 +1,10 @@
 from django.urls import path
 
 # Import your new API view
-from apps.orders.api_views import active_orders_api, daily_report_api, period_report_api
+from apps.orders.api_views import (active_orders_api, daily_report_api,
+                                   menu_engineering_api, period_report_api,
+                                   sales_analytics_api,
+                                   waitress_performance_api)
 from apps.orders.apis import (AddOrderItemAPIView, ChangeTableOrderAPIView,
                               ChangeWaitressAPIView, CheckOrderAPIView,
                               CloseTableOrderAPIView, CreateOrderAPIView,
@@ -9,9 +12,11 @@ from apps.orders.apis import (AddOrderItemAPIView, ChangeTableOrderAPIView,
                               ListOrderItemsAPIView, ListTableOrdersAPIView,
                               ListWaitressAPIView)
 from apps.orders.apis.order_items.comment import AddCommentToOrderItemAPIView
+from apps.orders.apis.order_items.quick_picks import QuickPicksAPIView
 from apps.orders.apis.order_items.transfer import TransferOrderItemsAPIView
 from apps.orders.apis.orders.confirm import \
     ConfirmOrderItemsToWorkerPrintersAPIView
+from apps.orders.telegram_bot.api_view import bot_status, webhook
 from apps.printers.apis import PrintCheckAPIView
 
 urlpatterns = [
@@ -34,6 +39,42 @@ urlpatterns = [
         name='period-report'
     ),
 
+    path(
+        'sales-analytics/',
+        sales_analytics_api,
+        name='sales-analytics'
+    ),
+
+    path(
+        'menu-engineering/',
+        menu_engineering_api,
+        name='menu-engineering'
+    ),
+
+    path(
+        'waitress-performance/',
+        waitress_performance_api,
+        name='waitress-performance'
+    ),
+
+    path(
+        'telegram/webhook/',
+        webhook,
+        name='telegram-webhook'
+    ),
+
+    path(
+        'telegram/status/',
+        bot_status,
+        name='telegram-status'
+    ),
+
+    path(
+        'quick-picks/',
+        QuickPicksAPIView.as_view(),
+        name='quick-picks'
+    ),
+
     path(
         '<int:table_id>/check-status/',
         CheckOrderAPIView.as_view(),
@@ -1,7 +1,27 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.orders'
     verbose_name = "Sifariş"
+
+    def ready(self):
+        # Move the report cache versions when reported data changes
+        from apps.orders.analytics import report_cache
+        receivers = (
+            ('orders.WorkPeriodConfig', report_cache.config_changed),
+            ('orders.Order', report_cache.order_changed),
+            ('payments.Payment', report_cache.payment_changed),
+            ('payments.PaymentMethod', report_cache.payment_method_changed),
+        )
+        for sender, receiver in receivers:
+            post_save.connect(
+                receiver, sender=sender,
+                dispatch_uid=f"report_cache_save_{sender}"
+            )
+            post_delete.connect(
+                receiver, sender=sender,
+                dispatch_uid=f"report_cache_delete_{sender}"
+            )
@@ -0,0 +1,99 @@
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from apps.orders.analytics.metrics import compute_metrics
+
+
+def synthetic_year(orders_per_day=400, items_per_order=4, tables=40,
+                   waitresses=12, meals=300, seed=42):
+    """
+    Build DataFrames shaped like the analytics export for one year of
+    service, without touching the database.
+    """
+    rng = np.random.default_rng(seed)
+    n_orders = orders_per_day * 365
+
+    start = pd.Timestamp("2025-01-01 12:00", tz="UTC").value
+    day_ns = 24 * 3600 * 10 ** 9
+    created = start + rng.integers(0, 365 * day_ns, n_orders)
+    created_at = pd.to_datetime(np.sort(created), utc=True)
+
+    order_ids = np.arange(1, n_orders + 1)
+    orders = pd.DataFrame({
+        "id": order_ids,
+        "table_id": rng.integers(1, tables + 1, n_orders),
+        "waitress_id": rng.integers(1, waitresses + 1, n_orders),
+        "customer_count": rng.integers(1, 7, n_orders),
+        "total_price": np.round(rng.gamma(3.0, 15.0, n_orders), 2),
+        "is_paid": rng.random(n_orders) < 0.97,
+        "created_at": created_at,
+    })
+
+    n_items = n_orders * items_per_order
+    items = pd.DataFrame({
+        "order_id": rng.integers(1, n_orders + 1, n_items),
+        "meal_id": rng.zipf(1.3, n_items) % meals + 1,
+        "quantity": np.ones(n_items, dtype=np.int64),
+    })
+
+    paid_ids = order_ids[orders["is_paid"].to_numpy()]
+    minutes = rng.gamma(4.0, 15.0, len(paid_ids))
+    payments = pd.DataFrame({
+        "id": paid_ids,
+        "paid_at": created_at[orders["is_paid"].to_numpy()]
+        + pd.to_timedelta(minutes, unit="m"),
+    })
+    payment_orders = pd.DataFrame({
+        "payment_id": paid_ids,
+        "order_id": paid_ids,
+    })
+
+    return {
+        "orders": orders,
+        "order_items": items,
+        "payments": payments,
+        "payment_orders": payment_orders,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the vectorized sales analytics on a synthetic year of orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders-per-day',
+            type=int,
+            default=400,
+            help='Number of synthetic orders per day',
+        )
+        parser.add_argument(
+            '--items-per-order',
+            type=int,
+            default=4,
+            help='Average number of order items per order',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        frames = synthetic_year(
+            orders_per_day=options['orders_per_day'],
+            items_per_order=options['items_per_order'],
+        )
+        generated = time.perf_counter()
+
+        metrics = compute_metrics(frames, tz='Asia/Baku')
+        finished = time.perf_counter()
+
+        self.stdout.write(
+            f"Orders: {len(frames['orders'])}, "
+            f"items: {len(frames['order_items'])}, "
+            f"payments: {len(frames['payments'])}"
+        )
+        self.stdout.write(f'Data generation: {generated - started:.2f} s')
+        self.stdout.write(self.style.SUCCESS(
+            f'Metrics computed in {finished - generated:.2f} s '
+            f"(average check {metrics['summary']['average_check']} AZN)"
+        ))
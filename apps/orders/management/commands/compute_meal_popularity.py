@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from apps.orders.analytics.popularity import (PAIRS_PER_MEAL, TOP_PER_SLOT,
+                                              WINDOW_DAYS, compute_popularity)
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute top sellers per room and hour and frequently ordered '
+        'together meals from the order history (run periodically, e.g. nightly)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=WINDOW_DAYS,
+            help='Days of order history to use',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=TOP_PER_SLOT,
+            help='Meals kept per room and hour',
+        )
+        parser.add_argument(
+            '--pairs',
+            type=int,
+            default=PAIRS_PER_MEAL,
+            help='Ordered-together meals kept per meal',
+        )
+
+    def handle(self, *args, **options):
+        popularity, pairings = compute_popularity(
+            days=options['days'],
+            top=options['top'],
+            pairs_per_meal=options['pairs'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {popularity} top seller rows and {pairings} pairings'
+        ))
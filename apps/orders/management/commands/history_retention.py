@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.orders.retention import TRACKED_MODELS, HistoryRetention, RetentionError
+
+
+class Command(BaseCommand):
+    help = (
+        'Apply the retention policy to the Order, OrderItem and Statistics '
+        'history: compact no-op records, archive old months into compressed '
+        'files and, on PostgreSQL, partition the tables by month'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=settings.HISTORY_RETENTION_MONTHS,
+            help='Whole months of history kept in the database '
+                 '(defaults to settings.HISTORY_RETENTION_MONTHS)',
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Archive directory (defaults to settings.HISTORY_ARCHIVE_DIR)',
+        )
+        parser.add_argument(
+            '--no-compact',
+            action='store_true',
+            help='Keep the records that change nothing',
+        )
+        parser.add_argument(
+            '--no-archive',
+            action='store_true',
+            help='Keep the old months in the database',
+        )
+        parser.add_argument(
+            '--partition',
+            action='store_true',
+            help='Partition the history tables by month (PostgreSQL only)',
+        )
+        parser.add_argument(
+            '--partitions-ahead',
+            type=int,
+            default=3,
+            help='Months of partitions created in advance',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Number of rows read or deleted per query',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be done',
+        )
+
+    def handle(self, *args, **options):
+        if options['months'] < 1:
+            raise CommandError('--months must be at least 1')
+
+        retention = HistoryRetention(
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+            archive_dir=options.get('output'),
+        )
+        prefix = '[dry run] ' if options['dry_run'] else ''
+
+        for model in TRACKED_MODELS:
+            table = model.history.model._meta.db_table
+            try:
+                if options['partition']:
+                    created = retention.partition(model, ahead=options['partitions_ahead'])
+                    self.stdout.write(f'{prefix}{table}: {len(created)} partition(s) created')
+                if not options['no_compact']:
+                    removed = retention.compact(model)
+                    self.stdout.write(f'{prefix}{table}: {removed} no-op record(s) removed')
+                if not options['no_archive']:
+                    archived = retention.archive(model, options['months'])
+                    for month, count in archived.items():
+                        self.stdout.write(f'{prefix}{table}: {month} archived ({count} record(s))')
+            except RetentionError as e:
+                raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}History retention finished ({retention.archive_dir})'
+        ))
@@ -1,3 +1,4 @@
+import asyncio
 import sys
 
 from django.conf import settings
@@ -5,6 +6,8 @@ from django.core.management.base import BaseCommand
 
 from apps.orders.telegram_bot.bot import RestaurantBot
 
+NO_SECRET = 'Set TELEGRAM_WEBHOOK_SECRET: webhook requests without it are refused'
+
 
 class Command(BaseCommand):
     help = 'Run the Telegram bot for restaurant orders'
@@ -15,6 +18,18 @@ class Command(BaseCommand):
             type=str,
             help='Telegram bot token (overrides settings)',
         )
+        parser.add_argument(
+            '--set-webhook',
+            action='store_true',
+            help='Register TELEGRAM_WEBHOOK_URL with Telegram and exit '
+                 '(updates are then served by the Django app; keep this '
+                 'command running without the flag for the scheduled pushes)',
+        )
+        parser.add_argument(
+            '--delete-webhook',
+            action='store_true',
+            help='Remove the webhook and exit (back to polling)',
+        )
 
     def handle(self, *args, **options):
         # Get token from command line or settings
@@ -29,13 +44,29 @@ class Command(BaseCommand):
             )
             return
 
+        if options['set_webhook'] or options['delete_webhook']:
+            self.configure_webhook(token, options['set_webhook'])
+            return
+
+        webhook_mode = bool(getattr(settings, 'TELEGRAM_WEBHOOK_URL', ''))
+        if webhook_mode and not getattr(settings, 'TELEGRAM_WEBHOOK_SECRET', ''):
+            self.stdout.write(self.style.ERROR(NO_SECRET))
+            return
+
         self.stdout.write(self.style.SUCCESS('Starting Restaurant Telegram Bot...'))
         self.stdout.write(f'Base URL: {getattr(settings, "BASE_URL", "http://127.0.0.1:8000")}')
         
         try:
             # Create and run the bot
             bot = RestaurantBot(token)
-            
+
+            if webhook_mode:
+                # The Django app receives the updates; this process is the
+                # only one sending the scheduled pushes
+                self.stdout.write('Webhook mode: sending scheduled pushes only')
+                bot.run_pushes()
+                return
+
             # Run the bot synchronously (no asyncio.run needed)
             bot.run()
             
@@ -44,4 +75,27 @@ class Command(BaseCommand):
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'Error running bot: {e}'))
             import traceback
-            self.stdout.write(traceback.format_exc())
\ No newline at end of file
+            self.stdout.write(traceback.format_exc())
+
+    def configure_webhook(self, token, enable):
+        from telegram import Bot, Update
+
+        async def configure():
+            async with Bot(token) as bot:
+                if not enable:
+                    return await bot.delete_webhook()
+                return await bot.set_webhook(
+                    url=settings.TELEGRAM_WEBHOOK_URL,
+                    secret_token=settings.TELEGRAM_WEBHOOK_SECRET,
+                    allowed_updates=Update.ALL_TYPES,
+                )
+
+        if enable and not settings.TELEGRAM_WEBHOOK_URL:
+            self.stdout.write(self.style.ERROR('Set TELEGRAM_WEBHOOK_URL first'))
+            return
+        if enable and not settings.TELEGRAM_WEBHOOK_SECRET:
+            self.stdout.write(self.style.ERROR(NO_SECRET))
+            return
+        asyncio.run(configure())
+        self.stdout.write(self.style.SUCCESS(
+            f"Webhook set to {settings.TELEGRAM_WEBHOOK_URL}" if enable else 'Webhook removed'))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0011_alter_meal_updated_at_alter_mealcategory_updated_at_and_more'),
+        ('orders', '0047_workperiodconfig_alter_historicalstatistics_options_and_more'),
+        ('tables', '0010_alter_room_updated_at_alter_table_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['waitress', 'created_at'], name='orders_orde_waitres_03f0ee_idx'),
+        ),
+    ]
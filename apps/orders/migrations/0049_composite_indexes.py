@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0011_alter_meal_updated_at_alter_mealcategory_updated_at_and_more'),
+        ('orders', '0048_order_waitress_created_at_index'),
+        ('tables', '0010_alter_room_updated_at_alter_table_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['table', 'is_deleted', 'is_paid', 'is_main'], name='order_table_state_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_paid', False)), fields=['table', 'is_main'], name='order_open_table_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('is_paid', True)), fields=['created_at'], name='order_paid_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(condition=models.Q(('confirmed', False)), fields=['order'], name='orderitem_unconfirmed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['order', 'meal', 'confirmed'], name='orderitem_order_meal_conf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='statistics',
+            index=models.Index(fields=['title', 'started_by', 'is_closed', 'is_z_checked'], name='statistics_shift_state_idx'),
+        ),
+    ]
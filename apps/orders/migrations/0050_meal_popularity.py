@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0011_alter_meal_updated_at_alter_mealcategory_updated_at_and_more'),
+        ('orders', '0049_composite_indexes'),
+        ('tables', '0010_alter_room_updated_at_alter_table_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MealPairing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orders', models.PositiveIntegerField(verbose_name='Birgə sifariş sayı')),
+                ('confidence', models.FloatField(help_text='Yeməyin olduğu sifarişlərin neçə faizində cüt yemək də var (0-1)', verbose_name='Etibar')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Sıra')),
+                ('meal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pairings', to='meals.meal', verbose_name='Yemək')),
+                ('paired_meal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='meals.meal', verbose_name='Birlikdə sifariş olunan yemək')),
+            ],
+            options={
+                'verbose_name': 'Birlikdə sifariş olunan yemək',
+                'verbose_name_plural': 'Birlikdə sifariş olunan yeməklər',
+                'ordering': ['meal', 'rank'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MealPopularity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.PositiveSmallIntegerField(verbose_name='Saat')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Satış miqdarı')),
+                ('orders', models.PositiveIntegerField(verbose_name='Sifariş sayı')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Sıra')),
+                ('meal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='popularity', to='meals.meal', verbose_name='Yemək')),
+                ('room', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='meal_popularity', to='tables.room', verbose_name='Zal')),
+            ],
+            options={
+                'verbose_name': 'Yemək populyarlığı',
+                'verbose_name_plural': 'Yemək populyarlığı',
+                'ordering': ['room', 'hour', 'rank'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0050_meal_popularity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BotSubscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.BigIntegerField(unique=True, verbose_name='Söhbət ID')),
+                ('title', models.CharField(blank=True, max_length=255, verbose_name='Ad')),
+                ('daily_summary', models.BooleanField(default=True, verbose_name='Gün sonu yekunu')),
+                ('hourly_snapshot', models.BooleanField(default=True, verbose_name='Saatlıq vəziyyət')),
+                ('alerts', models.BooleanField(default=True, verbose_name='Xəbərdarlıqlar')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaradılma tarixi')),
+            ],
+            options={
+                'verbose_name': 'Bot abunəsi',
+                'verbose_name_plural': 'Bot abunələri',
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0011_alter_meal_updated_at_alter_mealcategory_updated_at_and_more'),
+        ('orders', '0051_bot_subscription'),
+        ('tables', '0010_alter_room_updated_at_alter_table_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_open_table_idx',
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_paid', False)), fields=['table', 'id'], name='order_open_table_idx'),
+        ),
+    ]
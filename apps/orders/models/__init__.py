@@ -4,3 +4,5 @@ from apps.orders.models.statistics import Statistics
 from apps.orders.models.order_deletion import OrderItemDeletionLog
 from apps.orders.models.summary import Summary
 from apps.orders.models.report import WorkPeriodConfig, Report
+from apps.orders.models.popularity import MealPopularity, MealPairing
+from apps.orders.models.bot_subscription import BotSubscription
@@ -0,0 +1,21 @@
+from django.db import models
+
+
+class BotSubscription(models.Model):
+    """
+    Telegram söhbəti üçün avtomatik göndərilən hesabatlar: gün sonu
+    yekunu, xidmət zamanı saatlıq vəziyyət və xəbərdarlıqlar.
+    """
+    chat_id = models.BigIntegerField(unique=True, verbose_name="Söhbət ID")
+    title = models.CharField(max_length=255, blank=True, verbose_name="Ad")
+    daily_summary = models.BooleanField(default=True, verbose_name="Gün sonu yekunu")
+    hourly_snapshot = models.BooleanField(default=True, verbose_name="Saatlıq vəziyyət")
+    alerts = models.BooleanField(default=True, verbose_name="Xəbərdarlıqlar")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaradılma tarixi")
+
+    class Meta:
+        verbose_name = "Bot abunəsi"
+        verbose_name_plural = "Bot abunələri"
+
+    def __str__(self):
+        return self.title or str(self.chat_id)
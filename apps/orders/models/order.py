@@ -74,6 +74,27 @@ class Order(DateTimeModel, models.Model):
     class Meta:
         verbose_name = "Sifariş"
         verbose_name_plural = "Sifarişlər 🍽️"
+        indexes = [
+            models.Index(fields=["waitress", "created_at"]),
+            # Table floor / add-item / confirm: orders of a table by state
+            models.Index(
+                fields=["table", "is_deleted", "is_paid", "is_main"],
+                name="order_table_state_idx",
+            ),
+            # Open orders of a table only (the hot subset of the table), in
+            # id order for `.first()`
+            models.Index(
+                fields=["table", "id"],
+                condition=models.Q(is_deleted=False, is_paid=False),
+                name="order_open_table_idx",
+            ),
+            # Reports: paid orders in a period
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(is_paid=True),
+                name="order_paid_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Order {self.id} for {self.table}"
@@ -145,9 +166,41 @@ class OrderItem(DateTimeModel, models.Model):
     history = HistoricalRecords()
     objects = OrderItemManager()
 
+    # Loaded values of these fields are kept on the instance so changes
+    # can be detected on save without re-reading the row.
+    TRACKED_FIELDS = ('confirmed', 'quantity')
+
     class Meta:
         verbose_name = "Sifariş məhsulu"
         verbose_name_plural = "Sifariş məhsulları 🥘"
+        indexes = [
+            # Confirm: unconfirmed items of an order
+            models.Index(
+                fields=["order"],
+                condition=models.Q(confirmed=False),
+                name="orderitem_unconfirmed_idx",
+            ),
+            models.Index(
+                fields=["order", "meal", "confirmed"],
+                name="orderitem_order_meal_conf_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if name in cls.TRACKED_FIELDS and value is not models.DEFERRED
+        }
+        return instance
+
+    def snapshot_tracked_fields(self):
+        """Mark the current values of TRACKED_FIELDS as the stored ones."""
+        self._loaded_values = {
+            name: getattr(self, name) for name in self.TRACKED_FIELDS
+        }
 
     def __str__(self):
         try:
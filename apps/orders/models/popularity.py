@@ -0,0 +1,70 @@
+from django.db import models
+
+from apps.meals.models import Meal
+from apps.tables.models import Room
+
+
+class MealPopularity(models.Model):
+    """
+    Saat və zal üzrə ən çox satılan yeməklər. `compute_meal_popularity`
+    əmri ilə sifariş tarixçəsindən hesablanır; zal boş olduqda bütün
+    restoran üzrə göstəricidir.
+    """
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="meal_popularity",
+        verbose_name="Zal"
+    )
+    hour = models.PositiveSmallIntegerField(verbose_name="Saat")
+    meal = models.ForeignKey(
+        Meal,
+        on_delete=models.CASCADE,
+        related_name="popularity",
+        verbose_name="Yemək"
+    )
+    quantity = models.PositiveIntegerField(verbose_name="Satış miqdarı")
+    orders = models.PositiveIntegerField(verbose_name="Sifariş sayı")
+    rank = models.PositiveSmallIntegerField(verbose_name="Sıra")
+
+    class Meta:
+        verbose_name = "Yemək populyarlığı"
+        verbose_name_plural = "Yemək populyarlığı"
+        ordering = ["room", "hour", "rank"]
+
+    def __str__(self):
+        return f"{self.room or 'Bütün zallar'} {self.hour}:00 - {self.meal.name}"
+
+
+class MealPairing(models.Model):
+    """
+    Eyni sifarişdə birlikdə sifariş olunan yemək cütləri.
+    """
+    meal = models.ForeignKey(
+        Meal,
+        on_delete=models.CASCADE,
+        related_name="pairings",
+        verbose_name="Yemək"
+    )
+    paired_meal = models.ForeignKey(
+        Meal,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Birlikdə sifariş olunan yemək"
+    )
+    orders = models.PositiveIntegerField(verbose_name="Birgə sifariş sayı")
+    confidence = models.FloatField(
+        help_text="Yeməyin olduğu sifarişlərin neçə faizində cüt yemək də var (0-1)",
+        verbose_name="Etibar"
+    )
+    rank = models.PositiveSmallIntegerField(verbose_name="Sıra")
+
+    class Meta:
+        verbose_name = "Birlikdə sifariş olunan yemək"
+        verbose_name_plural = "Birlikdə sifariş olunan yeməklər"
+        ordering = ["meal", "rank"]
+
+    def __str__(self):
+        return f"{self.meal.name} + {self.paired_meal.name}"
@@ -1,12 +1,15 @@
 import logging
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.db.models import Sum
 from decimal import Decimal
 from collections import Counter
-from django.db.models import Sum, Count, Q
+from django.db.models import (Avg, Count, DurationField, ExpressionWrapper,
+                              F, Max, Min, OuterRef, Q, Subquery, Sum)
+from django.db.models.functions import Coalesce
 
 from simple_history.models import HistoricalRecords
 
@@ -22,21 +25,34 @@ class StatisticsManager(models.Manager):
     def calculate_per_waitress(self, date=None):
         if not date:
             date = timezone.localdate() - timezone.timedelta(days=1)
-        waitresses_orders = Order.objects.filter(
-            created_at__date=date,
-            is_paid=True,
-            waitress__isnull=False
-        ).values(
-            'waitress', 'waitress__username', 'waitress__first_name', 'waitress__last_name'
-        ).annotate(total_price=Sum('total_price'))
-        for order in waitresses_orders:
-            waitress_info = f"{order['waitress__username']} - {order['waitress__first_name']} {order['waitress__last_name']}"
-            self.update_or_create(
-                title='per_waitress',
-                date=date,
-                waitress_info=waitress_info,
-                defaults={'total': order['total_price']}
-            )
+        start_of_day = timezone.make_aware(
+            timezone.datetime.combine(date, timezone.datetime.min.time()))
+        end_of_day = timezone.make_aware(
+            timezone.datetime.combine(date, timezone.datetime.max.time()))
+
+        existing = {
+            stat.waitress_info: stat
+            for stat in self.filter(title='per_waitress', date=date)
+        }
+        to_update, to_create = [], []
+        for row in self.waitress_performance(start_of_day, end_of_day):
+            if row['waitress_id'] is None or not row['orders']:
+                continue
+            # Same format as before, so re-runs update the existing rows
+            waitress_info = f"{row['username']} - {row['first_name']} {row['last_name']}"
+            stat = existing.get(waitress_info)
+            if stat:
+                stat.total = row['revenue']
+                to_update.append(stat)
+            else:
+                to_create.append(self.model(
+                    title='per_waitress',
+                    date=date,
+                    waitress_info=waitress_info,
+                    total=row['revenue']
+                ))
+        self.bulk_update(to_update, ['total'])
+        self.bulk_create(to_create)
 
     def calculate_daily(self, date=None):
         if not date:
@@ -288,6 +304,257 @@ class StatisticsManager(models.Manager):
 
         return stat
 
+    def waitress_performance(self, start, end, orders=None):
+        """
+        Per-waitress revenue, orders, covers, average ticket, items per
+        order, voids/returns and average table duration for a period.
+
+        Paid orders of the period (or the given `orders` queryset) are
+        rolled up in one grouped query, with item counts and payment
+        times pulled in as correlated subqueries. Deleted items are
+        grouped in a second query and matched to the waitress of their
+        order; logs whose order is gone fall back to `waitress_name`.
+        Rows are keyed by waitress id, so waitresses with the same (or no)
+        name stay apart.
+        """
+        from apps.orders.models.order import OrderItem
+        from apps.orders.models.order_deletion import OrderItemDeletionLog
+
+        if orders is None:
+            orders = Order.objects.all_orders().filter(
+                created_at__range=(start, end),
+                is_paid=True
+            )
+
+        item_count = (
+            OrderItem.objects.all_order_items()
+            .filter(order=OuterRef('pk'))
+            .values('order')
+            .annotate(qty=Sum('quantity'))
+            .values('qty')
+        )
+        settled_at = (
+            Payment.objects.filter(orders=OuterRef('pk'))
+            .order_by('paid_at')
+            .values('paid_at')[:1]
+        )
+        rows = (
+            orders.filter(waitress__isnull=False)
+            .annotate(
+                item_count=Coalesce(Subquery(item_count), 0),
+                settled_at=Subquery(settled_at),
+            )
+            .values(
+                'waitress', 'waitress__username',
+                'waitress__first_name', 'waitress__last_name'
+            )
+            .annotate(
+                revenue=Sum('total_price'),
+                order_count=Count('id'),
+                covers=Sum('customer_count'),
+                items=Sum('item_count'),
+                duration=Avg(ExpressionWrapper(
+                    F('settled_at') - F('created_at'),
+                    output_field=DurationField()
+                )),
+            )
+            .order_by('-revenue')
+        )
+
+        order_waitress = (
+            Order.objects.all_orders()
+            .filter(pk=OuterRef('order_id'))
+            .values('waitress_id')[:1]
+        )
+        deletions = (
+            OrderItemDeletionLog.objects
+            .filter(deleted_at__range=(start, end))
+            .annotate(waitress_id=Subquery(order_waitress))
+            .values('waitress_id', 'waitress_name', 'reason')
+            .annotate(
+                qty=Sum('quantity'),
+                total=Sum(F('quantity') * F('price'))
+            )
+        )
+
+        deletion_keys = {
+            OrderItemDeletionLog.REASON_WASTE: "voids",
+            OrderItemDeletionLog.REASON_RETURN: "returns",
+        }
+
+        def row_for(name, **values):
+            row = {
+                "waitress_id": None,
+                "username": None,
+                "first_name": "",
+                "last_name": "",
+                "waitress": name,
+                "revenue": Decimal('0.00'),
+                "orders": 0,
+                "covers": 0,
+                "average_ticket": Decimal('0.00'),
+                "items_per_order": 0,
+                "average_table_minutes": None,
+                "voids": {"qty": 0, "total": Decimal('0.00')},
+                "returns": {"qty": 0, "total": Decimal('0.00')},
+            }
+            row.update(values)
+            return row
+
+        result = {}
+        for row in rows:
+            name = f"{row['waitress__first_name']} {row['waitress__last_name']}".strip()
+            order_count = row['order_count']
+            revenue = row['revenue'] or Decimal('0.00')
+            duration = row['duration']
+            result[row['waitress']] = row_for(
+                name,
+                waitress_id=row['waitress'],
+                username=row['waitress__username'],
+                first_name=row['waitress__first_name'],
+                last_name=row['waitress__last_name'],
+                revenue=revenue,
+                orders=order_count,
+                covers=row['covers'] or 0,
+                average_ticket=round(revenue / order_count, 2),
+                items_per_order=round((row['items'] or 0) / order_count, 2),
+                average_table_minutes=(
+                    round(duration.total_seconds() / 60, 1)
+                    if duration is not None else None
+                ),
+            )
+
+        for row in deletions:
+            key = deletion_keys.get(row['reason'])
+            if key is None:
+                continue
+            name = row['waitress_name'] or ""
+            waitress_id = row['waitress_id']
+            row_key = waitress_id if waitress_id is not None else ("name", name)
+            if row_key not in result:
+                result[row_key] = row_for(name, waitress_id=waitress_id)
+            entry = result[row_key][key]
+            entry["qty"] += row['qty'] or 0
+            entry["total"] += row['total'] or Decimal('0.00')
+
+        return list(result.values())
+
+    def sold_items_summary(self, stat):
+        """
+        Sold items of a shift grouped by meal group and meal, plus the
+        deleted items of the same period grouped by reason and meal.
+
+        Both breakdowns are computed with grouped queries. Closed shifts
+        no longer change, so their summary is cached without expiry.
+        """
+        from apps.orders.models.order import OrderItem
+        from apps.orders.models.order_deletion import OrderItemDeletionLog
+
+        cache_key = f"orders:sold_items_summary:{stat.pk}"
+        if stat.is_closed:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        orders = Order.objects.all_orders().filter(statistics=stat)
+        order_dates = orders.aggregate(
+            oldest_order=Min('created_at'),
+            latest_order=Max('created_at')
+        )
+
+        rows = (
+            OrderItem.objects.all_order_items()
+            .filter(order__statistics=stat)
+            .values('meal__category__group__name', 'meal__name')
+            .annotate(qty=Sum('quantity'), total=Sum('price'))
+            .order_by('meal__category__group__name', 'meal__name')
+        )
+
+        groups = {}
+        for row in rows:
+            group_name = row['meal__category__group__name'] or "Digər"
+            group = groups.setdefault(group_name, {
+                "name": group_name,
+                "meals": {},
+                "qty": 0,
+                "total": Decimal("0.00"),
+            })
+            meal = group["meals"].setdefault(row['meal__name'], {
+                "name": row['meal__name'],
+                "qty": 0,
+                "total": Decimal("0.00"),
+            })
+            qty = row['qty'] or 0
+            total = row['total'] or Decimal("0.00")
+            meal["qty"] += qty
+            meal["total"] += total
+            group["qty"] += qty
+            group["total"] += total
+
+        for group in groups.values():
+            group["meals"] = list(group["meals"].values())
+
+        deleted = []
+        shift_start = order_dates['oldest_order']
+        if shift_start:
+            shift_end = stat.end_time or timezone.now()
+            deleted_rows = (
+                OrderItemDeletionLog.objects
+                .filter(deleted_at__range=(shift_start, shift_end))
+                .values('reason', 'meal_name')
+                .annotate(
+                    qty=Sum('quantity'),
+                    total=Sum(
+                        F('quantity') * F('price'),
+                        output_field=models.DecimalField()
+                    )
+                )
+                .order_by('reason', 'meal_name')
+            )
+            reasons = {
+                OrderItemDeletionLog.REASON_RETURN: {
+                    "reason": OrderItemDeletionLog.REASON_RETURN,
+                    "label": "Anbara Qaytarma",
+                    "meals": [],
+                    "qty": 0,
+                    "total": Decimal("0.00"),
+                },
+                OrderItemDeletionLog.REASON_WASTE: {
+                    "reason": OrderItemDeletionLog.REASON_WASTE,
+                    "label": "Tullantı",
+                    "meals": [],
+                    "qty": 0,
+                    "total": Decimal("0.00"),
+                },
+            }
+            for row in deleted_rows:
+                reason = reasons.get(row['reason'])
+                if reason is None:
+                    continue
+                qty = int(row['qty'] or 0)
+                total = row['total'] or Decimal("0.00")
+                reason["meals"].append(
+                    {"name": row['meal_name'], "qty": qty, "total": total}
+                )
+                reason["qty"] += qty
+                reason["total"] += total
+            deleted = [r for r in reasons.values() if r["meals"]]
+
+        summary = {
+            "groups": list(groups.values()),
+            "qty": sum(g["qty"] for g in groups.values()),
+            "total": sum(
+                (g["total"] for g in groups.values()), Decimal("0.00")
+            ),
+            "deleted": deleted,
+            "oldest_order": order_dates['oldest_order'],
+            "latest_order": order_dates['latest_order'],
+        }
+
+        if stat.is_closed:
+            cache.set(cache_key, summary, None)
+        return summary
+
 
 class Statistics(DateTimeModel, models.Model):
     TITLE_CHOICES = (
@@ -408,6 +675,12 @@ class Statistics(DateTimeModel, models.Model):
     class Meta:
         verbose_name = "Statistika"
         verbose_name_plural = "Hesabatlar 📊"
+        indexes = [
+            models.Index(
+                fields=["title", "started_by", "is_closed", "is_z_checked"],
+                name="statistics_shift_state_idx",
+            ),
+        ]
 
     @property
     def cash(self):
@@ -0,0 +1,333 @@
+"""
+Retention of the simple_history tables of Order, OrderItem and Statistics.
+
+simple_history stores a full copy of the row on every save(), also on the
+many saves that change nothing but updated_at. `HistoryRetention`:
+
+- compact(): deletes the '~' records that equal the previous record of the
+  same object apart from updated_at. An order record is kept when order
+  item records fall between it and the previous one, since the history
+  timeline shows item changes under the order record that follows them;
+- archive(): writes the records of whole local months older than `months`
+  into <HISTORY_ARCHIVE_DIR>/<table>/<YYYY-MM>.jsonl.gz and deletes them;
+- partition(): on PostgreSQL, turns a history table into one partitioned
+  by month on history_date (plus a default partition), and creates the
+  partitions of the coming months. Archived months are then dropped as
+  whole partitions. Re-run it before altering a history table in a
+  migration, or convert the table back by hand.
+
+Records of the recent months are never archived, so the history admin
+keeps working on them.
+"""
+import gzip
+import json
+import os
+from array import array
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from apps.orders.models import Order, OrderItem, Statistics
+
+TRACKED_MODELS = (Order, OrderItem, Statistics)
+
+
+class RetentionError(Exception):
+    pass
+
+
+def _month_start(year, month):
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return timezone.make_aware(datetime(year, month, 1))
+
+
+def _next_month(moment):
+    return _month_start(moment.year, moment.month + 1)
+
+
+def _months(start, end):
+    """Local month starts from the month of `start` up to, not including, `end`."""
+    month = _month_start(start.year, start.month)
+    while month < end:
+        yield month
+        month = _next_month(month)
+
+
+class HistoryRetention:
+    def __init__(self, chunk_size=2000, dry_run=False, archive_dir=None):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.archive_dir = str(archive_dir or settings.HISTORY_ARCHIVE_DIR)
+
+    # ========================= #
+    #        COMPACTION         #
+    # ========================= #
+
+    @staticmethod
+    def compared_fields(model):
+        """Attnames compared between consecutive records: the id first, no auto_now."""
+        return [
+            field.attname for field in model._meta.fields
+            if not getattr(field, 'auto_now', False)
+        ]
+
+    def _stream(self, queryset, *fields):
+        return queryset.values_list(*fields).order_by(
+            fields[0], 'history_date', 'history_id'
+        ).iterator(chunk_size=self.chunk_size)
+
+    def _item_counts(self):
+        """
+        Generator receiving (order id, history_date) of the order records in
+        (id, history_date) order and answering how many order item records
+        fell since the previous one of the same order.
+        """
+        items = self._stream(
+            OrderItem.history.model.objects.all(), 'order_id', 'history_date')
+        pending = next(items, None)
+        count = None
+        while True:
+            order_id, history_date = yield count
+            count = 0
+            while pending is not None and (
+                pending[0] is None or pending[0] < order_id
+                or (pending[0] == order_id and pending[1] <= history_date)
+            ):
+                if pending[0] == order_id:
+                    count += 1
+                pending = next(items, None)
+
+    def no_op_records(self, model):
+        """history_ids (array) of the records of model that change nothing."""
+        fields = self.compared_fields(model)
+        rows = self._stream(
+            model.history.model.objects.all(),
+            *fields, 'history_id', 'history_date', 'history_type',
+        )
+        item_counts = None
+        if model is Order:
+            item_counts = self._item_counts()
+            next(item_counts)
+
+        no_ops = array('q')
+        kept = None
+        for row in rows:
+            values = row[:len(fields)]
+            history_id, history_date, history_type = row[len(fields):]
+            items = item_counts.send((values[0], history_date)) if item_counts else 0
+            if history_type == '~' and kept == values and not items:
+                no_ops.append(history_id)
+            else:
+                kept = values
+        return no_ops
+
+    def _delete(self, history_model, history_ids):
+        for start in range(0, len(history_ids), self.chunk_size):
+            batch = list(history_ids[start:start + self.chunk_size])
+            history_model.objects.filter(history_id__in=batch).delete()
+
+    def compact(self, model):
+        """Delete the no-op records of model; returns their number."""
+        no_ops = self.no_op_records(model)
+        if not self.dry_run:
+            self._delete(model.history.model, no_ops)
+        return len(no_ops)
+
+    # ========================= #
+    #          ARCHIVE          #
+    # ========================= #
+
+    @staticmethod
+    def cutoff(months, now=None):
+        """Start of the oldest local month that is kept."""
+        now = timezone.localtime(now)
+        return _month_start(now.year, now.month - months)
+
+    def _archive_path(self, table, month):
+        directory = os.path.join(self.archive_dir, table)
+        name = f"{month:%Y-%m}"
+        path = os.path.join(directory, f"{name}.jsonl.gz")
+        part = 1
+        while os.path.exists(path):
+            # Rows of an already archived month (late inserts, earlier run)
+            path = os.path.join(directory, f"{name}.{part}.jsonl.gz")
+            part += 1
+        return path
+
+    def archive(self, model, months, now=None):
+        """
+        Archive and delete the records of model older than `months` whole
+        months; returns {month 'YYYY-MM': number of records}.
+        """
+        history_model = model.history.model
+        table = history_model._meta.db_table
+        cutoff = self.cutoff(months, now)
+        old = history_model.objects.filter(history_date__lt=cutoff)
+        first = old.aggregate(first=Min('history_date'))['first']
+        if first is None:
+            return {}
+
+        result = {}
+        for month in _months(timezone.localtime(first), cutoff):
+            records = history_model.objects.filter(
+                history_date__gte=month, history_date__lt=_next_month(month))
+            last_id = records.aggregate(last=Max('history_id'))['last']
+            if last_id is None:
+                continue
+            records = records.filter(history_id__lte=last_id)
+            if self.dry_run:
+                result[f"{month:%Y-%m}"] = records.count()
+                continue
+
+            result[f"{month:%Y-%m}"] = self._write_archive(
+                self._archive_path(table, month), records)
+            self._delete_archived(history_model, records, month)
+        return result
+
+    def _write_archive(self, path, records):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        count = 0
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as fp:
+            for row in records.order_by('history_date', 'history_id').values().iterator(
+                    chunk_size=self.chunk_size):
+                fp.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+                fp.write('\n')
+                count += 1
+        os.replace(tmp_path, path)
+        return count
+
+    def _delete_archived(self, history_model, records, month):
+        table = history_model._meta.db_table
+        if self._is_partitioned(table):
+            partition = self._partition_name(table, month)
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT to_regclass(%s)", [partition])
+                if cursor.fetchone()[0] is not None:
+                    cursor.execute(f'DROP TABLE {connection.ops.quote_name(partition)}')
+                    return
+        while True:
+            ids = list(records.values_list('history_id', flat=True)[:self.chunk_size])
+            if not ids:
+                return
+            history_model.objects.filter(history_id__in=ids).delete()
+
+    # ========================= #
+    #   PARTITIONS (POSTGRES)   #
+    # ========================= #
+
+    @staticmethod
+    def _partition_name(table, month):
+        return f"{table}_p{month:%Y%m}"
+
+    @staticmethod
+    def _is_partitioned(table):
+        if connection.vendor != 'postgresql':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+            row = cursor.fetchone()
+        return row is not None and row[0] == 'p'
+
+    def partition(self, model, ahead=3, now=None):
+        """
+        Partition the history table of model by month (converting it on the
+        first run) and make sure the partitions of the next `ahead` months
+        exist; returns the names of the partitions created.
+        """
+        if connection.vendor != 'postgresql':
+            raise RetentionError("Monthly partitioning needs PostgreSQL")
+
+        table = model.history.model._meta.db_table
+        now = timezone.localtime(now)
+        end = _month_start(now.year, now.month + ahead + 1)
+        if self.dry_run:
+            return []
+
+        created = []
+        with transaction.atomic(), connection.cursor() as cursor:
+            start = now
+            if not self._is_partitioned(table):
+                start = self._convert(cursor, table, now)
+            for month in _months(start, end):
+                if self._add_partition(cursor, table, month):
+                    created.append(self._partition_name(table, month))
+        return created
+
+    def _convert(self, cursor, table, now):
+        """Rebuild `table` as a partitioned table; returns its oldest record's date."""
+        quote = connection.ops.quote_name
+        old = f"{table}__unpartitioned"
+        sequence = f"{table}_history_id_seq"
+
+        cursor.execute(f"LOCK TABLE {quote(table)} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(
+            f"SELECT min(history_date), coalesce(max(history_id), 0) FROM {quote(table)}")
+        first, last_id = cursor.fetchone()
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s "
+            "AND indexdef NOT LIKE 'CREATE UNIQUE%%'", [table])
+        index_definitions = [row[0] for row in cursor.fetchall()]
+        # LIKE copies CHECK and NOT NULL constraints, not foreign keys
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'", [table])
+        foreign_keys = cursor.fetchall()
+
+        cursor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(old)}")
+        # The identity and the unique indexes do not fit a partitioned table:
+        # they are replaced by a sequence and a (history_id, history_date) key
+        cursor.execute(
+            f"CREATE TABLE {quote(table)} (LIKE {quote(old)} "
+            f"INCLUDING ALL EXCLUDING IDENTITY EXCLUDING INDEXES) "
+            f"PARTITION BY RANGE (history_date)")
+        cursor.execute(
+            f"CREATE TABLE {quote(table + '_pdefault')} PARTITION OF {quote(table)} DEFAULT")
+        for month in _months(timezone.localtime(first or now), _next_month(now)):
+            self._add_partition(cursor, table, month)
+
+        cursor.execute(f"INSERT INTO {quote(table)} SELECT * FROM {quote(old)}")
+        # Drops the old identity sequence and indexes too
+        cursor.execute(f"DROP TABLE {quote(old)}")
+
+        cursor.execute(f"CREATE SEQUENCE {quote(sequence)} OWNED BY {quote(table)}.history_id")
+        cursor.execute("SELECT setval(%s, %s, %s)", [sequence, max(last_id, 1), last_id > 0])
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} ALTER COLUMN history_id "
+            f"SET DEFAULT nextval('{sequence}')")
+        cursor.execute(f"ALTER TABLE {quote(table)} ADD PRIMARY KEY (history_id, history_date)")
+        for definition in index_definitions:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} {definition}")
+        return timezone.localtime(first or now)
+
+    def _add_partition(self, cursor, table, month):
+        """
+        Attach the partition of month unless it exists, moving its rows out
+        of the default partition first. True when created.
+        """
+        quote = connection.ops.quote_name
+        name = self._partition_name(table, month)
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0] is not None:
+            return False
+
+        bounds = [month, _next_month(month)]
+        # ATTACH needs the CHECK constraints of the parent on the partition
+        cursor.execute(
+            f"CREATE TABLE {quote(name)} "
+            f"(LIKE {quote(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {quote(table + '_pdefault')} "
+            f"WHERE history_date >= %s AND history_date < %s RETURNING *) "
+            f"INSERT INTO {quote(name)} SELECT * FROM moved", bounds)
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(name)} "
+            f"FOR VALUES FROM (%s) TO (%s)", bounds)
+        return True
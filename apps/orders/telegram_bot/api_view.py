@@ -1,31 +1,56 @@
+import hmac
 import json
+import logging
 
+from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 
 from apps.orders.telegram_bot.bot import get_bot
+from apps.orders.telegram_bot.webhook import get_runner
+
+logger = logging.getLogger(__name__)
 
 
 @csrf_exempt
 @require_POST
 def webhook(request):
-    """Webhook endpoint for Telegram"""
+    """
+    Webhook endpoint for Telegram. Only requests carrying
+    TELEGRAM_WEBHOOK_SECRET are accepted: the updates are trusted as coming
+    from Telegram (user ids checked against ALLOWED_USERS), so without a
+    secret every request is refused.
+    """
+    secret = getattr(settings, 'TELEGRAM_WEBHOOK_SECRET', '')
+    if not secret or not hmac.compare_digest(
+        request.headers.get('X-Telegram-Bot-Api-Secret-Token', ''), secret
+    ):
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+
     try:
-        bot = get_bot()
-        if bot:
-            update_data = json.loads(request.body)
-            # Process webhook update
-            # This is for production webhook setup
-            pass
+        update_data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    try:
+        runner = get_runner()
+        if runner is None:
+            return JsonResponse({'error': 'Webhook mode is off'}, status=503)
+        if not runner.submit(update_data):
+            # Telegram retries the update later
+            return JsonResponse({'error': 'Busy'}, status=503)
         return JsonResponse({'status': 'ok'})
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+    except Exception:
+        logger.exception("Error queueing Telegram update")
+        return JsonResponse({'error': 'Internal error'}, status=500)
+
 
 def bot_status(request):
     """Check bot status"""
     bot = get_bot()
     return JsonResponse({
         'status': 'active' if bot else 'inactive',
-        'message': 'Bot is running' if bot else 'Bot not configured'
-    })
\ No newline at end of file
+        'message': 'Bot is running' if bot else 'Bot not configured',
+        'mode': 'webhook' if getattr(settings, 'TELEGRAM_WEBHOOK_URL', '') else 'polling',
+    })
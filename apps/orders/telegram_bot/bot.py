@@ -3,7 +3,8 @@ import logging
 from datetime import date, datetime
 from decimal import Decimal
 
-import requests
+import httpx
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
@@ -11,6 +12,8 @@ from telegram.ext import (
     ContextTypes, MessageHandler, filters
 )
 
+from apps.orders.telegram_bot.config import BOT_CONFIG, MESSAGES
+
 # Set up detailed logging
 logging.basicConfig(
     level=logging.DEBUG,  # Change to DEBUG for more info
@@ -19,6 +22,17 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class CachedReportResponse:
+    """A report served from the shared report cache, shaped like an API response."""
+    status_code = 200
+
+    def __init__(self, entry):
+        self.entry = entry
+
+    def json(self):
+        return {**self.entry['data'], 'cached_at': self.entry['computed_at']}
+
+
 class RestaurantBot:
     def __init__(self, token):
         self.token = token
@@ -26,9 +40,145 @@ class RestaurantBot:
         logger.info(f"Initializing bot with token: {token[:10]}...")
         logger.info(f"Base URL: {self.base_url}")
 
-        self.application = Application.builder().token(token).build()
+        # Backend calls share one async HTTP client; at most
+        # TELEGRAM_BOT_MAX_API_CALLS run at once, each bounded by a timeout
+        self._http = None
+        self._api_slots = asyncio.Semaphore(
+            getattr(settings, 'TELEGRAM_BOT_MAX_API_CALLS', 4))
+
+        # Updates are handled concurrently, so one slow report does not
+        # hold back the other owners
+        self.application = (
+            Application.builder()
+            .token(token)
+            .update_queue(asyncio.Queue(
+                maxsize=getattr(settings, 'TELEGRAM_WEBHOOK_QUEUE_SIZE', 100)))
+            .concurrent_updates(getattr(settings, 'TELEGRAM_BOT_CONCURRENT_UPDATES', 16))
+            .post_init(self.start_pushes)
+            .post_shutdown(self.shutdown)
+            .build()
+        )
+        self._push_task = None
         self.setup_handlers()
 
+    async def api_get(self, path):
+        """GET a backend endpoint without blocking the event loop."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(
+                    getattr(settings, 'TELEGRAM_BOT_API_TIMEOUT', 10), connect=3),
+            )
+        async with self._api_slots:
+            return await self._http.get(path)
+
+    async def get_report(self, path, kind, start_date, end_date):
+        """
+        A report from the shared report cache (see
+        apps.orders.analytics.report_cache), or from the API on a miss.
+        A per-process cache is skipped: the bot runs apart from the API
+        workers (polling) and would never see their entries.
+        """
+        from apps.commons.cache import is_shared
+        from apps.orders.analytics import report_cache
+
+        if not is_shared():
+            return await self.api_get(path)
+        try:
+            entry = await sync_to_async(report_cache.lookup)(kind, start_date, end_date)
+        except Exception as e:
+            logger.warning(f"Report cache unavailable: {e}")
+            entry = None
+        if entry is not None:
+            return CachedReportResponse(entry)
+        return await self.api_get(path)
+
+    def cache_age(self, data):
+        """Line telling how long ago the report was computed."""
+        from apps.orders.analytics import report_cache
+
+        if not data.get('cached_at'):
+            return ''
+        seconds = report_cache.age_seconds(data['cached_at'])
+        age = f"{seconds} san." if seconds < 60 else f"{seconds // 60} dəq."
+        return f"\n🗄️ <i>Hesablanıb: {age} əvvəl</i>"
+
+    async def close_http(self, application=None):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def shutdown(self, application=None):
+        if self._push_task is not None:
+            self._push_task.cancel()
+            self._push_task = None
+        await self.close_http()
+
+    # ========================= #
+    #      SCHEDULED PUSHES     #
+    # ========================= #
+
+    async def start_pushes(self, application=None):
+        """
+        Start the push loop (see telegram_bot.push) with the polling
+        application; in webhook mode `run_pushes` runs it instead.
+        """
+        self._push_task = asyncio.create_task(self.push_loop())
+
+    async def push_loop(self):
+        tick = getattr(settings, 'TELEGRAM_PUSH_TICK_SECONDS', 60)
+        while True:
+            try:
+                await self.push_tick()
+            except Exception as e:
+                logger.error(f"Error sending scheduled reports: {e}")
+            await asyncio.sleep(tick)
+
+    async def push_tick(self):
+        """Build what is due once and send it to every subscribed chat."""
+        from apps.orders.telegram_bot import push
+
+        messages = await sync_to_async(push.collect)()
+        for kind, text in messages:
+            chat_ids = await sync_to_async(push.subscribers)(kind)
+            results = await asyncio.gather(*(
+                self.application.bot.send_message(chat_id, text, parse_mode='HTML')
+                for chat_id in chat_ids
+            ), return_exceptions=True)
+            for chat_id, result in zip(chat_ids, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error pushing {kind} to {chat_id}: {result}")
+
+    def is_allowed(self, update):
+        allowed = BOT_CONFIG['ALLOWED_USERS']
+        return not allowed or update.effective_user.id in allowed
+
+    async def subscribe(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/subscribe: push reports and alerts to this chat"""
+        from apps.orders.models import BotSubscription
+
+        if not self.is_allowed(update):
+            await update.message.reply_text(MESSAGES['UNAUTHORIZED'])
+            return
+        chat = update.effective_chat
+        await sync_to_async(BotSubscription.objects.update_or_create)(
+            chat_id=chat.id,
+            defaults={'title': chat.title or chat.full_name or ''},
+        )
+        await update.message.reply_text(
+            "<b>🔔 Abunə aktivdir.</b>\n"
+            "Gün sonu yekunu, saatlıq vəziyyət və xəbərdarlıqlar bu söhbətə göndəriləcək.\n"
+            "<i>Dayandırmaq üçün /unsubscribe</i>",
+            parse_mode='HTML')
+
+    async def unsubscribe(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/unsubscribe: stop pushing to this chat"""
+        from apps.orders.models import BotSubscription
+
+        await sync_to_async(
+            BotSubscription.objects.filter(chat_id=update.effective_chat.id).delete)()
+        await update.message.reply_text("<b>🔕 Abunə dayandırıldı.</b>", parse_mode='HTML')
+
     def setup_handlers(self):
         """Setup bot command and callback handlers"""
         logger.info("Setting up handlers...")
@@ -38,6 +188,10 @@ class RestaurantBot:
         self.application.add_handler(CommandHandler("help", self.help_command))
         self.application.add_handler(
             CommandHandler("orders", self.orders_menu))
+        self.application.add_handler(
+            CommandHandler("subscribe", self.subscribe))
+        self.application.add_handler(
+            CommandHandler("unsubscribe", self.unsubscribe))
         self.application.add_handler(
             CallbackQueryHandler(self.button_callback))
         self.application.add_handler(MessageHandler(
@@ -55,6 +209,7 @@ class RestaurantBot:
 
 <b>🔧 MÖVCUD ƏMRLƏR:</b>
 • 📈 /orders - Sifariş hesabatları
+• 🔔 /subscribe - Avtomatik hesabatlar və xəbərdarlıqlar
 • ❓ /help - Kömək məlumatları
 
 <i>🚀 Başlamaq üçün /orders düyməsini basın.</i>"""
@@ -73,6 +228,8 @@ class RestaurantBot:
 <b>📋 MÖVCUD ƏMRLƏR:</b>
 • 🏠 /start - Başlanğıc mesajı
 • 📊 /orders - Sifariş hesabatlarını göstər
+• 🔔 /subscribe - Avtomatik hesabatlara abunə ol
+• 🔕 /unsubscribe - Abunəni dayandır
 • ❓ /help - Bu kömək mesajı
 
 <b>🧭 NAVİQASİYA:</b>
@@ -155,8 +312,9 @@ Seçdiyiniz dövrün sifarişləri
             today = date.today().isoformat()
 
             # Call API for today's orders
-            response = requests.get(
-                f"{self.base_url}/orders/active-orders/?date={today}")
+            response = await self.get_report(
+                f"/orders/active-orders/?date={today}",
+                'active-orders', date.today(), date.today())
 
             if response.status_code == 200:
                 data = response.json()
@@ -179,7 +337,7 @@ Seçdiyiniz dövrün sifarişləri
 └─────────────────────────────────┘
 </pre>
 
-🕒 <i>Yenilənmə: {self.get_current_time()}</i>"""
+🕒 <i>Yenilənmə: {self.get_current_time()}</i>{self.cache_age(data)}"""
 
                 keyboard = [
                     [InlineKeyboardButton(
@@ -201,7 +359,6 @@ Seçdiyiniz dövrün sifarişləri
         """Show date selection menu for daily reports based on report start dates"""
         try:
             from datetime import date, timedelta, datetime, time
-            import requests
 
             # Determine the correct "today" based on work period
             current_time = datetime.now().time()
@@ -210,8 +367,9 @@ Seçdiyiniz dövrün sifarişləri
             # Get work period config to determine actual "today"
             try:
                 # First, try to get active config from API call
-                temp_response = requests.get(
-                    f"{self.base_url}/orders/period-report/?date={calendar_today.strftime('%Y-%m-%d')}")
+                temp_response = await self.get_report(
+                    f"/orders/period-report/?date={calendar_today.strftime('%Y-%m-%d')}",
+                    'period-report', calendar_today, calendar_today)
                 if temp_response.status_code == 200:
                     temp_data = temp_response.json()
                     if 'error' not in temp_data:
@@ -236,23 +394,19 @@ Seçdiyiniz dövrün sifarişləri
                 # Fallback to calendar today if API fails
                 actual_today = calendar_today
 
-            # Get last 7 report dates starting from actual today
-            report_dates = []
-
-            # Generate potential dates and check which ones have valid reports
-            for i in range(7):
-                check_date = actual_today - timedelta(days=i)
+            async def report_info(check_date):
+                """Report info of one date, or None when the API has no report."""
                 date_str = check_date.strftime('%Y-%m-%d')
 
                 # Call API to get report info (this will create report if needed)
                 try:
-                    response = requests.get(
-                        f"{self.base_url}/orders/period-report/?date={date_str}")
+                    response = await self.get_report(
+                        f"/orders/period-report/?date={date_str}",
+                        'period-report', check_date, check_date)
                     if response.status_code == 200:
                         data = response.json()
                         if 'error' not in data:
                             # Parse the actual report start date (convert to local timezone)
-                            from datetime import datetime
                             from django.utils import timezone as django_timezone
                             report_start = datetime.fromisoformat(
                                 data['period_start'].replace('Z', '+00:00'))
@@ -260,20 +414,27 @@ Seçdiyiniz dövrün sifarişləri
                                 report_start)
                             report_start_date = report_start_local.date()
 
-                            report_dates.append({
+                            return {
                                 'api_date': date_str,  # Date to send to API
                                 'report_start_date': report_start_date,  # Actual report start date
                                 'display_date': report_start_date.strftime('%d.%m.%Y'),
                                 'period_name': data.get('period_name', 'İş Dövrü')
-                            })
+                            }
                 except:
                     # If API fails, still add the date
-                    report_dates.append({
+                    return {
                         'api_date': date_str,
                         'report_start_date': check_date,
                         'display_date': check_date.strftime('%d.%m.%Y'),
                         'period_name': 'İş Dövrü'
-                    })
+                    }
+                return None
+
+            # Last 7 report dates starting from actual today, fetched together
+            results = await asyncio.gather(*(
+                report_info(actual_today - timedelta(days=i)) for i in range(7)
+            ))
+            report_dates = [info for info in results if info is not None]
 
             # Create keyboard with report start date options
             keyboard = []
@@ -318,8 +479,10 @@ Seçdiyiniz dövrün sifarişləri
         """Show period report for specific date"""
         try:
             # Call period report API with date
-            response = requests.get(
-                f"{self.base_url}/orders/period-report/?date={date_str}")
+            report_date = date.fromisoformat(date_str)
+            response = await self.get_report(
+                f"/orders/period-report/?date={date_str}",
+                'period-report', report_date, report_date)
 
             if response.status_code == 200:
                 data = response.json()
@@ -372,7 +535,7 @@ Seçdiyiniz dövrün sifarişləri
 └─────────────────────────────────┘
 </pre>
 
-🕒 <i>Yenilənmə: {self.get_current_time()}</i>"""
+🕒 <i>Yenilənmə: {self.get_current_time()}</i>{self.cache_age(data)}"""
 
                 keyboard = [
                     [InlineKeyboardButton(
@@ -482,8 +645,9 @@ Seçdiyiniz dövrün sifarişləri
             end_datetime = f"{end_date.isoformat()}T23:59:59"
 
             # Call API with date range
-            response = requests.get(
-                f"{self.base_url}/orders/active-orders/?start_date={start_datetime}&end_date={end_datetime}"
+            response = await self.get_report(
+                f"/orders/active-orders/?start_date={start_datetime}&end_date={end_datetime}",
+                'active-orders', start_date, end_date
             )
 
             if response.status_code == 200:
@@ -508,7 +672,7 @@ Seçdiyiniz dövrün sifarişləri
 └─────────────────────────────────┘
 </pre>
 
-🕒 <i>Yenilənmə: {self.get_current_time()}</i>"""
+🕒 <i>Yenilənmə: {self.get_current_time()}</i>{self.cache_age(data)}"""
 
                 keyboard = [
                     [InlineKeyboardButton(
@@ -727,10 +891,11 @@ Seçdiyiniz dövrün sifarişləri
                 f"Fetching single date report for: {target_date} with context: {context}")
 
             # Call API for specific date
-            api_url = f"{self.base_url}/orders/active-orders/?date={target_date.isoformat()}"
+            api_url = f"/orders/active-orders/?date={target_date.isoformat()}"
             logger.info(f"API call: {api_url}")
 
-            response = requests.get(api_url, timeout=10)
+            response = await self.get_report(
+                api_url, 'active-orders', target_date, target_date)
 
             if response.status_code == 200:
                 data = response.json()
@@ -754,7 +919,7 @@ Seçdiyiniz dövrün sifarişləri
 └─────────────────────────────────┘
 </pre>
 
-🕒 <i>Yenilənmə: {self.get_current_time()}</i>"""
+🕒 <i>Yenilənmə: {self.get_current_time()}</i>{self.cache_age(data)}"""
 
                 # Create navigation buttons based on context
                 keyboard = [
@@ -771,7 +936,7 @@ Seçdiyiniz dövrün sifarişləri
                     f"API error: {response.status_code} - {response.text}")
                 await update.message.reply_text("<b>❌ Məlumat alınarkən xəta baş verdi.</b>", parse_mode='HTML')
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Connection error fetching single date report: {e}")
             await update.message.reply_text("<b>❌ Serverlə əlaqə yaradılmadı.</b>", parse_mode='HTML')
         except Exception as e:
@@ -792,11 +957,12 @@ Seçdiyiniz dövrün sifarişləri
             start_datetime = f"{start_date.isoformat()}T00:00:00"
             end_datetime = f"{end_date.isoformat()}T23:59:59"
 
-            api_url = f"{self.base_url}/orders/active-orders/?start_date={start_datetime}&end_date={end_datetime}"
+            api_url = f"/orders/active-orders/?start_date={start_datetime}&end_date={end_datetime}"
             logger.info(f"API call: {api_url}")
 
             # Call API with date range
-            response = requests.get(api_url, timeout=10)
+            response = await self.get_report(
+                api_url, 'active-orders', start_date, end_date)
 
             if response.status_code == 200:
                 data = response.json()
@@ -821,7 +987,7 @@ Seçdiyiniz dövrün sifarişləri
 └─────────────────────────────────┘
 </pre>
 
-🕒 <i>Yenilənmə: {self.get_current_time()}</i>"""
+🕒 <i>Yenilənmə: {self.get_current_time()}</i>{self.cache_age(data)}"""
 
                 # Create navigation buttons based on context
                 keyboard = [
@@ -838,7 +1004,7 @@ Seçdiyiniz dövrün sifarişləri
                     f"API error: {response.status_code} - {response.text}")
                 await update.message.reply_text("<b>❌ Məlumat alınarkən xəta baş verdi.</b>", parse_mode='HTML')
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(
                 f"Connection error fetching manual date range report: {e}")
             await update.message.reply_text("<b>❌ Serverlə əlaqə yaradılmadı.</b>", parse_mode='HTML')
@@ -927,6 +1093,22 @@ Seçdiyiniz dövrün sifarişləri
         # Use the synchronous run_polling method
         self.application.run_polling(drop_pending_updates=True)
 
+    def run_pushes(self):
+        """
+        Send the scheduled pushes only (webhook mode: the Django app
+        handles the updates). Blocks until interrupted.
+        """
+        logger.info("Starting scheduled pushes...")
+
+        async def main():
+            async with self.application.bot:
+                try:
+                    await self.push_loop()
+                finally:
+                    await self.close_http()
+
+        asyncio.run(main())
+
 
 # Bot instance
 bot_instance = None
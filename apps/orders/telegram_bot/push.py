@@ -0,0 +1,147 @@
+"""
+Scheduled pushes of the Telegram bot.
+
+Every TELEGRAM_PUSH_TICK_SECONDS the bot asks `collect()` for what is due:
+
+- daily_summary: the totals of a work period once it has closed;
+- hourly_snapshot: the running totals of the open work period, hourly;
+- alerts: payments with a discount of at least TELEGRAM_ALERT_DISCOUNT,
+  and TELEGRAM_ALERT_VOIDS or more deleted items within
+  TELEGRAM_ALERT_VOID_WINDOW minutes.
+
+Each message is built once per tick (reports come from the shared report
+cache) and sent to every BotSubscription that has its kind switched on.
+What was already sent is claimed in the Django cache; with Redis
+(REDIS_URL) neither a restart nor a second process repeats it.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from apps.orders.analytics import report_cache
+
+STATE_KEY = "orders:push:{}"
+CLAIM_TIMEOUT = 2 * 24 * 3600
+# Pushes more than this late (bot was down) are dropped
+MAX_DELAY = timedelta(hours=1)
+
+
+def totals_table(data):
+    return f"""<pre>
+┌─────────────────────────────────┐
+│         ÖDƏNİŞ STATİSTİKASI     │
+├─────────────────────────────────┤
+│ 💵 Nağd        │ {data['cash_total']:>8.2f} AZN │
+│ 💳 Kart        │ {data['card_total']:>8.2f} AZN │
+│ 🔄 Digər       │ {data['other_total']:>8.2f} AZN │
+│ ❌ Ödənilməmiş │ {data['unpaid_total']:>8.2f} AZN │
+├─────────────────────────────────┤
+│         ÜMUMİ MƏBLƏĞ            │
+├─────────────────────────────────┤
+│ ✅ Ödənilmiş   │ {data['paid_total']:>8.2f} AZN │
+│ 📊 Toplam      │ {(data['paid_total'] + data['unpaid_total']):>8.2f} AZN │
+└─────────────────────────────────┘
+</pre>"""
+
+
+def _once(name, value):
+    """
+    True the first time `value` is claimed for `name`. The claim is atomic,
+    so a restarted or second push process sharing the cache pushes only once.
+    """
+    return cache.add(STATE_KEY.format(f"{name}:{value}"), True, CLAIM_TIMEOUT)
+
+
+def _daily_summary(now):
+    work_date = report_cache.current_work_date(now)
+    start, end = report_cache.work_period_bounds(work_date)
+    if end > now:
+        work_date -= timedelta(days=1)
+        start, end = report_cache.work_period_bounds(work_date)
+
+    if not _once("daily", work_date.isoformat()) or now - end > MAX_DELAY:
+        return []
+    data = report_cache.period_report(work_date)["data"]
+    text = f"""<b>🌙 GÜN SONU YEKUNU</b>
+📅 {work_date.strftime('%d.%m.%Y')} ({timezone.localtime(start):%H:%M} - {timezone.localtime(end):%H:%M})
+
+{totals_table(data)}"""
+    return [("daily_summary", text)]
+
+
+def _hourly_snapshot(now):
+    work_date = report_cache.current_work_date(now)
+    start, end = report_cache.work_period_bounds(work_date)
+    slot = now.replace(minute=0, second=0, microsecond=0)
+    if not start <= now < end or slot <= start:
+        return []
+    if not _once("hourly", slot.isoformat()) or now - slot > MAX_DELAY:
+        return []
+    data = report_cache.range_report(work_date, work_date)["data"]
+    text = f"""<b>⏱️ SAAT {slot:%H:%M} VƏZİYYƏTİ</b>
+📅 {work_date.strftime('%d.%m.%Y')}
+
+{totals_table(data)}"""
+    return [("hourly_snapshot", text)]
+
+
+def _alerts(now):
+    from apps.orders.models import OrderItemDeletionLog
+    from apps.payments.models import Payment
+
+    if not _once("alerts", now.replace(second=0, microsecond=0).isoformat()):
+        return []
+    key = STATE_KEY.format("alerts-since")
+    since = cache.get(key) or now - timedelta(seconds=settings.TELEGRAM_PUSH_TICK_SECONDS)
+    cache.set(key, now, None)
+
+    messages = []
+    discounts = (
+        Payment.objects
+        .filter(paid_at__gt=since, paid_at__lte=now,
+                discount_amount__gte=settings.TELEGRAM_ALERT_DISCOUNT)
+        .values_list("table__number", "discount_amount", "final_price",
+                     "discount_comment", "paid_by__username")
+        .order_by("paid_at")
+    )
+    for table, discount, final_price, comment, paid_by in discounts:
+        messages.append(("alerts", f"""<b>⚠️ BÖYÜK ENDİRİM</b>
+🪑 Masa: {table}
+💸 Endirim: {discount:.2f} AZN (son məbləğ {final_price:.2f} AZN)
+👤 Operator: {paid_by or '-'}
+📝 {comment or 'Səbəb göstərilməyib'}"""))
+
+    window = timedelta(minutes=settings.TELEGRAM_ALERT_VOID_WINDOW)
+    voids = OrderItemDeletionLog.objects.filter(
+        deleted_at__gt=now - window, deleted_at__lte=now
+    ).aggregate(
+        count=Count("id"),
+        amount=Sum(F("price") * F("quantity")),
+    )
+    last_alert = cache.get(STATE_KEY.format("voids-alerted"))
+    if (voids["count"] >= settings.TELEGRAM_ALERT_VOIDS
+            and (last_alert is None or now - last_alert >= window)):
+        cache.set(STATE_KEY.format("voids-alerted"), now, None)
+        amount = voids["amount"] or Decimal("0")
+        messages.append(("alerts", f"""<b>⚠️ SİLİNMƏLƏRDƏ ARTIM</b>
+🗑️ Son {settings.TELEGRAM_ALERT_VOID_WINDOW} dəqiqədə {voids['count']} məhsul silinib
+💰 Məbləğ: {amount:.2f} AZN"""))
+    return messages
+
+
+def collect(now=None):
+    """[(kind, text)] due at `now`; kind is a BotSubscription flag."""
+    now = timezone.localtime(now)
+    return _daily_summary(now) + _hourly_snapshot(now) + _alerts(now)
+
+
+def subscribers(kind):
+    from apps.orders.models import BotSubscription
+
+    return list(
+        BotSubscription.objects.filter(**{kind: True}).values_list("chat_id", flat=True)
+    )
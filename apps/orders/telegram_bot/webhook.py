@@ -0,0 +1,116 @@
+"""
+Webhook mode of the Telegram bot.
+
+With TELEGRAM_WEBHOOK_URL set, the Django app receives the updates itself
+(`api_view.webhook`) instead of a separate `run_telegram_bot` polling
+process. The process keeps one RestaurantBot application running on a
+background event loop; the view only parses the update and puts it on the
+application's update queue, which is bounded
+(TELEGRAM_WEBHOOK_QUEUE_SIZE). When the queue is full the view answers
+503 and Telegram delivers the update again later.
+
+The web workers only handle updates: the scheduled pushes are sent by one
+`manage.py run_telegram_bot` process, which in webhook mode runs the push
+loop alone (see RestaurantBot.run_pushes).
+
+Register the webhook with `manage.py run_telegram_bot --set-webhook`.
+Webhook mode requires TELEGRAM_WEBHOOK_SECRET: Telegram sends it back with
+every update and the view refuses requests without it.
+"""
+import asyncio
+import logging
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+STARTUP_TIMEOUT = 30
+SUBMIT_TIMEOUT = 5
+
+_lock = threading.Lock()
+_runner = None
+
+
+class WebhookRunner:
+    def __init__(self, bot):
+        self.bot = bot
+        self.loop = asyncio.new_event_loop()
+        self._thread = None
+        self._started = threading.Event()
+        self._error = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="telegram-webhook", daemon=True)
+        self._thread.start()
+        if not self._started.wait(STARTUP_TIMEOUT):
+            raise RuntimeError("Telegram application did not start in time")
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._startup())
+        except Exception as e:
+            self._error = e
+            self._started.set()
+            return
+        self._started.set()
+        self.loop.run_forever()
+
+    async def _startup(self):
+        application = self.bot.application
+        await application.initialize()
+        await application.start()
+
+    async def _shutdown(self):
+        application = self.bot.application
+        await application.stop()
+        # post_shutdown only runs with run_polling/run_webhook
+        await self.bot.shutdown(application)
+        await application.shutdown()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(STARTUP_TIMEOUT)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(STARTUP_TIMEOUT)
+
+    def submit(self, data):
+        """Queue an update (decoded JSON). False when the queue is full."""
+        update = Update.de_json(data, self.bot.application.bot)
+        future = asyncio.run_coroutine_threadsafe(self._enqueue(update), self.loop)
+        return future.result(SUBMIT_TIMEOUT)
+
+    async def _enqueue(self, update):
+        try:
+            self.bot.application.update_queue.put_nowait(update)
+        except asyncio.QueueFull:
+            logger.warning("Telegram update queue is full, asking to retry")
+            return False
+        return True
+
+
+def get_runner():
+    """The running WebhookRunner of this process, or None when webhook mode is off."""
+    global _runner
+    from apps.orders.telegram_bot.bot import get_bot
+
+    if _runner is None:
+        with _lock:
+            if _runner is None:
+                if not getattr(settings, 'TELEGRAM_WEBHOOK_URL', ''):
+                    return None
+                if not getattr(settings, 'TELEGRAM_WEBHOOK_SECRET', ''):
+                    raise ImproperlyConfigured(
+                        'TELEGRAM_WEBHOOK_SECRET is required in webhook mode')
+                bot = get_bot()
+                if bot is None:
+                    return None
+                runner = WebhookRunner(bot)
+                runner.start()
+                _runner = runner
+    return _runner
@@ -0,0 +1,170 @@
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+import pyarrow.parquet as pq
+from django.test import TestCase, override_settings
+
+from apps.meals.models import Meal
+from apps.orders.analytics.export import AnalyticsExporter
+from apps.orders.models import Order, OrderItem
+from apps.payments.models import Payment, PaymentMethod
+from apps.tables.models import Room, Table
+from apps.users.models import User
+
+
+class AnalyticsExportTestCase(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.user = User.objects.create_user(
+            username='export_waitress', password='pass', type='waitress')
+        room = Room.objects.create(name='Zal')
+        self.table = Table.objects.create(number='1', room=room)
+        meal = Meal.objects.create(name='Dolma', price=Decimal('5.00'))
+
+        self.order = Order.objects.create(
+            table=self.table, waitress=self.user, total_price=Decimal('10.00'))
+        for _ in range(2):
+            OrderItem.objects.create(
+                order=self.order, meal=meal, price=Decimal('5.00'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_dataset(self, name):
+        return pq.read_table(os.path.join(self.tmp.name, name)).to_pylist()
+
+    def test_export_and_incremental_run(self):
+        exporter = AnalyticsExporter(export_dir=self.tmp.name, chunk_size=1)
+
+        result = exporter.run()
+        self.assertEqual(result['orders'], 1)
+        self.assertEqual(result['order_items'], 1)
+        self.assertEqual(result['payments'], 0)
+
+        orders = self.read_dataset('orders')
+        self.assertEqual(len(orders), 1)
+        self.assertEqual(orders[0]['total_price'], Decimal('10.00'))
+        self.assertEqual(len(self.read_dataset('order_items')), 2)
+
+        # Nothing changed since the high-water mark
+        self.assertEqual(exporter.run()['orders'], 0)
+
+        self.order.is_paid = True
+        self.order.save()
+        self.assertEqual(exporter.run()['orders'], 1)
+        self.assertTrue(self.read_dataset('orders')[0]['is_paid'])
+
+    def test_late_commit_within_the_safety_lag_is_exported(self):
+        exporter = AnalyticsExporter(export_dir=self.tmp.name)
+        exporter.run()
+
+        # Changed before the newest change of the last run, committed after it
+        late = Order.objects.create(
+            table=self.table, waitress=self.user, total_price=Decimal('3.00'))
+        Order.objects.all_orders().filter(pk=late.pk).update(
+            updated_at=self.order.updated_at - timedelta(seconds=1))
+        self.assertEqual(exporter.run()['orders'], 1)
+        self.assertEqual(len(self.read_dataset('orders')), 2)
+        # Rows of the overlap window are not exported again unchanged
+        self.assertEqual(exporter.run()['orders'], 0)
+
+    def test_deleted_items_leave_their_partition(self):
+        exporter = AnalyticsExporter(export_dir=self.tmp.name)
+        exporter.run()
+
+        item = self.order.order_items.first()
+        item.delete()
+        self.assertEqual(exporter.run()['order_items'], 1)
+        self.assertEqual(
+            [row['id'] for row in self.read_dataset('order_items')],
+            list(OrderItem.objects.values_list('id', flat=True)))
+
+        # Deleting the last rows of a day leaves an empty partition
+        self.order.delete()
+        exporter.run()
+        self.assertEqual(self.read_dataset('orders'), [])
+        self.assertEqual(self.read_dataset('order_items'), [])
+        self.assertEqual(exporter.run()['order_items'], 0)
+
+    def test_payment_edits_and_deletions(self):
+        exporter = AnalyticsExporter(export_dir=self.tmp.name)
+        payment = Payment.objects.create(
+            table=self.table, total_price=Decimal('10.00'),
+            final_price=Decimal('10.00'), paid_amount=Decimal('10.00'))
+        payment.orders.add(self.order)
+        method = PaymentMethod.objects.create(
+            payment=payment, amount=Decimal('10.00'), payment_type='cash')
+        exporter.run()
+
+        method.payment_type = 'card'
+        method.save()
+        payment.discount_amount = Decimal('1.00')
+        payment.save()
+        result = exporter.run()
+        self.assertEqual(result['payments'], 1)
+        self.assertEqual(result['payment_methods'], 1)
+        self.assertEqual(self.read_dataset('payments')[0]['discount_amount'], Decimal('1.00'))
+        self.assertEqual(self.read_dataset('payment_methods')[0]['payment_type'], 'card')
+
+        payment.delete()
+        result = exporter.run()
+        self.assertEqual(result['payment_orders'], 1)
+        self.assertEqual(self.read_dataset('payments'), [])
+        self.assertEqual(self.read_dataset('payment_orders'), [])
+        self.assertEqual(self.read_dataset('payment_methods'), [])
+
+    def test_sales_analytics_api(self):
+        self.order.is_paid = True
+        self.order.customer_count = 2
+        self.order.save()
+        AnalyticsExporter(export_dir=self.tmp.name).run()
+
+        with override_settings(ANALYTICS_EXPORT_DIR=self.tmp.name):
+            response = self.client.get('/orders/sales-analytics/')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['summary']['orders'], 1)
+        self.assertEqual(data['summary']['average_per_cover'], 5.0)
+        self.assertEqual(sum(map(sum, data['heatmap']['orders'])), 1)
+        self.assertEqual(data['attach_rates'][0]['meal'], 'Dolma')
+        self.assertEqual(data['attach_rates'][0]['attach_rate'], 1.0)
+        self.assertEqual(data['waitresses'][0]['items_per_order'], 2.0)
+
+    def test_sales_analytics_api_invalid_date(self):
+        response = self.client.get('/orders/sales-analytics/?start_date=x')
+        self.assertEqual(response.status_code, 400)
+
+    def test_menu_engineering_api(self):
+        from apps.inventory_connector.costs import refresh_costs
+        from apps.inventory_connector.models import (MealInventoryConnector,
+                                                     MealInventoryMapping)
+        from inventory.models import InventoryItem
+
+        dolma = Meal.objects.get(name='Dolma')
+        connector = MealInventoryConnector.objects.create(meal=dolma)
+        MealInventoryMapping.objects.create(
+            connector=connector,
+            inventory_item=InventoryItem.objects.create(name='Ət', unit='kq'),
+            quantity=Decimal('0.100'), price=Decimal('15.000'))
+        kebab = Meal.objects.create(name='Kabab', price=Decimal('12.00'))
+        OrderItem.objects.create(
+            order=self.order, meal=kebab, price=Decimal('12.00'))
+        refresh_costs()
+
+        self.order.is_paid = True
+        self.order.save()
+        AnalyticsExporter(export_dir=self.tmp.name).run()
+
+        with override_settings(ANALYTICS_EXPORT_DIR=self.tmp.name):
+            response = self.client.get('/orders/menu-engineering/')
+
+        self.assertEqual(response.status_code, 200)
+        meals = {row['meal']: row for row in response.json()['meals']}
+        # Dolma: 2 sold, 5.00 - 1.50 margin; Kabab: 1 sold, 12.00 margin
+        self.assertEqual(meals['Dolma']['quantity'], 2)
+        self.assertEqual(meals['Dolma']['margin'], 3.5)
+        self.assertEqual(meals['Dolma']['class'], 'plowhorse')
+        self.assertEqual(meals['Kabab']['class'], 'puzzle')
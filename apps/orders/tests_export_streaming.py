@@ -0,0 +1,155 @@
+import csv
+import io
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.etree import ElementTree
+
+from django.contrib.auth.models import Permission
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.meals.models import Meal
+from apps.orders.analytics import streaming
+from apps.orders.models import Order, OrderItem, OrderItemDeletionLog
+from apps.tables.models import Room, Table
+from apps.users.models import User
+
+SHEET_NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+class StreamingExportTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='pass')
+        self.client.force_login(self.admin)
+        self.waitress = User.objects.create_user(
+            username='export_waitress', password='pass', type='waitress')
+        room = Room.objects.create(name='Zal')
+        self.table = Table.objects.create(number='7', room=room)
+        meal = Meal.objects.create(name='Dolma', price=Decimal('5.00'))
+
+        self.order = Order.objects.create(
+            table=self.table, waitress=self.waitress, total_price=Decimal('10.00'))
+        OrderItem.objects.create(order=self.order, meal=meal, price=Decimal('5.00'))
+        old = Order.objects.create(
+            table=self.table, waitress=self.waitress, total_price=Decimal('3.00'))
+        Order.objects.filter(pk=old.pk).update(
+            created_at=timezone.make_aware(datetime(2024, 1, 15, 13, 0)))
+
+    def download(self, url_name, **params):
+        response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_orders_csv_respects_date_range(self):
+        today = timezone.localdate().isoformat()
+        content = self.download(
+            'admin:orders_order_export', dataset='orders', file_format='csv',
+            start_date=today, end_date=today)
+
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual(rows[0][:3], ['ID', 'Stol', 'Zal'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][0], str(self.order.pk))
+        self.assertEqual(rows[1][5], '10.00')
+
+        content = self.download(
+            'admin:orders_order_export', dataset='orders', file_format='csv',
+            start_date='2024-01-01', end_date='2024-01-31')
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual([row[5] for row in rows[1:]], ['3.00'])
+
+    def test_deletion_logs_xlsx(self):
+        OrderItemDeletionLog.objects.create(
+            order_id=self.order.pk, order_item_id=1, table_id=self.table.pk,
+            waitress_name='Aysel', meal_name='=HYPERLINK("x")', quantity=Decimal('2'),
+            price=Decimal('5.00'), customer_number=1, reason='other')
+        today = timezone.localdate().isoformat()
+        content = self.download(
+            'admin:orders_orderitemdeletionlog_export', dataset='deletion_logs',
+            file_format='xlsx', start_date=today, end_date=today)
+
+        with zipfile.ZipFile(io.BytesIO(content)) as workbook:
+            self.assertIsNone(workbook.testzip())
+            sheet = ElementTree.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+        rows = sheet.findall('.//s:row', SHEET_NS)
+        self.assertEqual(len(rows), 2)
+        texts = [t.text for t in rows[1].iterfind('.//s:t', SHEET_NS)]
+        # Inline strings are never evaluated as formulas
+        self.assertIn('=HYPERLINK("x")', texts)
+        values = [v.text for v in rows[1].iterfind('.//s:v', SHEET_NS)]
+        self.assertIn('5.00', values)
+
+    def test_dataset_not_offered_by_admin_is_rejected(self):
+        response = self.client.get(reverse('admin:orders_orderitemdeletionlog_export'), {
+            'dataset': 'payments', 'file_format': 'csv',
+            'start_date': '2024-01-01', 'end_date': '2024-01-31',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.streaming)
+        self.assertIn('dataset', response.context['form'].errors)
+
+    def test_history_export_and_changelist_button(self):
+        response = self.client.get(reverse('admin:orders_historicalorder_changelist'))
+        self.assertContains(response, reverse('admin:orders_historicalorder_export'))
+
+        today = timezone.localdate().isoformat()
+        content = self.download(
+            'admin:orders_historicalorder_export', dataset='order_history',
+            file_format='csv', start_date=today, end_date=today)
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual(len(rows), 1 + Order.history.filter(
+            history_date__date=timezone.now().date()).count())
+
+    def test_datasets_need_the_view_permission_of_their_model(self):
+        staff = User.objects.create_user(username='history_only', password='pass', is_staff=True)
+        staff.user_permissions.add(Permission.objects.get(codename='view_historicalorder'))
+        self.client.force_login(staff)
+
+        url = reverse('admin:orders_historicalorder_export')
+        response = self.client.get(url)
+        self.assertEqual(
+            [name for name, _label in response.context['form'].fields['dataset'].choices],
+            ['order_history'])
+        response = self.client.get(url, {
+            'dataset': 'orders', 'file_format': 'csv',
+            'start_date': '2024-01-01', 'end_date': '2024-01-31',
+        })
+        self.assertFalse(response.streaming)
+        self.assertIn('dataset', response.context['form'].errors)
+
+        # No permitted dataset: no export page
+        staff.user_permissions.set([Permission.objects.get(codename='view_order')])
+        self.assertEqual(self.client.get(reverse('admin:orders_orderitemdeletionlog_export')).status_code, 403)
+        response = self.client.get(reverse('admin:orders_order_changelist'))
+        self.assertContains(response, reverse('admin:orders_order_export'))
+        response = self.client.get(reverse('admin:orders_order_export'))
+        self.assertEqual(
+            [name for name, _label in response.context['form'].fields['dataset'].choices],
+            ['orders'])
+
+    def test_csv_escapes_formulas(self):
+        lines = list(streaming.stream_csv(['a'], iter([('=1+1',), ('-2',), (-2,)])))
+        self.assertEqual(lines[1:], ["'=1+1\r\n", "'-2\r\n", "-2\r\n"])
+
+    def test_xlsx_reads_rows_lazily(self):
+        consumed = []
+
+        def rows():
+            for number in range(5000):
+                consumed.append(number)
+                yield (number, f'meal {number}')
+
+        chunks = streaming.stream_xlsx(['n', 'name'], rows(), flush_bytes=1024)
+        next(chunks)
+        self.assertLess(len(consumed), 5000)
+        content = next(chunks) + b"".join(chunks)
+        self.assertEqual(len(consumed), 5000)
+        self.assertTrue(content)
+
+    def test_date_bounds_are_local_days(self):
+        start, end = streaming.date_bounds(date(2024, 1, 1), date(2024, 1, 1))
+        self.assertEqual(timezone.localtime(start).hour, 0)
+        self.assertEqual((end - start).days, 1)
@@ -0,0 +1,131 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.meals.models import Meal
+from apps.orders.admin import timeline
+from apps.orders.models import Order, OrderItem
+from apps.orders.retention import HistoryRetention
+from apps.tables.models import Room, Table
+from apps.users.models import User
+
+
+class HistoryRetentionTestCase(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.waitress = User.objects.create_user(
+            username='retention_waitress', password='pass', type='waitress')
+        room = Room.objects.create(name='Zal')
+        self.table = Table.objects.create(number='5', room=room)
+        self.meal = Meal.objects.create(name='Dolma', price=Decimal('5.00'))
+        self.retention = HistoryRetention(archive_dir=self.tmp.name, chunk_size=2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def history_types(self, order):
+        return list(
+            Order.history.filter(id=order.pk)
+            .order_by('history_date', 'history_id')
+            .values_list('history_type', 'is_paid')
+        )
+
+    def test_compact_keeps_real_changes(self):
+        order = Order.objects.create(table=self.table, waitress=self.waitress)
+        order.save()
+        order.save()
+        item = OrderItem.objects.create(order=order, meal=self.meal, price=Decimal('5.00'))
+        # Bounds the item change in the timeline: kept
+        order.save()
+        item.save()
+        item.save()
+        order.is_paid = True
+        order.save()
+        order.save()
+
+        self.assertEqual(self.retention.compact(Order), 3)
+        self.assertEqual(self.history_types(order), [
+            ('+', False), ('~', False), ('~', True),
+        ])
+        self.assertEqual(self.retention.compact(OrderItem), 2)
+        self.assertEqual(OrderItem.history.filter(id=item.pk).count(), 1)
+
+        lines = [line for _record, lines in timeline.load_page().entries for line in lines]
+        self.assertTrue(any(line.startswith("Əlavə edildi: ") for line in lines))
+
+    def test_dry_run_deletes_nothing(self):
+        order = Order.objects.create(table=self.table, waitress=self.waitress)
+        order.save()
+        retention = HistoryRetention(archive_dir=self.tmp.name, dry_run=True)
+        self.assertEqual(retention.compact(Order), 1)
+        self.assertEqual(Order.history.filter(id=order.pk).count(), 2)
+
+    def test_archive_old_months(self):
+        old = Order.objects.create(table=self.table, waitress=self.waitress)
+        recent = Order.objects.create(table=self.table, waitress=self.waitress)
+        Order.history.filter(id=old.pk).update(
+            history_date=timezone.make_aware(datetime(2024, 1, 10, 13, 0)))
+
+        now = timezone.make_aware(datetime(2024, 9, 15, 12, 0))
+        result = self.retention.archive(Order, 6, now=now)
+        self.assertEqual(result, {'2024-01': 1})
+
+        path = os.path.join(self.tmp.name, 'orders_historicalorder', '2024-01.jsonl.gz')
+        with gzip.open(path, 'rt', encoding='utf-8') as fp:
+            rows = [json.loads(line) for line in fp]
+        self.assertEqual([row['id'] for row in rows], [old.pk])
+        self.assertFalse(Order.history.filter(id=old.pk).exists())
+        self.assertTrue(Order.history.filter(id=recent.pk).exists())
+
+        # Late rows of the same month go to a new file
+        Order.history.filter(id=recent.pk).update(
+            history_date=timezone.make_aware(datetime(2024, 1, 20, 13, 0)))
+        self.assertEqual(self.retention.archive(Order, 6, now=now), {'2024-01': 1})
+        self.assertTrue(os.path.exists(path.replace('.jsonl.gz', '.1.jsonl.gz')))
+
+    def test_command(self):
+        order = Order.objects.create(table=self.table, waitress=self.waitress)
+        order.save()
+        out = StringIO()
+        call_command('history_retention', '--output', self.tmp.name, stdout=out)
+        self.assertIn('orders_historicalorder: 1 no-op record(s) removed', out.getvalue())
+        self.assertEqual(Order.history.filter(id=order.pk).count(), 1)
+
+        with self.assertRaises(CommandError):
+            call_command('history_retention', '--partition', stdout=StringIO())
+
+    def constraints(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT contype, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype IN ('c', 'f') ORDER BY 1, 2",
+                [table])
+            return cursor.fetchall()
+
+    @skipUnless(connection.vendor == 'postgresql', "Partitioning needs PostgreSQL")
+    def test_partition_keeps_rows_and_constraints(self):
+        order = Order.objects.create(table=self.table, waitress=self.waitress)
+        table = Order.history.model._meta.db_table
+        constraints = self.constraints(table)
+
+        created = HistoryRetention(archive_dir=self.tmp.name).partition(Order, ahead=1)
+        self.assertTrue(created)
+        self.assertTrue(HistoryRetention._is_partitioned(table))
+        self.assertEqual(self.constraints(table), constraints)
+        self.assertEqual(Order.history.filter(id=order.pk).count(), 1)
+
+        # New records get ids from the new sequence
+        order.is_paid = True
+        order.save()
+        self.assertEqual(Order.history.filter(id=order.pk).count(), 2)
+        self.assertEqual(HistoryRetention(archive_dir=self.tmp.name).partition(Order, ahead=1), [])
@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.meals.models import Meal
+from apps.orders.admin import timeline
+from apps.orders.models import Order, OrderItem
+from apps.tables.models import Room, Table
+from apps.users.models import User
+
+
+class HistoryTimelineTestCase(TestCase):
+    def setUp(self):
+        self.waitress = User.objects.create_user(
+            username='timeline_waitress', password='pass', type='waitress')
+        room = Room.objects.create(name='Zal')
+        self.table = Table.objects.create(number='3', room=room)
+        self.meal = Meal.objects.create(name='Dolma', price=Decimal('5.00'))
+
+    def make_order(self):
+        order = Order.objects.create(table=self.table, waitress=self.waitress)
+        item = OrderItem.objects.create(
+            order=order, meal=self.meal, price=Decimal('5.00'))
+        order.total_price = Decimal('5.00')
+        order.save()
+        item.quantity = 3
+        item.save()
+        order.is_paid = True
+        order.save()
+        return order
+
+    def test_diffs_of_a_page(self):
+        order = self.make_order()
+        page = timeline.load_page(timeline.HistoricalOrder.objects.filter(id=order.pk))
+
+        lines = [lines for _record, lines in page.entries]
+        self.assertEqual(len(lines), 3)
+        paid, priced, created = lines
+        self.assertEqual(created, ["Yeni sifariş yaradıldı"])
+        self.assertTrue(any(line.startswith("Ödənilib ?: Xeyr → Bəli") for line in paid))
+        self.assertTrue(any("Miqdar: 1 → 3 (1 ədəd)" in line for line in paid))
+        self.assertTrue(any("0.00 → 5.00" in line for line in priced))
+        self.assertTrue(any(line.startswith("Əlavə edildi: ") for line in priced))
+
+    def test_queries_do_not_grow_with_the_page(self):
+        self.make_order()
+        with self.assertNumQueries(2):
+            timeline.load_page()
+        for _ in range(5):
+            self.make_order()
+        with self.assertNumQueries(2):
+            page = timeline.load_page()
+        self.assertEqual(len(page.entries), 18)
+
+        # Previous order and item records off the page: one query each
+        with self.assertNumQueries(4):
+            page = timeline.load_page(page_size=1)
+        self.assertTrue(any("Miqdar: 1 → 3" in line for line in page.entries[0][1]))
+
+    def test_keyset_pagination(self):
+        for _ in range(3):
+            self.make_order()
+        expected = list(timeline.HistoricalOrder.objects.values_list('history_id', flat=True))
+
+        seen, pages, cursor = [], [], None
+        while True:
+            page = timeline.load_page(before=cursor, page_size=4)
+            pages.append(page)
+            seen += [record.history_id for record, _lines in page.entries]
+            cursor = page.older
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+        self.assertIsNone(pages[0].newer)
+
+        back = timeline.load_page(after=pages[1].newer, page_size=4)
+        self.assertEqual(
+            [record.history_id for record, _lines in back.entries],
+            [record.history_id for record, _lines in pages[0].entries])
+        self.assertIsNone(back.newer)
+
+    def test_admin_timeline(self):
+        order = self.make_order()
+        other = self.make_order()
+        admin = User.objects.create_superuser(username='admin', password='pass')
+        self.client.force_login(admin)
+
+        url = reverse('admin:orders_historicalorder_changelist')
+        response = self.client.get(url, {'id': order.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Yeni sifariş yaradıldı")
+        records = [record for record, _lines in response.context['page'].entries]
+        self.assertEqual({record.id for record in records}, {order.pk})
+        self.assertNotIn(other.pk, {record.id for record in records})
+
+        # A malformed cursor falls back to the first page
+        response = self.client.get(url, {'before': 'garbage'})
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,90 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.meals.models import Meal
+from apps.orders.models import Order, Statistics
+from apps.payments.models import Payment
+from apps.tables.models import Room, Table
+from apps.users.models import User
+
+
+class IndexUsageTestCase(TestCase):
+    """
+    The hot queries must be served by the composite/partial indexes
+    (checked with EXPLAIN on SQLite and PostgreSQL).
+    """
+
+    def setUp(self):
+        room = Room.objects.create(name='Zal')
+        self.table = Table.objects.create(number='1', room=room)
+        self.meal = Meal.objects.create(name='Dolma', price=Decimal('5.00'))
+        self.order = Order.objects.create(table=self.table, is_main=True)
+
+    def assertUsesIndex(self, queryset, *index_names):
+        if connection.vendor == 'postgresql':
+            # Tiny test tables are cheaper to scan; make the planner
+            # show which index it would use.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertTrue(
+            any(name in plan for name in index_names),
+            f"None of {index_names} used by:\n{plan}"
+        )
+
+    def test_table_floor(self):
+        self.assertUsesIndex(
+            self.table.orders.exclude(is_deleted=True).filter(
+                is_paid=False, is_main=True),
+            'order_open_table_idx', 'order_table_state_idx'
+        )
+
+    def test_add_item(self):
+        # The table's main open order (`.first()`); with an order_id the
+        # lookup is by primary key
+        self.assertUsesIndex(
+            self.table.orders.exclude(is_deleted=True).filter(
+                is_paid=False, is_main=True).order_by('pk')[:1],
+            'order_open_table_idx'
+        )
+        self.assertUsesIndex(
+            self.order.order_items.filter(meal=self.meal, confirmed=False),
+            'orderitem_order_meal_conf_idx', 'orderitem_unconfirmed_idx'
+        )
+
+    def test_confirm(self):
+        self.assertUsesIndex(
+            self.order.order_items.filter(confirmed=False),
+            'orderitem_unconfirmed_idx', 'orderitem_order_meal_conf_idx'
+        )
+
+    def test_report(self):
+        now = timezone.now()
+        self.assertUsesIndex(
+            Order.objects.filter(
+                is_paid=True,
+                created_at__range=(now - timedelta(days=1), now)
+            ),
+            'order_paid_created_idx'
+        )
+
+    def test_payments_by_orders(self):
+        self.assertUsesIndex(
+            Payment.objects.filter(orders__in=[self.order]),
+            'payment_orders_order_pay_idx'
+        )
+
+    def test_shift_lookup(self):
+        user = User.objects.create_user(
+            username='index_admin', password='pass', type='admin')
+        self.assertUsesIndex(
+            Statistics.objects.filter(
+                title='till_now', is_closed=False,
+                is_z_checked=False, started_by=user
+            ),
+            'statistics_shift_state_idx'
+        )
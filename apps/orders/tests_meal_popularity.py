@@ -0,0 +1,117 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.meals.models import Meal
+from apps.orders.analytics import popularity
+from apps.orders.analytics.popularity import compute_popularity
+from apps.orders.models import MealPairing, MealPopularity, Order, OrderItem
+from apps.tables.models import Room, Table
+from apps.users.models import User
+
+
+class MealPopularityTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='popular_waitress', password='pass', type='waitress')
+        self.hall = Room.objects.create(name='Zal')
+        self.terrace = Room.objects.create(name='Terras')
+        self.hall_table = Table.objects.create(number='1', room=self.hall)
+        self.terrace_table = Table.objects.create(number='2', room=self.terrace)
+        # Publish the menu version so the snapshot includes these meals
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tea = Meal.objects.create(name='Çay', price=Decimal('2.00'))
+            self.pakhlava = Meal.objects.create(name='Paxlava', price=Decimal('3.00'))
+            self.kebab = Meal.objects.create(name='Kabab', price=Decimal('9.00'))
+        self.at_noon = timezone.localtime().replace(
+            hour=12, minute=30) - timedelta(days=1)
+
+        for _ in range(3):
+            self.order(self.hall_table, (self.tea, 2), (self.pakhlava, 1))
+        self.order(self.terrace_table, (self.kebab, 4))
+        self.order(self.terrace_table, (self.kebab, 1), (self.tea, 1))
+
+    def order(self, table, *lines):
+        order = Order.objects.create(table=table, waitress=self.user)
+        for meal, quantity in lines:
+            OrderItem.objects.create(
+                order=order, meal=meal, quantity=quantity,
+                price=meal.price * quantity, item_added_at=self.at_noon)
+        return order
+
+    def compute(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            compute_popularity()
+
+    def get(self, **params):
+        return self.client.get(
+            '/api/orders/quick-picks/', params, HTTP_X_PIN=self.user.username)
+
+    def test_compute_tables(self):
+        compute_popularity()
+
+        hall = list(MealPopularity.objects.filter(room=self.hall, hour=12)
+                    .values_list('meal_id', 'quantity', 'orders', 'rank'))
+        self.assertEqual(hall, [(self.tea.id, 6, 3, 1), (self.pakhlava.id, 3, 3, 2)])
+        house = list(MealPopularity.objects.filter(room=None, hour=12)
+                     .values_list('meal_id', 'quantity'))
+        self.assertEqual(house, [(self.tea.id, 7), (self.kebab.id, 5), (self.pakhlava.id, 3)])
+
+        # Tea and pakhlava were ordered together 3 times; tea and kebab once
+        pairing = MealPairing.objects.get(meal=self.pakhlava)
+        self.assertEqual(pairing.paired_meal, self.tea)
+        self.assertEqual(pairing.orders, 3)
+        self.assertEqual(pairing.confidence, 1.0)
+        self.assertAlmostEqual(
+            MealPairing.objects.get(meal=self.tea).confidence, 0.75)
+        self.assertFalse(MealPairing.objects.filter(meal=self.kebab).exists())
+
+    def test_orders_of_closed_shifts_are_counted(self):
+        # Closing a shift flags its orders as deleted
+        Order.objects.update(is_deleted=True)
+        compute_popularity()
+
+        house = list(MealPopularity.objects.filter(room=None, hour=12)
+                     .values_list('meal_id', 'quantity'))
+        self.assertEqual(house, [(self.tea.id, 7), (self.kebab.id, 5), (self.pakhlava.id, 3)])
+        self.assertEqual(MealPairing.objects.get(meal=self.pakhlava).orders, 3)
+
+    def test_quick_picks_api_does_not_read_order_items(self):
+        self.compute()
+        self.get(hour=12)  # warm the in-memory copy
+
+        with self.assertNumQueries(1):  # the X-PIN user
+            response = self.get(room_id=self.terrace.id, hour=12, meal_ids=str(self.pakhlava.id))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            [(row['name'], row['quantity']) for row in data['top_sellers']],
+            [('Kabab', 5), ('Çay', 1)])
+        self.assertEqual(
+            [(row['name'], row['score']) for row in data['ordered_together']],
+            [('Çay', 1.0)])
+
+    def test_room_without_history_falls_back_to_house(self):
+        self.compute()
+        garden = Room.objects.create(name='Bağ')
+        response = self.get(room_id=garden.id, hour=12)
+        self.assertEqual(response.json()['top_sellers'][0]['name'], 'Çay')
+        self.assertEqual(self.get(hour=25).status_code, 400)
+
+    def test_published_version_is_read_at_most_every_few_seconds(self):
+        self.compute()
+        popularity.top_sellers(12)
+
+        # Another process publishes new tables
+        cache.set(popularity.VERSION_KEY, -1, None)
+        with self.assertNumQueries(0), mock.patch.object(cache, 'get') as cache_get:
+            popularity.top_sellers(12)
+        cache_get.assert_not_called()
+
+        with mock.patch.object(popularity, 'VERSION_CHECK_SECONDS', 0), \
+                self.assertNumQueries(2):
+            popularity.top_sellers(12)
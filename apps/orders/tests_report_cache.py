@@ -0,0 +1,66 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.orders.analytics import report_cache
+from apps.orders.models import Order, WorkPeriodConfig
+from apps.tables.models import Room, Table
+from apps.users.models import User
+
+
+class ReportCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkPeriodConfig.objects.create(
+                name='Gün', start_time=time(12, 0), end_time=time(2, 0))
+        self.user = User.objects.create_user(
+            username='report_waitress', password='pass', type='waitress')
+        self.table = Table.objects.create(number='1', room=Room.objects.create(name='Zal'))
+        self.today = report_cache.current_work_date()
+
+    def add_order(self, work_date, total):
+        """An unpaid order placed an hour into the work period of work_date."""
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(
+                table=self.table, waitress=self.user, total_price=Decimal(total))
+            order.created_at = timezone.make_aware(
+                datetime.combine(work_date, time(13, 0)))
+            order.save()
+        return order
+
+    def report(self, work_date):
+        response = self.client.get(f'/orders/period-report/?date={work_date.isoformat()}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_open_period_is_cached_until_data_changes(self):
+        first = self.report(self.today)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.report(self.today)['cached_at'], first['cached_at'])
+
+        self.add_order(self.today, '12.50')
+        self.assertEqual(self.report(self.today)['unpaid_total'], 12.5)
+
+    def test_closed_period_survives_live_changes(self):
+        past = self.today - timedelta(days=3)
+        self.add_order(past, '5.00')
+        self.assertEqual(self.report(past)['unpaid_total'], 5.0)
+
+        self.add_order(self.today, '7.00')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.report(past)['unpaid_total'], 5.0)
+
+        # Changing an order of a closed period invalidates it
+        self.add_order(past, '1.00')
+        self.assertEqual(self.report(past)['unpaid_total'], 6.0)
+
+    def test_config_change_invalidates(self):
+        first = self.report(self.today)
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkPeriodConfig.objects.update(name='Yeni')
+            WorkPeriodConfig.objects.first().save()
+        self.assertNotEqual(self.report(self.today)['cached_at'], first['cached_at'])
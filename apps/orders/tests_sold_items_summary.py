@@ -0,0 +1,71 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.meals.models import Meal, MealCategory, MealGroup
+from apps.orders.models import (Order, OrderItem, OrderItemDeletionLog,
+                                Statistics)
+from apps.tables.models import Room, Table
+from apps.users.models import User
+
+
+class SoldItemsSummaryTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='summary_admin', password='pass', type='admin')
+        room = Room.objects.create(name='Zal')
+        self.table = Table.objects.create(number='1', room=room)
+
+        group = MealGroup.objects.create(name='İçkilər')
+        category = MealCategory.objects.create(name='Çay', group=group)
+        self.tea = Meal.objects.create(
+            name='Çay', price=Decimal('2.00'), category=category)
+        self.bread = Meal.objects.create(name='Çörək', price=Decimal('1.00'))
+
+        self.stat = Statistics.objects.create(
+            title='till_now', started_by=self.user)
+        order = Order.objects.create(table=self.table, waitress=self.user)
+        for _ in range(3):
+            OrderItem.objects.create(
+                order=order, meal=self.tea, price=Decimal('2.00'))
+        OrderItem.objects.create(
+            order=order, meal=self.bread, quantity=2, price=Decimal('2.00'))
+        self.stat.orders.add(order)
+
+        OrderItemDeletionLog.objects.create(
+            order_id=order.id, order_item_id=0, table_id=self.table.id,
+            waitress_name='', meal_name='Çay', quantity=1,
+            price=Decimal('2.00'), customer_number=1,
+            reason=OrderItemDeletionLog.REASON_WASTE,
+        )
+
+    def test_groups_and_totals(self):
+        summary = Statistics.objects.sold_items_summary(self.stat)
+
+        groups = {g['name']: g for g in summary['groups']}
+        self.assertEqual(set(groups), {'İçkilər', 'Digər'})
+        self.assertEqual(groups['İçkilər']['qty'], 3)
+        self.assertEqual(groups['İçkilər']['total'], Decimal('6.00'))
+        self.assertEqual(groups['Digər']['meals'][0]['qty'], 2)
+        self.assertEqual(summary['qty'], 5)
+        self.assertEqual(summary['total'], Decimal('8.00'))
+
+        self.assertEqual(len(summary['deleted']), 1)
+        waste = summary['deleted'][0]
+        self.assertEqual(waste['reason'], OrderItemDeletionLog.REASON_WASTE)
+        self.assertEqual(waste['qty'], 1)
+        self.assertEqual(waste['total'], Decimal('2.00'))
+
+    def test_closed_shift_is_cached(self):
+        self.stat.is_closed = True
+        self.stat.end_time = timezone.now() + timedelta(minutes=1)
+        self.stat.save()
+
+        first = Statistics.objects.sold_items_summary(self.stat)
+        with self.assertNumQueries(0):
+            second = Statistics.objects.sold_items_summary(self.stat)
+        self.assertEqual(first['total'], second['total'])
@@ -0,0 +1,276 @@
+import asyncio
+import threading
+import time as time_module
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import httpx
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from apps.orders.analytics import report_cache
+from apps.orders.models import BotSubscription, OrderItemDeletionLog, WorkPeriodConfig
+from apps.orders.telegram_bot import push
+from apps.orders.telegram_bot.bot import RestaurantBot
+from apps.orders.telegram_bot.webhook import WebhookRunner, get_runner
+from apps.payments.models import Payment
+from apps.tables.models import Room, Table
+
+
+class BotBackendCallsTestCase(SimpleTestCase):
+    @override_settings(TELEGRAM_BOT_MAX_API_CALLS=2)
+    def test_backend_calls_are_async_and_bounded(self):
+        bot = RestaurantBot('123456:TEST')
+        in_flight = peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json={'path': request.url.path})
+
+        async def run():
+            bot._http = httpx.AsyncClient(
+                base_url=bot.base_url, transport=httpx.MockTransport(handler))
+            try:
+                return await asyncio.gather(*(
+                    bot.api_get(f'/orders/period-report/?date=2025-01-0{i}')
+                    for i in range(1, 7)
+                ))
+            finally:
+                await bot.close_http()
+
+        responses = asyncio.run(run())
+        self.assertEqual([r.status_code for r in responses], [200] * 6)
+        self.assertEqual(peak, 2)
+        self.assertIsNone(bot._http)
+
+
+
+class BotReportCacheTestCase(TransactionTestCase):
+    # The bot reads the cache from another thread (sync_to_async)
+    def setUp(self):
+        cache.clear()
+        self.bot = RestaurantBot('123456:TEST')
+        self.day = date(2025, 3, 10)
+
+    def get_report(self):
+        with mock.patch.object(
+                RestaurantBot, 'api_get', return_value=httpx.Response(200, json={})) as api_get:
+            response = asyncio.run(self.bot.get_report(
+                '/orders/period-report/', 'period', self.day, self.day))
+        return response, api_get
+
+    def test_entries_of_the_shared_cache_are_used(self):
+        report_cache.get_or_compute('period', self.day, self.day, lambda: {'total': 5})
+        # The test LocMem cache stands in for Redis
+        with mock.patch('apps.commons.cache.is_shared', return_value=True):
+            response, api_get = self.get_report()
+        api_get.assert_not_called()
+        self.assertEqual(response.json()['total'], 5)
+
+    def test_per_process_cache_goes_to_the_api(self):
+        report_cache.get_or_compute('period', self.day, self.day, lambda: {'total': 5})
+        _response, api_get = self.get_report()
+        api_get.assert_called_once()
+
+
+class PushReportsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkPeriodConfig.objects.create(
+                name='Gün', start_time=time(12, 0), end_time=time(2, 0))
+        self.table = Table.objects.create(number='7', room=Room.objects.create(name='Zal'))
+        self.day = date(2025, 3, 10)
+
+    def at(self, day, hour, minute=0):
+        return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+    def kinds(self, now):
+        return [kind for kind, _text in push.collect(now)]
+
+    def test_daily_summary_once_after_close(self):
+        closed = self.at(self.day + timedelta(days=1), 2, 5)
+        messages = push.collect(closed)
+        self.assertEqual([kind for kind, _ in messages], ['daily_summary'])
+        self.assertIn('10.03.2025', messages[0][1])
+        self.assertEqual(self.kinds(closed + timedelta(minutes=1)), [])
+
+    def test_hourly_snapshot_during_service(self):
+        self.assertEqual(self.kinds(self.at(self.day, 15, 2)), ['hourly_snapshot'])
+        self.assertEqual(self.kinds(self.at(self.day, 15, 30)), [])
+        self.assertEqual(self.kinds(self.at(self.day, 16, 0)), ['hourly_snapshot'])
+        # Not at opening, nor outside service hours
+        self.assertEqual(self.kinds(self.at(self.day, 12, 1)), [])
+        self.assertEqual(self.kinds(self.at(self.day + timedelta(days=1), 9, 0)), [])
+
+    @override_settings(TELEGRAM_ALERT_DISCOUNT=Decimal('20'), TELEGRAM_ALERT_VOIDS=3)
+    def test_alerts(self):
+        Payment.objects.create(
+            table=self.table, total_price=100, discount_amount=25,
+            final_price=75, paid_amount=75)
+        Payment.objects.create(
+            table=self.table, total_price=50, discount_amount=5,
+            final_price=45, paid_amount=45)
+        for _ in range(3):
+            OrderItemDeletionLog.objects.create(
+                order_id=1, order_item_id=1, table_id=self.table.id,
+                waitress_name='', meal_name='Çay', quantity=1,
+                price=Decimal('2.00'), customer_number=1,
+                reason=OrderItemDeletionLog.REASON_WASTE)
+
+        now = timezone.now() + timedelta(seconds=1)
+        alerts = [text for kind, text in push.collect(now) if kind == 'alerts']
+        self.assertEqual(len(alerts), 2)
+        self.assertIn('25.00 AZN', alerts[0])
+        self.assertIn('6.00 AZN', alerts[1])
+        # Nothing new: no repeated alerts
+        self.assertEqual(
+            [kind for kind, _ in push.collect(now + timedelta(minutes=1)) if kind == 'alerts'], [])
+
+    def test_subscribers_by_kind(self):
+        BotSubscription.objects.create(chat_id=1)
+        BotSubscription.objects.create(chat_id=2, alerts=False)
+        self.assertEqual(sorted(push.subscribers('alerts')), [1])
+        self.assertEqual(sorted(push.subscribers('daily_summary')), [1, 2])
+
+
+# Updates as recorded from Telegram
+RECORDED_START = {
+    "update_id": 815294301,
+    "message": {
+        "message_id": 412,
+        "from": {"id": 5123456789, "is_bot": False, "first_name": "Kamran",
+                 "language_code": "az"},
+        "chat": {"id": 5123456789, "first_name": "Kamran", "type": "private"},
+        "date": 1741610412,
+        "text": "/start",
+        "entities": [{"offset": 0, "length": 6, "type": "bot_command"}],
+    },
+}
+RECORDED_CALLBACK = {
+    "update_id": 815294302,
+    "callback_query": {
+        "id": "2200456123456789012",
+        "from": {"id": 5123456789, "is_bot": False, "first_name": "Kamran"},
+        "message": {
+            "message_id": 413,
+            "from": {"id": 123456, "is_bot": True, "first_name": "KAZZA",
+                     "username": "kazza_bot"},
+            "chat": {"id": 5123456789, "first_name": "Kamran", "type": "private"},
+            "date": 1741610420,
+            "text": "Sifarişlər",
+        },
+        "chat_instance": "-6543210987654321",
+        "data": "daily_report",
+    },
+}
+
+
+class WebhookTestCase(SimpleTestCase):
+    def wait_for(self, mocked, timeout=5):
+        deadline = time_module.monotonic() + timeout
+        while not mocked.await_count and time_module.monotonic() < deadline:
+            time_module.sleep(0.01)
+        self.assertTrue(mocked.await_count, f"{mocked} was not awaited")
+
+    @mock.patch.object(RestaurantBot, 'start_pushes', new_callable=mock.AsyncMock)
+    @mock.patch.object(RestaurantBot, 'button_callback', new_callable=mock.AsyncMock)
+    @mock.patch.object(RestaurantBot, 'start', new_callable=mock.AsyncMock)
+    @mock.patch('telegram.Bot._post', new_callable=mock.AsyncMock)
+    def test_recorded_updates_reach_the_handlers(self, post, start, button_callback, _pushes):
+        # getMe, the only Bot API call made with the handlers mocked
+        post.return_value = {
+            "id": 123456, "is_bot": True, "first_name": "KAZZA", "username": "kazza_bot"}
+        runner = WebhookRunner(RestaurantBot('123456:TEST'))
+        runner.start()
+        try:
+            self.assertTrue(runner.submit(RECORDED_START))
+            self.assertTrue(runner.submit(RECORDED_CALLBACK))
+            self.wait_for(start)
+            self.wait_for(button_callback)
+        finally:
+            runner.stop()
+
+        # Web workers do not send the scheduled pushes
+        _pushes.assert_not_awaited()
+        update = start.await_args.args[0]
+        self.assertEqual(update.message.text, '/start')
+        self.assertEqual(button_callback.await_args.args[0].callback_query.data, 'daily_report')
+
+    @override_settings(TELEGRAM_WEBHOOK_URL='https://example.com/orders/telegram/webhook/',
+                       TELEGRAM_WEBHOOK_SECRET='s3cret')
+    @mock.patch.object(RestaurantBot, 'run')
+    @mock.patch.object(RestaurantBot, 'run_pushes')
+    def test_command_sends_pushes_in_webhook_mode(self, run_pushes, run):
+        call_command('run_telegram_bot', '--token', '123456:TEST', stdout=StringIO())
+        run_pushes.assert_called_once_with()
+        run.assert_not_called()
+
+    @override_settings(TELEGRAM_WEBHOOK_URL='https://example.com/orders/telegram/webhook/',
+                       TELEGRAM_WEBHOOK_SECRET='')
+    @mock.patch.object(RestaurantBot, 'run_pushes')
+    def test_webhook_mode_requires_a_secret(self, run_pushes):
+        with mock.patch('telegram.Bot.set_webhook', new_callable=mock.AsyncMock) as set_webhook:
+            call_command('run_telegram_bot', '--token', '123456:TEST', '--set-webhook',
+                         stdout=StringIO())
+        set_webhook.assert_not_awaited()
+        call_command('run_telegram_bot', '--token', '123456:TEST', stdout=StringIO())
+        run_pushes.assert_not_called()
+        with self.assertRaises(ImproperlyConfigured):
+            get_runner()
+
+        # Without a secret every update is refused
+        response = self.client.post(
+            '/orders/telegram/webhook/', RECORDED_START, content_type='application/json',
+            HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(TELEGRAM_WEBHOOK_QUEUE_SIZE=1)
+    def test_full_queue_pushes_back(self):
+        runner = WebhookRunner(RestaurantBot('123456:TEST'))
+        # The loop runs but the application does not consume the queue
+        thread = threading.Thread(target=runner.loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            self.assertTrue(runner.submit(RECORDED_START))
+            self.assertFalse(runner.submit(RECORDED_CALLBACK))
+        finally:
+            runner.loop.call_soon_threadsafe(runner.loop.stop)
+            thread.join(5)
+
+    @override_settings(TELEGRAM_WEBHOOK_SECRET='s3cret', TELEGRAM_WEBHOOK_URL='')
+    def test_webhook_view(self):
+        url = '/orders/telegram/webhook/'
+        response = self.client.post(url, RECORDED_START, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.post(
+            url, RECORDED_START, content_type='application/json',
+            HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='s3cret')
+        self.assertEqual(response.status_code, 503)  # webhook mode is off
+
+        with mock.patch('apps.orders.telegram_bot.api_view.get_runner') as get_runner:
+            get_runner.return_value.submit.return_value = True
+            response = self.client.post(
+                url, RECORDED_START, content_type='application/json',
+                HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='s3cret')
+        self.assertEqual(response.status_code, 200)
+        get_runner.return_value.submit.assert_called_once_with(RECORDED_START)
+
+        with mock.patch('apps.orders.telegram_bot.api_view.get_runner') as get_runner, \
+                self.assertLogs('apps.orders.telegram_bot.api_view', 'ERROR'):
+            get_runner.return_value.submit.side_effect = RuntimeError('token=123456:TEST')
+            response = self.client.post(
+                url, RECORDED_START, content_type='application/json',
+                HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='s3cret')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json(), {'error': 'Internal error'})
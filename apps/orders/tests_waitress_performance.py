@@ -0,0 +1,122 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.meals.models import Meal
+from apps.orders.models import (Order, OrderItem, OrderItemDeletionLog,
+                                Statistics)
+from apps.payments.models import Payment
+from apps.tables.models import Room, Table
+from apps.users.models import User
+
+
+class WaitressPerformanceTestCase(TestCase):
+    def setUp(self):
+        self.waitress = User.objects.create_user(
+            username='perf_waitress', password='pass', type='waitress',
+            first_name='Aysel', last_name='Məmmədova')
+        room = Room.objects.create(name='Zal')
+        self.table = Table.objects.create(number='1', room=room)
+        meal = Meal.objects.create(name='Dolma', price=Decimal('5.00'))
+
+        self.now = timezone.now()
+        for total, covers, items in ((Decimal('10.00'), 2, 2), (Decimal('20.00'), 4, 4)):
+            order = Order.objects.create(
+                table=self.table, waitress=self.waitress, is_paid=True,
+                total_price=total, customer_count=covers)
+            OrderItem.objects.create(
+                order=order, meal=meal, quantity=items, price=total)
+            Order.objects.filter(pk=order.pk).update(
+                created_at=self.now - timedelta(minutes=30))
+            payment = Payment.objects.create(
+                table=self.table, total_price=total, final_price=total,
+                paid_amount=total)
+            payment.orders.add(order)
+
+        # Unpaid orders are not part of the performance
+        Order.objects.create(
+            table=self.table, waitress=self.waitress,
+            total_price=Decimal('99.00'))
+
+        OrderItemDeletionLog.objects.create(
+            order_id=order.id, order_item_id=0, table_id=self.table.id,
+            waitress_name=self.waitress.get_full_name(), meal_name='Dolma',
+            quantity=1, price=Decimal('5.00'), customer_number=1,
+            reason=OrderItemDeletionLog.REASON_WASTE,
+        )
+
+    def test_rollup(self):
+        rows = Statistics.objects.waitress_performance(
+            self.now - timedelta(hours=1), self.now + timedelta(hours=1))
+
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual(row['waitress_id'], self.waitress.id)
+        self.assertEqual(row['revenue'], Decimal('30.00'))
+        self.assertEqual(row['orders'], 2)
+        self.assertEqual(row['covers'], 6)
+        self.assertEqual(row['average_ticket'], Decimal('15.00'))
+        self.assertEqual(row['items_per_order'], 3)
+        self.assertEqual(row['voids']['qty'], 1)
+        self.assertEqual(row['voids']['total'], Decimal('5.00'))
+        self.assertEqual(row['returns']['qty'], 0)
+        self.assertAlmostEqual(row['average_table_minutes'], 30, delta=1)
+
+    def test_waitresses_with_the_same_name_stay_apart(self):
+        namesake = User.objects.create_user(
+            username='perf_namesake', password='pass', type='waitress',
+            first_name='Aysel', last_name='Məmmədova')
+        order = Order.objects.create(
+            table=self.table, waitress=namesake, is_paid=True,
+            total_price=Decimal('7.00'), customer_count=1)
+        OrderItemDeletionLog.objects.create(
+            order_id=order.id, order_item_id=0, table_id=self.table.id,
+            waitress_name=namesake.get_full_name(), meal_name='Dolma',
+            quantity=2, price=Decimal('5.00'), customer_number=1,
+            reason=OrderItemDeletionLog.REASON_RETURN,
+        )
+
+        rows = {
+            row['waitress_id']: row
+            for row in Statistics.objects.waitress_performance(
+                self.now - timedelta(hours=1), self.now + timedelta(hours=1))
+        }
+        self.assertEqual(set(rows), {self.waitress.id, namesake.id})
+        self.assertEqual(rows[self.waitress.id]['revenue'], Decimal('30.00'))
+        self.assertEqual(rows[self.waitress.id]['voids']['qty'], 1)
+        self.assertEqual(rows[self.waitress.id]['returns']['qty'], 0)
+        self.assertEqual(rows[namesake.id]['revenue'], Decimal('7.00'))
+        self.assertEqual(rows[namesake.id]['returns']['qty'], 2)
+
+    def test_per_waitress_rows_are_updated_in_place(self):
+        date = timezone.localdate(self.now - timedelta(minutes=30))
+        # Row written by the earlier implementation
+        Statistics.objects.create(
+            title='per_waitress', date=date,
+            waitress_info='perf_waitress - Aysel Məmmədova', total=Decimal('1.00'),
+            started_by=self.waitress)
+
+        Statistics.objects.calculate_per_waitress(date)
+        Statistics.objects.calculate_per_waitress(date)
+
+        stats = Statistics.objects.filter(title='per_waitress', date=date)
+        self.assertEqual(
+            list(stats.values_list('waitress_info', 'total')),
+            [('perf_waitress - Aysel Məmmədova', Decimal('30.00'))])
+
+    def test_api(self):
+        response = self.client.get('/orders/waitress-performance/', {
+            'start_date': (self.now - timedelta(hours=1)).isoformat(),
+            'end_date': (self.now + timedelta(hours=1)).isoformat(),
+        })
+
+        self.assertEqual(response.status_code, 200)
+        waitresses = response.json()['waitresses']
+        self.assertEqual(waitresses[0]['waitress'], 'Aysel Məmmədova')
+        self.assertEqual(waitresses[0]['revenue'], 30.0)
+
+    def test_api_requires_range(self):
+        response = self.client.get('/orders/waitress-performance/')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Payments are looked up by their orders (`Payment.objects.filter(
+    orders__in=...)`). The auto-created M2M table only has single-column
+    FK indexes, so add a covering (order_id, payment_id) index that lets
+    the lookup resolve payment ids from the index alone.
+    """
+
+    dependencies = [
+        ("payments", "0003_alter_payment_payment_type"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=(
+                "CREATE INDEX payment_orders_order_pay_idx "
+                "ON payments_payment_orders (order_id, payment_id);"
+            ),
+            reverse_sql="DROP INDEX payment_orders_order_pay_idx;",
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:39
+
+from django.db import migrations, models
+
+
+def fill_updated_at(apps, schema_editor):
+    # Existing rows count as last changed when they were created
+    Payment = apps.get_model('payments', 'Payment')
+    PaymentMethod = apps.get_model('payments', 'PaymentMethod')
+    Payment.objects.filter(updated_at__isnull=True).update(updated_at=models.F('paid_at'))
+    PaymentMethod.objects.filter(updated_at__isnull=True).update(
+        updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_payment_orders_order_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, null=True, verbose_name='Yeniləndi'),
+        ),
+        migrations.AddField(
+            model_name='paymentmethod',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, null=True, verbose_name='Yeniləndi'),
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ]
@@ -24,6 +24,7 @@ class PaymentMethod(models.Model):
         _("Ödəniş növü"), max_length=20, choices=PaymentType.choices
     )
     created_at = models.DateTimeField(_("Yaradılma tarixi"), auto_now_add=True)
+    updated_at = models.DateTimeField(_("Yeniləndi"), auto_now=True, null=True)
 
     class Meta:
         verbose_name = _("Ödəniş növü")
@@ -69,6 +70,7 @@ class Payment(models.Model):
         "Operator"), on_delete=models.SET_NULL, null=True
     )
     paid_at = models.DateTimeField(_("Ödəmə tarixi"), auto_now_add=True)
+    updated_at = models.DateTimeField(_("Yeniləndi"), auto_now=True, null=True)
 
     class Meta:
         verbose_name = _("Ödəmə")
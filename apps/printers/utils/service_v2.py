@@ -529,29 +529,12 @@ class PrinterService:
 
     @staticmethod
     def print_order_items_summary(stat_id, user=None):
-        from decimal import Decimal
-        from datetime import datetime
-        from django.db.models import Min
-        from django.utils import timezone
-        from apps.orders.models.order import OrderItem
-        from apps.orders.models.order_deletion import OrderItemDeletionLog
-
         try:
             stat = Statistics.objects.get(pk=stat_id)
         except Statistics.DoesNotExist:
             return False, f"Statistika id={stat_id} tapılmadı."
 
-        orders = Order.objects.all_orders().filter(statistics=stat)
-        order_items = OrderItem.objects.all_order_items().filter(order__in=orders).distinct()
-
-        # Determine actual shift time range
-        order_dates = orders.aggregate(earliest=Min('created_at'))
-        shift_start = order_dates['earliest']
-        shift_end = stat.end_time or timezone.now()
-
-        deleted_items = OrderItemDeletionLog.objects.filter(
-            deleted_at__range=(shift_start, shift_end)
-        )
+        summary = Statistics.objects.sold_items_summary(stat)
 
         width = 48
         lines = []
@@ -565,83 +548,37 @@ class PrinterService:
                 f"Istifadəçi: {user.get_full_name() or user.username}")
         lines.append("-" * width)
 
-        # Group active items first by MealGroup, then by Meal name
-        grouped = {}
-        for item in order_items.select_related("meal__category__group"):
-            group_name = (
-                item.meal.category.group.name
-                if item.meal and item.meal.category and item.meal.category.group
-                else "Digər"
-            )
-            meal_name = item.meal.name
-            grouped.setdefault(group_name, {})
-            agg = grouped[group_name].setdefault(
-                meal_name, {"qty": 0, "total": Decimal("0.00")})
-            agg["qty"] += item.quantity
-            agg["total"] += item.quantity * item.price
-
-        grand_total_qty = 0
-        grand_total_price = Decimal("0.00")
-
-        for group, meals in grouped.items():
-            lines.append(f"\n*** {group.upper()} ***")
+        # Active items grouped by MealGroup, then by Meal name
+        for group in summary["groups"]:
+            lines.append(f"\n*** {group['name'].upper()} ***")
             lines.append(f"{'Məhsul':<25}{'Miqdar':>6}{'Cəm':>15}")
 
-            group_qty = 0
-            group_price = Decimal("0.00")
-            for meal_name, agg in meals.items():
-                qty = agg["qty"]
-                total = agg["total"]
-                lines.append(f"{meal_name[:25]:<25}{qty:>6}{total:>15.2f}")
-                group_qty += qty
-                group_price += total
+            for meal in group["meals"]:
+                lines.append(
+                    f"{meal['name'][:25]:<25}{meal['qty']:>6}{meal['total']:>15.2f}")
 
             lines.append(
-                f"{'Qrup cəmi:':<25}{group_qty:>6}{group_price:>15.2f}")
+                f"{'Qrup cəmi:':<25}{group['qty']:>6}{group['total']:>15.2f}")
             lines.append("-" * width)
 
-            grand_total_qty += group_qty
-            grand_total_price += group_price
-
         lines.append(
-            f"{'CƏMİ':<25}{grand_total_qty:>6}{grand_total_price:>15.2f}")
+            f"{'CƏMİ':<25}{summary['qty']:>6}{summary['total']:>15.2f}")
         lines.append("=" * width)
 
-        # Append deleted items summary (unchanged logic, but also sums per meal)
-        if deleted_items.exists():
+        # Deleted items grouped by reason, then by meal name
+        if summary["deleted"]:
             lines.append("\n" + "SİLİNMİŞ MƏHSULLAR".center(width))
-            reasons = {
-                OrderItemDeletionLog.REASON_RETURN: "Anbara Qaytarma",
-                OrderItemDeletionLog.REASON_WASTE: "Tullantı"
-            }
-
-            for reason_code, reason_label in reasons.items():
-                reason_group = deleted_items.filter(reason=reason_code)
-                if not reason_group.exists():
-                    continue
-
-                # aggregate per meal_name
-                deleted_agg = {}
-                for item in reason_group:
-                    deleted_agg.setdefault(
-                        item.meal_name, {"qty": 0, "total": Decimal("0.00")})
-                    deleted_agg[item.meal_name]["qty"] += int(item.quantity)
-                    deleted_agg[item.meal_name]["total"] += item.quantity * item.price
-
-                lines.append(f"\n*** {reason_label.upper()} ***")
+
+            for reason in summary["deleted"]:
+                lines.append(f"\n*** {reason['label'].upper()} ***")
                 lines.append(f"{'Məhsul':<25}{'Miqdar':>6}{'Cəm':>15}")
 
-                reason_qty = 0
-                reason_price = Decimal("0.00")
-                for meal_name, agg in deleted_agg.items():
-                    qty = agg["qty"]
-                    total = agg["total"]
-                    lines.append(f"{meal_name[:25]:<25}{qty:>6}{total:>15.2f}")
-                    reason_qty += qty
-                    reason_price += total
+                for meal in reason["meals"]:
+                    lines.append(
+                        f"{meal['name'][:25]:<25}{meal['qty']:>6}{meal['total']:>15.2f}")
 
                 lines.append(
-                    f"{'Cəmi:':<25}{reason_qty:>6}{reason_price:>15.2f}")
+                    f"{'Cəmi:':<25}{reason['qty']:>6}{reason['total']:>15.2f}")
                 lines.append("-" * width)
 
         lines.append("\n" + "=" * width)
@@ -1,2 +1,2 @@
-from apps.users.apis.login import PinLoginAPIView
+from apps.users.apis.login import LogoutAPIView, PinLoginAPIView
 from apps.users.apis.networks import NetworkAPIView
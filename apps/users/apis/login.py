@@ -1,16 +1,23 @@
+from datetime import datetime
+
 from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from drf_yasg.utils import swagger_auto_schema
 
+from apps.users import tokens
 from apps.users.serializers import PinLoginSerializer
 
 User = get_user_model()
 
 
 class PinLoginAPIView(APIView):
+    # A stale token or PIN header must not block logging in again
+    authentication_classes = []
 
     @swagger_auto_schema(
         request_body=PinLoginSerializer,
@@ -31,13 +38,37 @@ class PinLoginAPIView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
+            if not user.is_active:
+                return Response(
+                    {'error': 'User account is inactive'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+
             # Return user details along with the token
+            token, payload = tokens.issue_token(user)
             return Response({
                 'username': user.username,
                 'role': user.type,
                 'full_name': user.get_full_name(),
+                'token': token,
+                'expires_at': datetime.fromtimestamp(
+                    payload['e'], tz=timezone.get_current_timezone()
+                ).isoformat(),
             })
         return Response(
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
+
+
+class LogoutAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        responses={204: 'Token revoked'},
+        operation_description="Revoke the session token of the request"
+    )
+    def post(self, request):
+        if isinstance(request.auth, dict):
+            tokens.revoke_token(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,5 +1,6 @@
 from django.urls import path
 
+from apps.users.apis import LogoutAPIView
 from apps.users.apis import PinLoginAPIView
 from apps.users.apis import NetworkAPIView
 
@@ -8,6 +9,10 @@ urlpatterns = [
         "login/",
         PinLoginAPIView.as_view(),
     ),
+    path(
+        "logout/",
+        LogoutAPIView.as_view(),
+    ),
     path(
         "network-ip/",
         NetworkAPIView.as_view(),
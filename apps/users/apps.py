@@ -1,7 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.users'
     verbose_name = "İstifadəçi"
+
+    def ready(self):
+        # Drop cached PIN lookups whenever a user changes.
+        from apps.users.auth import User, invalidate_user
+        post_save.connect(
+            invalidate_user, sender=User,
+            dispatch_uid="users_pin_cache_save"
+        )
+        post_delete.connect(
+            invalidate_user, sender=User,
+            dispatch_uid="users_pin_cache_delete"
+        )
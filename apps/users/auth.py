@@ -1,8 +1,149 @@
+import hashlib
+import hmac
+import threading
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
 from rest_framework import authentication, exceptions
 
+from apps.commons.cache import is_shared
+from apps.users import tokens
+
 User = get_user_model()
 
+# PIN -> user lookups are cached under an HMAC of the PIN (the PIN itself
+# never reaches the cache) as (pk, type, is_active) only. Saving or
+# deleting a user drops its entry. Only an out-of-process cache (Redis) is
+# used: with a per-process one the other workers would keep a deactivated
+# user or an old PIN.
+PIN_CACHE_PREFIX = "users:pin:"
+USER_PIN_KEY = "users:pin-of:{}"
+STATS_KEYS = {
+    "hits": "users:pin-stats:hits",
+    "misses": "users:pin-stats:misses",
+}
+_MISSING = "missing"
+
+# Hits and misses are counted in the process and added to the shared
+# counters every STATS_FLUSH_EVERY lookups, not on every request.
+STATS_FLUSH_EVERY = 100
+_stats_lock = threading.Lock()
+_local_stats = dict.fromkeys(STATS_KEYS, 0)
+
+
+def pin_cache_key(pin):
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(), str(pin).encode(), hashlib.sha256
+    ).hexdigest()
+    return PIN_CACHE_PREFIX + digest
+
+
+def _flush_stats(pending):
+    for stat, count in pending.items():
+        if not count:
+            continue
+        key = STATS_KEYS[stat]
+        if not cache.add(key, count, None):
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                cache.set(key, count, None)
+
+
+def _count(stat):
+    with _stats_lock:
+        _local_stats[stat] += 1
+        if sum(_local_stats.values()) < STATS_FLUSH_EVERY:
+            return
+        pending = dict(_local_stats)
+        _local_stats.update(dict.fromkeys(_local_stats, 0))
+    _flush_stats(pending)
+
+
+def partial_user(pk, user_type, is_active):
+    """A User with only id, type and is_active loaded; other fields load on access."""
+    values = {'id': pk, 'type': user_type, 'is_active': is_active}
+    # from_db takes the values in the order of the model's fields
+    names = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in values
+    ]
+    return User.from_db(User.objects.db, names, [values[name] for name in names])
+
+
+def get_user_by_pin(pin):
+    """The user whose username is the PIN, or None. Cached for PIN_AUTH_CACHE_TTL."""
+    if not is_shared():
+        return User.objects.filter(username=pin).first()
+
+    key = pin_cache_key(pin)
+    cached = cache.get(key)
+    if cached is not None:
+        _count("hits")
+        return None if cached == _MISSING else partial_user(*cached)
+
+    _count("misses")
+    user = User.objects.filter(username=pin).first()
+    ttl = settings.PIN_AUTH_CACHE_TTL
+    cache.set(
+        key, (user.pk, user.type, user.is_active) if user is not None else _MISSING, ttl)
+    if user is not None:
+        cache.set(USER_PIN_KEY.format(user.pk), key, ttl)
+    return user
+
+
+def _drop_user(user):
+    keys = [pin_cache_key(user.username)]
+    previous = cache.get(USER_PIN_KEY.format(user.pk))
+    if previous:
+        keys.append(previous)
+    cache.delete_many(keys + [USER_PIN_KEY.format(user.pk)])
+
+
+def invalidate_user(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    post_save/post_delete of User: covers PIN (username) changes, role
+    changes, deactivation and password changes; other saves (last_login,
+    names) change nothing. Dropped again on commit so a lookup made before
+    the commit is not kept; session tokens issued so far are revoked then
+    too.
+    """
+    if kwargs.get('signal') is post_save:
+        changed = created or instance.auth_fields_changed(update_fields)
+        instance.snapshot_auth_fields()
+        if not changed:
+            return
+
+    _drop_user(instance)
+    if instance.pk is not None:
+        user_id = instance.pk
+        revoke = not created
+        transaction.on_commit(lambda: (
+            _drop_user(instance), revoke and tokens.revoke_user_tokens(user_id)))
+
+
+def pin_cache_stats():
+    """The shared counters plus this process's lookups not added to them yet."""
+    shared = cache.get_many(list(STATS_KEYS.values()))
+    with _stats_lock:
+        hits = shared.get(STATS_KEYS["hits"], 0) + _local_stats["hits"]
+        misses = shared.get(STATS_KEYS["misses"], 0) + _local_stats["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
+
+
+def reset_pin_cache_stats():
+    with _stats_lock:
+        _local_stats.update(dict.fromkeys(_local_stats, 0))
+    cache.delete_many(list(STATS_KEYS.values()))
+
 
 class PINAuthentication(authentication.BaseAuthentication):
     def authenticate(self, request):
@@ -10,13 +151,38 @@ class PINAuthentication(authentication.BaseAuthentication):
         if not pin:
             return None
 
-        try:
-            user = User.objects.get(username=pin)
-            if not user.is_active:
-                raise exceptions.AuthenticationFailed(
-                    'User account is inactive')
-            return (user, None)
-        except User.DoesNotExist:
+        user = get_user_by_pin(pin)
+        if user is None:
             raise exceptions.AuthenticationFailed('No such user')
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                'User account is inactive')
+        return (user, None)
+
+
+class TokenAuthentication(authentication.BaseAuthentication):
+    """
+    `Authorization: Bearer <token>` with a token from PinLoginAPIView.
+
+    The user is built from the token without a query: id, role (`type`)
+    and is_active are set, other fields load on first access. The token
+    payload is available as `request.auth`.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header')
+
+        try:
+            payload = tokens.read_token(header[1].decode())
+        except (tokens.InvalidToken, UnicodeError) as e:
+            raise exceptions.AuthenticationFailed(str(e) or 'Invalid token')
+
+        return (partial_user(payload['u'], payload['r'], True), payload)
 
-        return None
+    def authenticate_header(self, request):
+        return self.keyword
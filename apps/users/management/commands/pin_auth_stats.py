@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.auth import pin_cache_stats, reset_pin_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show the hit/miss counters of the PIN authentication cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the counters after printing them',
+        )
+
+    def handle(self, *args, **options):
+        stats = pin_cache_stats()
+        ratio = stats['hit_ratio']
+        self.stdout.write(
+            f"hits: {stats['hits']}, misses: {stats['misses']}, "
+            f"hit ratio: {'-' if ratio is None else f'{ratio:.1%}'}"
+        )
+        if options['reset']:
+            reset_pin_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_alter_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(blank=True, max_length=32, verbose_name='Token')),
+                ('user_id', models.PositiveIntegerField(blank=True, null=True, verbose_name='İstifadəçi')),
+                ('issued_before', models.BigIntegerField(blank=True, null=True, verbose_name='Bundan əvvəl verilənlər')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Bitmə vaxtı')),
+            ],
+            options={
+                'verbose_name': 'Ləğv edilmiş token',
+                'verbose_name_plural': 'Ləğv edilmiş tokenlər',
+            },
+        ),
+    ]
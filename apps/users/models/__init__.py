@@ -1,2 +1,3 @@
 from apps.users.models.user import User
 from apps.users.models.shift_handover import ShiftHandover
+from apps.users.models.revoked_token import RevokedToken
@@ -0,0 +1,21 @@
+from django.db import models
+
+
+class RevokedToken(models.Model):
+    """
+    Session token denylist (see apps.users.tokens): a single token by its
+    random id (logout), or every token of a user issued before a cut-off.
+    """
+    jti = models.CharField(max_length=32, blank=True, verbose_name="Token")
+    user_id = models.PositiveIntegerField(null=True, blank=True, verbose_name="İstifadəçi")
+    # Integer milliseconds, like the issue time of the tokens
+    issued_before = models.BigIntegerField(
+        null=True, blank=True, verbose_name="Bundan əvvəl verilənlər")
+    expires_at = models.DateTimeField(db_index=True, verbose_name="Bitmə vaxtı")
+
+    class Meta:
+        verbose_name = "Ləğv edilmiş token"
+        verbose_name_plural = "Ləğv edilmiş tokenlər"
+
+    def __str__(self):
+        return self.jti or f"{self.user_id} < {self.issued_before}"
@@ -20,9 +20,44 @@ class User(DateTimeModel, AbstractUser):
         null=True,
     )
 
+    # Changes of these drop the cached PIN lookup and revoke session tokens
+    AUTH_FIELDS = ('username', 'type', 'is_active', 'password')
+
     class Meta:
         verbose_name = 'Ofisiant və Menecer'
         verbose_name_plural = 'Ofisiant və Menecerlər'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if name in cls.AUTH_FIELDS and value is not models.DEFERRED
+        }
+        return instance
+
+    def snapshot_auth_fields(self):
+        """Mark the current (loaded) values of AUTH_FIELDS as the stored ones."""
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {
+            name: getattr(self, name) for name in self.AUTH_FIELDS
+            if name not in deferred
+        }
+
+    def auth_fields_changed(self, update_fields=None):
+        """
+        Whether saving `update_fields` (all fields when None) may change
+        AUTH_FIELDS; fields that were not loaded count as changed.
+        """
+        fields = self.AUTH_FIELDS if update_fields is None else [
+            name for name in self.AUTH_FIELDS if name in update_fields
+        ]
+        loaded = getattr(self, '_loaded_values', {})
+        return any(
+            name not in loaded or loaded[name] != getattr(self, name)
+            for name in fields
+        )
+
     def __str__(self):
         return f"{self.get_full_name() or self.username}"
@@ -1,35 +1,27 @@
 from rest_framework import permissions
 
+from apps.users.principal import ROLE_HIERARCHY, get_principal
+
 
 class IsWaitress(permissions.BasePermission):
     message = 'You must be a waitress to access this endpoint.'
 
     def has_permission(self, request, view):
-        return request.user.type == 'waitress'
+        return get_principal(request).has_role('waitress')
 
 
 class IsAdmin(permissions.BasePermission):
     message = 'You must be an admin to access this endpoint.'
 
     def has_permission(self, request, view):
-        return request.user.type == 'admin'
+        return get_principal(request).has_role('admin')
 
 
 class IsRestaurantOwner(permissions.BasePermission):
     message = 'You must be a restaurant owner to access this endpoint.'
 
     def has_permission(self, request, view):
-        return request.user.type == 'restaurant'
-
-
-# Define the role hierarchy.
-# Lower numbers mean lower privilege.
-ROLE_HIERARCHY = {
-    'waitress': 1,
-    'captain_waitress': 2,
-    'admin': 3,
-    'restaurant': 4,  # Restaurant owner (highest)
-}
+        return get_principal(request).has_role('restaurant')
 
 
 class MaximumRolePermission(permissions.BasePermission):
@@ -41,12 +33,7 @@ class MaximumRolePermission(permissions.BasePermission):
     message = 'Your role exceeds the maximum level required to access this endpoint.'
 
     def has_permission(self, request, view):
-        user_role = getattr(request.user, 'type', None)
-        if not user_role or user_role not in ROLE_HIERARCHY:
-            return False
-        if self.max_role_level is None:
-            return False
-        return ROLE_HIERARCHY[user_role] <= self.max_role_level
+        return get_principal(request).at_most(self.max_role_level)
 
 
 # --- Specific "At Most" Permission Classes ---
@@ -0,0 +1,63 @@
+"""
+The caller of an API request.
+
+Role, role level and user id are resolved once per request (from the
+session token when there is one, otherwise from the authenticated user)
+and kept on the request, so permission classes and views share them.
+Ownership is compared on `waitress_id`, without loading the related user.
+"""
+
+# Define the role hierarchy.
+# Lower numbers mean lower privilege.
+ROLE_HIERARCHY = {
+    'waitress': 1,
+    'captain_waitress': 2,
+    'admin': 3,
+    'restaurant': 4,  # Restaurant owner (highest)
+}
+
+# Roles that may work on any order, not only their own
+MANAGER_ROLES = frozenset(('captain_waitress', 'admin', 'restaurant'))
+
+
+class Principal:
+    __slots__ = ('user_id', 'role', 'level')
+
+    def __init__(self, user_id, role):
+        self.user_id = user_id
+        self.role = role
+        self.level = ROLE_HIERARCHY.get(role)
+
+    def __repr__(self):
+        return f"<Principal user={self.user_id} role={self.role}>"
+
+    def has_role(self, *roles):
+        return self.role in roles
+
+    def at_most(self, max_level):
+        """True if the role is known and its level does not exceed max_level."""
+        return self.level is not None and max_level is not None and self.level <= max_level
+
+    def owns(self, order):
+        return self.user_id is not None and order.waitress_id == self.user_id
+
+    def can_manage(self, order):
+        """Managers may work on every order, waitresses on their own."""
+        return self.role in MANAGER_ROLES or self.owns(order)
+
+
+def get_principal(request):
+    """The Principal of a DRF request, resolved on first use."""
+    principal = getattr(request, '_principal', None)
+    if principal is None:
+        auth = request.auth
+        if isinstance(auth, dict) and 'r' in auth:
+            principal = Principal(auth['u'], auth['r'])
+        else:
+            user = request.user
+            principal = Principal(
+                user.pk if user.is_authenticated else None,
+                getattr(user, 'type', None),
+            )
+        request._principal = principal
+    return principal
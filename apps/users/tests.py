@@ -0,0 +1,211 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.orders.models import Order
+from apps.tables.models import Room, Table
+from apps.users import tokens
+from apps.users.models import RevokedToken
+from apps.commons.cache import is_shared
+from apps.users.auth import (
+    STATS_KEYS, get_user_by_pin, pin_cache_key, pin_cache_stats, reset_pin_cache_stats)
+from apps.users.principal import Principal
+
+User = get_user_model()
+
+
+class PINAuthCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_pin_cache_stats()
+        # The test LocMem cache stands in for Redis
+        patcher = mock.patch('apps.users.auth.is_shared', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(
+                username='1234', password='x', type='admin')
+        self.client = APIClient()
+
+    def test_repeated_lookups_hit_the_cache(self):
+        get_user_by_pin('1234')
+        with self.assertNumQueries(0):
+            user = get_user_by_pin('1234')
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.type, 'admin')
+        self.assertEqual(pin_cache_stats(), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_stats_are_added_to_the_cache_in_batches(self):
+        with mock.patch('apps.users.auth.STATS_FLUSH_EVERY', 3):
+            get_user_by_pin('1234')
+            get_user_by_pin('1234')
+            self.assertIsNone(cache.get(STATS_KEYS['hits']))
+            get_user_by_pin('1234')
+        self.assertEqual(cache.get(STATS_KEYS['hits']), 2)
+        self.assertEqual(cache.get(STATS_KEYS['misses']), 1)
+        self.assertEqual(pin_cache_stats()['hits'], 2)
+
+    def test_only_the_id_role_and_active_flag_are_cached(self):
+        get_user_by_pin('1234')
+        cached = cache.get(pin_cache_key('1234'))
+        self.assertEqual(cached, (self.user.pk, 'admin', True))
+
+    def test_per_process_cache_is_not_used(self):
+        self.assertFalse(is_shared())
+        database = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                                'LOCATION': 'cache'}}
+        with self.settings(CACHES=database):
+            self.assertFalse(is_shared())
+
+        with mock.patch('apps.users.auth.is_shared', return_value=False):
+            get_user_by_pin('1234')
+            with self.assertNumQueries(1):
+                self.assertEqual(get_user_by_pin('1234').pk, self.user.pk)
+            self.assertIsNone(cache.get(pin_cache_key('1234')))
+
+    def test_pin_is_not_stored_in_the_key(self):
+        self.assertNotIn('1234', pin_cache_key('1234'))
+
+    def test_deactivation_invalidates(self):
+        self.client.credentials(HTTP_X_PIN='1234')
+        self.assertEqual(self.client.get('/api/orders/quick-picks/').status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        response = self.client.get('/api/orders/quick-picks/')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(str(response.data['detail']), 'User account is inactive')
+
+    def test_pin_change_invalidates_old_and_new_pin(self):
+        self.assertIsNone(get_user_by_pin('9999'))
+        get_user_by_pin('1234')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.username = '9999'
+            self.user.save()
+        self.assertIsNone(get_user_by_pin('1234'))
+        self.assertEqual(get_user_by_pin('9999').pk, self.user.pk)
+
+
+class SessionTokenTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(
+                username='1234', password='x', type='waitress')
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post('/api/users/login/', {'pin': '1234'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        return response.data
+
+    def test_token_is_verified_without_queries(self):
+        data = self.login()
+        self.assertEqual(data['role'], 'waitress')
+        self.client.get('/api/orders/quick-picks/')  # warm the quick picks
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/orders/quick-picks/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_revocations_of_other_processes_apply_after_the_refresh(self):
+        _token, payload = tokens.issue_token(self.user)
+        self.assertFalse(tokens.is_revoked(payload))
+        # Another process logs the token out
+        RevokedToken.objects.create(
+            jti=payload['j'], expires_at=timezone.now() + timedelta(hours=1))
+
+        with self.assertNumQueries(0):
+            self.assertFalse(tokens.is_revoked(payload))
+        with self.settings(SESSION_TOKEN_DENYLIST_REFRESH=0):
+            self.assertTrue(tokens.is_revoked(payload))
+
+    def test_role_comes_from_the_token(self):
+        self.login()
+        # Only admins may list waitresses
+        self.assertEqual(self.client.get('/api/orders/list-waitress/').status_code, 403)
+
+    def test_tampered_token_is_rejected(self):
+        token = self.login()['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token[:-2]}xx")
+        self.assertEqual(self.client.get('/api/orders/quick-picks/').status_code, 403)
+
+    def test_logout_revokes_the_token(self):
+        self.login()
+        self.assertEqual(self.client.post('/api/users/logout/').status_code, 204)
+        response = self.client.get('/api/orders/quick-picks/')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(str(response.data['detail']), 'Token revoked')
+
+    def test_user_change_revokes_issued_tokens(self):
+        self.login()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.type = 'admin'
+            self.user.save()
+        self.assertEqual(self.client.get('/api/orders/quick-picks/').status_code, 403)
+
+        self.login()
+        self.assertEqual(self.client.get('/api/orders/quick-picks/').status_code, 200)
+
+    def test_other_user_changes_keep_issued_tokens(self):
+        self.login()
+        with self.captureOnCommitCallbacks(execute=True):
+            update_last_login(None, self.user)
+            self.user.first_name = 'Aysel'
+            self.user.save()
+        self.assertEqual(self.client.get('/api/orders/quick-picks/').status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('y')
+            self.user.save()
+        self.assertEqual(self.client.get('/api/orders/quick-picks/').status_code, 403)
+
+    def test_token_issued_in_the_cut_off_millisecond_is_valid(self):
+        with mock.patch('apps.users.tokens._now_ms', return_value=1700000000000):
+            tokens.revoke_user_tokens(self.user.pk)
+            _token, payload = tokens.issue_token(self.user)
+        self.assertFalse(tokens.is_revoked(payload))
+        self.assertTrue(tokens.is_revoked({**payload, 'i': payload['i'] - 1}))
+
+
+class PrincipalTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(name='Zal')
+        self.table = Table.objects.create(number=1, room=self.room)
+        self.owner = User.objects.create_user(username='1111', password='x', type='waitress')
+        self.other = User.objects.create_user(username='2222', password='x', type='waitress')
+        self.captain = User.objects.create_user(
+            username='3333', password='x', type='captain_waitress')
+        self.order = Order.objects.create(
+            table=self.table, waitress=self.owner, is_main=True)
+        self.client = APIClient()
+
+    def add_item(self, pin):
+        self.client.credentials(HTTP_X_PIN=pin)
+        return self.client.post(
+            f'/api/orders/{self.table.id}/add-order-item/', {'meal_id': 0}, format='json')
+
+    def test_ownership_is_checked_without_loading_the_waitress(self):
+        order = Order.objects.get(pk=self.order.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(Principal(self.owner.pk, 'waitress').can_manage(order))
+            self.assertFalse(Principal(self.other.pk, 'waitress').can_manage(order))
+            self.assertTrue(Principal(self.other.pk, 'admin').can_manage(order))
+
+    def test_add_order_item_respects_ownership(self):
+        # Past the order check the view looks up the (missing) meal
+        self.assertEqual(self.add_item('1111').data['error'], 'Meal not found')
+        self.assertEqual(self.add_item('3333').data['error'], 'Meal not found')
+        self.assertEqual(
+            self.add_item('2222').data['error'],
+            'Order not found or payment has been made already.')
@@ -0,0 +1,126 @@
+"""
+Short-lived session tokens.
+
+`PinLoginAPIView` issues a token signed with the SECRET_KEY (HMAC,
+django.core.signing) carrying the user id, role, issue time, expiry and a
+random id. Clients send it as `Authorization: Bearer <token>`; it is
+verified without reading the user from the database.
+
+Revocation goes through a small denylist in the database (RevokedToken):
+single tokens (logout) until they expire, and per-user cut-offs (the PIN,
+role, active flag or password of a user changed) rejecting every token
+issued before. Every revocation is its own row, so concurrent revocations
+in different processes cannot overwrite each other. Each process checks
+tokens against an in-memory copy of the unexpired rows, read again at most
+every SESSION_TOKEN_DENYLIST_REFRESH seconds; its own revocations apply at
+once. Issue times and cut-offs are integer milliseconds.
+"""
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from apps.users.models import RevokedToken
+
+SALT = "users.session-token"
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def issue_token(user):
+    """(token, payload) for the user, valid for SESSION_TOKEN_TTL seconds."""
+    now = _now_ms()
+    payload = {
+        "u": user.pk,
+        "r": user.type,
+        "i": now,
+        "e": now // 1000 + settings.SESSION_TOKEN_TTL,
+        "j": secrets.token_urlsafe(8),
+    }
+    return signing.dumps(payload, salt=SALT, compress=True), payload
+
+
+def read_token(token):
+    """The payload of a valid, unexpired and unrevoked token."""
+    try:
+        payload = signing.loads(token, salt=SALT)
+    except signing.BadSignature:
+        raise InvalidToken("Invalid token")
+    if payload["e"] <= time.time():
+        raise InvalidToken("Token expired")
+    if is_revoked(payload):
+        raise InvalidToken("Token revoked")
+    return payload
+
+
+# ========================= #
+#         DENYLIST          #
+# ========================= #
+
+_lock = threading.Lock()
+_denylist = {"tokens": set(), "cut_offs": {}, "loaded_at": None}
+
+
+def _load_denylist():
+    revoked, cut_offs = set(), {}
+    rows = RevokedToken.objects.filter(expires_at__gt=timezone.now()).values_list(
+        "jti", "user_id", "issued_before")
+    for jti, user_id, issued_before in rows:
+        if jti:
+            revoked.add(jti)
+        else:
+            cut_offs[user_id] = max(cut_offs.get(user_id, 0), issued_before)
+    return revoked, cut_offs
+
+
+def _current_denylist():
+    now = time.monotonic()
+    with _lock:
+        loaded_at = _denylist["loaded_at"]
+        if loaded_at is not None and now - loaded_at < settings.SESSION_TOKEN_DENYLIST_REFRESH:
+            return _denylist
+    revoked, cut_offs = _load_denylist()
+    with _lock:
+        _denylist.update(tokens=revoked, cut_offs=cut_offs, loaded_at=now)
+        return _denylist
+
+
+def is_revoked(payload):
+    denylist = _current_denylist()
+    if payload["j"] in denylist["tokens"]:
+        return True
+    return payload["i"] < denylist["cut_offs"].get(payload["u"], 0)
+
+
+def _revoke(**fields):
+    RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    RevokedToken.objects.create(**fields)
+
+
+def revoke_token(payload):
+    """Revoke a single token (logout) until it expires."""
+    _revoke(jti=payload["j"],
+            expires_at=datetime.fromtimestamp(payload["e"], tz=dt_timezone.utc))
+    with _lock:
+        _denylist["tokens"].add(payload["j"])
+
+
+def revoke_user_tokens(user_id):
+    """Revoke every token issued to the user so far."""
+    cut_off = _now_ms()
+    # Tokens issued before the cut-off expire within SESSION_TOKEN_TTL
+    _revoke(user_id=user_id, issued_before=cut_off,
+            expires_at=timezone.now() + timedelta(seconds=settings.SESSION_TOKEN_TTL))
+    with _lock:
+        cut_offs = _denylist["cut_offs"]
+        cut_offs[user_id] = max(cut_offs.get(user_id, 0), cut_off)
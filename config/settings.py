@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 
 import os
+from decimal import Decimal
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -176,6 +177,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'apps.users.auth.PINAuthentication',
+        'apps.users.auth.TokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
 }
@@ -187,6 +189,11 @@ SWAGGER_SETTINGS = {
             'type': 'apiKey',
             'name': 'X-PIN',
             'in': 'header'
+        },
+        'Bearer': {
+            'type': 'apiKey',
+            'name': 'Authorization',
+            'in': 'header'
         }
     }
 }
@@ -223,11 +230,24 @@ CORS_ALLOW_HEADERS = [
 ]
 
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# The default cache is per process. REDIS_URL selects Redis (needs the
+# `redis` package), shared by every process (API workers, the Telegram bot,
+# commands); only then are PIN lookups cached and the bot reads the API's
+# report cache.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
     }
-}
 
 CACHE_TIME_IN_SECONDS = 150
 
@@ -265,6 +285,53 @@ PRINTER_SERVICE = os.environ.get(
 
 BACKEND_PORT = os.environ.get('BACKEND_PORT', '8000')
 
+# Day-partitioned columnar export used for analytics (export_analytics)
+ANALYTICS_EXPORT_DIR = os.environ.get(
+    'ANALYTICS_EXPORT_DIR',
+    os.path.join(BASE_DIR, 'analytics')
+)
+
+# Seconds the export's high-water mark is kept behind the newest change,
+# for transactions that commit after a later change was exported
+ANALYTICS_EXPORT_SAFETY_LAG = int(os.environ.get('ANALYTICS_EXPORT_SAFETY_LAG', '300'))
+
+# Rows fetched per query by the streaming CSV/XLSX exports of the admin
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', '2000'))
+
+# History retention (history_retention): months of order/item/statistics
+# history kept in the database, and where older months are archived
+HISTORY_RETENTION_MONTHS = int(os.environ.get('HISTORY_RETENTION_MONTHS', '6'))
+HISTORY_ARCHIVE_DIR = os.environ.get(
+    'HISTORY_ARCHIVE_DIR',
+    os.path.join(BASE_DIR, 'history_archive')
+)
+
+# Send inventory movements of orders through the outbox table instead of
+# writing them inline. Only enable it together with a running
+# `manage.py process_inventory_outbox` worker, which applies the rows.
+INVENTORY_OUTBOX = os.environ.get(
+    'INVENTORY_OUTBOX', 'false'
+).lower() in ('1', 'true', 'yes')
+
+# Reject adding meals whose recipe ingredients are out of stock
+INVENTORY_REJECT_SOLD_OUT = os.environ.get(
+    'INVENTORY_REJECT_SOLD_OUT', 'false'
+).lower() in ('1', 'true', 'yes')
+
+# Seconds a report reaching the current work period stays cached
+REPORT_CACHE_OPEN_TTL = int(os.environ.get('REPORT_CACHE_OPEN_TTL', '60'))
+
+# Seconds a PIN -> user lookup of PINAuthentication stays cached (only
+# with a shared cache backend)
+PIN_AUTH_CACHE_TTL = int(os.environ.get('PIN_AUTH_CACHE_TTL', '60'))
+
+# Lifetime in seconds of the session tokens issued by the PIN login
+SESSION_TOKEN_TTL = int(os.environ.get('SESSION_TOKEN_TTL', str(12 * 3600)))
+
+# Seconds a process keeps its copy of the session token denylist before
+# reading it again (revocations by other processes apply within this time)
+SESSION_TOKEN_DENYLIST_REFRESH = int(os.environ.get('SESSION_TOKEN_DENYLIST_REFRESH', '5'))
+
 JAZZMIN_SETTINGS = {
     "site_title": "KAZZA Admin",
     "site_header": "KAZZA Panel",
@@ -277,3 +344,24 @@ X_FRAME_OPTIONS = 'ALLOWALL'  # Change value for your need.
 # Get this from @BotFather
 TELEGRAM_BOT_TOKEN = os.environ.get(
     'TELEGRAM_BOT_TOKEN', '8417102339:AAHswWwkyAR5_zCewPS3Poc6wRH7cUv5Has')
+
+# Telegram bot -> backend calls: timeout in seconds, calls in flight,
+# and updates handled at once
+TELEGRAM_BOT_API_TIMEOUT = float(os.environ.get('TELEGRAM_BOT_API_TIMEOUT', '10'))
+TELEGRAM_BOT_MAX_API_CALLS = int(os.environ.get('TELEGRAM_BOT_MAX_API_CALLS', '4'))
+TELEGRAM_BOT_CONCURRENT_UPDATES = int(
+    os.environ.get('TELEGRAM_BOT_CONCURRENT_UPDATES', '16'))
+
+# Telegram bot pushes: seconds between checks, discount (AZN) that raises
+# an alert, and deleted items within the window (minutes) that raise one
+TELEGRAM_PUSH_TICK_SECONDS = int(os.environ.get('TELEGRAM_PUSH_TICK_SECONDS', '60'))
+TELEGRAM_ALERT_DISCOUNT = Decimal(os.environ.get('TELEGRAM_ALERT_DISCOUNT', '20'))
+TELEGRAM_ALERT_VOIDS = int(os.environ.get('TELEGRAM_ALERT_VOIDS', '5'))
+TELEGRAM_ALERT_VOID_WINDOW = int(os.environ.get('TELEGRAM_ALERT_VOID_WINDOW', '30'))
+
+# Telegram webhook mode: public URL of /orders/telegram/webhook/ (empty
+# keeps polling), the secret Telegram sends back (required with a URL), and
+# the update queue size
+TELEGRAM_WEBHOOK_URL = os.environ.get('TELEGRAM_WEBHOOK_URL', '')
+TELEGRAM_WEBHOOK_SECRET = os.environ.get('TELEGRAM_WEBHOOK_SECRET', '')
+TELEGRAM_WEBHOOK_QUEUE_SIZE = int(os.environ.get('TELEGRAM_WEBHOOK_QUEUE_SIZE', '100'))